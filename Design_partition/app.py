@@ -9,16 +9,68 @@ Description:
   - Implements a defensive validation system that automatically fixes common
     errors (e.g., missing sections) and gracefully handles invalid values
     (e.g., unknown style presets), providing clear feedback to the user.
+  - Plans with thousands of elements can opt in to --large-plan on (or auto,
+    from LARGE_PLAN_ELEMENTS elements): styles are drawn as batched
+    collections, so paint order is style by style rather than config order,
+    and labels too small to read or wider than their feature are skipped.
+    The default (off) draws every plan exactly as before.
 """
 
+import time
+_T_START = time.perf_counter()
+
 import argparse
+import contextlib
+import copy
+import glob
+import hashlib
+import heapq
+import io
+import os
+import shutil
 import sys
-import yaml
 import json
-import matplotlib
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib import font_manager
+from bisect import bisect_left, bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+# matplotlib, numpy and yaml are imported lazily (see load_matplotlib(), draw_large() and load_cfg()):
+# a run that only validates, hits a cache or renders without matplotlib never pays for them.
+
+# ==============================================================================
+# 启动耗时分析 (Startup Profiling, --profile-startup)
+# ==============================================================================
+PHASES = [] # (phase name, seconds), printed by --profile-startup
+
+@contextlib.contextmanager
+def phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASES.append((name, time.perf_counter() - started))
+
+def print_startup_profile():
+    total = time.perf_counter() - _T_START
+    print("\n--- Startup Profile ---")
+    for name, seconds in PHASES:
+        # Phases inside render() finish before it, so they are listed first and included in its total
+        print(f"{name:<28} {seconds * 1000:9.1f} ms")
+    print(f"{'total (since app.py import)':<28} {total * 1000:9.1f} ms")
+
+_MPL = None
+
+def load_matplotlib():
+    """Imports matplotlib on first use, with the non-interactive Agg backend selected before pyplot loads."""
+    global _MPL
+    if _MPL is None:
+        with phase("import matplotlib (Agg)"):
+            import matplotlib
+            matplotlib.use("Agg") # No GUI toolkit is needed to write files
+            import matplotlib.pyplot as plt
+            import matplotlib.patches as patches
+        _MPL = (matplotlib, plt, patches)
+    return _MPL
 
 # ==============================================================================
 # 样式预设库 (Style Presets Library)
@@ -81,15 +133,91 @@ CJK_CANDIDATES = [
     "Hiragino Sans GB", "DengXian", "SimHei"
 ]
 
-def pick_cjk_font():
-    available = {f.name for f in font_manager.fontManager.ttflist}
+FONT_CACHE_VERSION = 1
+
+def font_cache_path():
+    """Per-user cache file for the resolved CJK font."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "garden_plan", "cjk_font.json")
+
+def font_dirs():
+    """System and user font directories for this platform."""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        return [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+                os.path.join(os.environ.get("LOCALAPPDATA", home), "Microsoft", "Windows", "Fonts")]
+    if sys.platform == "darwin":
+        return ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    return ["/usr/share/fonts", "/usr/local/share/fonts", os.path.join(home, ".fonts"),
+            os.path.join(home, ".local", "share", "fonts")]
+
+def font_dirs_key():
+    """
+    mtimes of the font directories and their direct subdirectories. Installing or
+    removing a font changes one of them, which invalidates the cached font.
+    """
+    key = {}
+    for d in font_dirs():
+        try:
+            key[d] = os.stat(d).st_mtime_ns
+            with os.scandir(d) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        key[entry.path] = entry.stat().st_mtime_ns
+        except OSError:
+            continue
+    return key
+
+def _scan_cjk_font():
+    """Walks matplotlib's font list (slow on a cold matplotlib cache); returns (name, path) or (None, None)."""
+    from matplotlib import font_manager
+    by_name = {}
+    for f in font_manager.fontManager.ttflist:
+        by_name.setdefault(f.name, f.fname)
     for font in CJK_CANDIDATES:
-        if font in available: return font
-    return None
+        if font in by_name: return font, by_name[font]
+    return None, None
+
+@lru_cache(maxsize=None)
+def resolve_cjk_font():
+    """
+    Returns (font name, font file path) of the first available CJK candidate, or
+    (None, None). The answer (including "none found") is cached on disk and
+    reused while the font directories are unchanged.
+    """
+    path, key = font_cache_path(), font_dirs_key()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if (cached.get("version") == FONT_CACHE_VERSION and cached.get("key") == key
+                and cached.get("candidates") == CJK_CANDIDATES
+                and (cached.get("path") is None or os.path.exists(cached["path"]))):
+            return cached.get("name"), cached.get("path")
+    except (OSError, ValueError):
+        pass
+
+    name, font_path = _scan_cjk_font()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": FONT_CACHE_VERSION, "key": key, "candidates": CJK_CANDIDATES,
+                       "name": name, "path": font_path}, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass # A read-only home directory only costs the scan next time
+    return name, font_path
+
+def pick_cjk_font():
+    return resolve_cjk_font()[0]
 
 def setup_fonts(label_mode):
+    matplotlib, _, _ = load_matplotlib()
     if label_mode in ("cn", "bilingual"):
-        cjk_font = pick_cjk_font()
+        with phase("resolve CJK font"):
+            cjk_font = pick_cjk_font()
         if cjk_font:
             matplotlib.rcParams["font.family"] = "sans-serif"
             matplotlib.rcParams["font.sans-serif"] = [cjk_font, "DejaVu Sans"] # Corrected key
@@ -100,6 +228,17 @@ def setup_fonts(label_mode):
     matplotlib.rcParams["font.family"] = "DejaVu Sans"
     return "en", "[OK] Using English-only labels."
 
+def resolve_label_font(label_mode):
+    """setup_fonts() for the native renderers: returns (label_mode, CJK font name, CJK font path, message)."""
+    if label_mode in ("cn", "bilingual"):
+        with phase("resolve CJK font"):
+            cjk_font, cjk_path = resolve_cjk_font()
+        if cjk_font:
+            return label_mode, cjk_font, cjk_path, f"[OK] Using CJK font: {cjk_font}"
+        print("[WARN] No CJK font found. Auto-fallback to English-only labels.")
+        return "en", None, None, "[WARN] Fallback to English labels."
+    return "en", None, None, "[OK] Using English-only labels."
+
 # ==============================================================================
 # 配置加载 (Configuration Loading)
 # ==============================================================================
@@ -109,12 +248,16 @@ def load_cfg(path: str):
             if path.lower().endswith('.json'):
                 return json.load(f)
             elif path.lower().endswith(('.yml', '.yaml')):
-                return yaml.safe_load(f)
+                import yaml # Only YAML configs pay for importing PyYAML
+                try:
+                    return yaml.safe_load(f)
+                except yaml.YAMLError as e:
+                    raise SystemExit(f"[ERROR] Error parsing config file '{path}': {e}")
             else:
                 raise SystemExit(f"[ERROR] Unsupported config file format: {path}. Use .json or .yaml.")
     except FileNotFoundError:
         raise SystemExit(f"[ERROR] Config file not found at: {path}")
-    except (yaml.YAMLError, json.JSONDecodeError) as e:
+    except json.JSONDecodeError as e:
         raise SystemExit(f"[ERROR] Error parsing config file '{path}': {e}")
 
 # ==============================================================================
@@ -128,7 +271,7 @@ def validate_and_fix_cfg(cfg: dict):
     
     for key in ["title", "canvas", "house", "zones"]:
         if key not in cfg:
-            cfg[key] = DEFAULTS[key]
+            cfg[key] = copy.deepcopy(DEFAULTS[key]) # Batch workers reuse DEFAULTS across configs
             fixes.append(f"Top-level key '{key}' was missing. Added default values.")
 
     if "rect" not in cfg.get("house", {}):
@@ -142,9 +285,249 @@ def validate_and_fix_cfg(cfg: dict):
             z["style_preset"] = "default"
         if "rect" not in z and "polygon" not in z:
             errors.append(f"Zone '{z.get('id', i+1)}' has no shape (missing 'rect' or 'polygon'). It will not be drawn.")
+
+    for issue in validate_geometry(cfg):
+        warnings.append(f"Geometry: {issue['message']}")
             
     return cfg, fixes, warnings, errors
 
+# ==============================================================================
+# 几何校验 (Geometry Validation)
+# ==============================================================================
+GEOM_EPS = 1e-9 # Normalized units; shapes that only touch (shared edges) do not count as overlapping
+
+def _orient(p, q, r):
+    v = (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+    return 0 if abs(v) < GEOM_EPS else (1 if v > 0 else -1)
+
+def _on_segment(p, a, b):
+    return (_orient(a, b, p) == 0 and min(a[0], b[0]) - GEOM_EPS <= p[0] <= max(a[0], b[0]) + GEOM_EPS
+            and min(a[1], b[1]) - GEOM_EPS <= p[1] <= max(a[1], b[1]) + GEOM_EPS)
+
+def segments_cross(a, b, c, d):
+    """True if segments ab and cd cross at a single interior point (touching does not count)."""
+    return _orient(a, b, c) * _orient(a, b, d) < 0 and _orient(c, d, a) * _orient(c, d, b) < 0
+
+def segments_touch(a, b, c, d):
+    """True if segments ab and cd share any point."""
+    if segments_cross(a, b, c, d): return True
+    return _on_segment(c, a, b) or _on_segment(d, a, b) or _on_segment(a, c, d) or _on_segment(b, c, d)
+
+def edges(poly):
+    return zip(poly, poly[1:] + poly[:1])
+
+def point_strictly_inside(pt, poly):
+    """Ray casting; points on the boundary are not inside."""
+    inside = False
+    for a, b in edges(poly):
+        if _on_segment(pt, a, b): return False
+        if (a[1] > pt[1]) != (b[1] > pt[1]) and pt[0] < a[0] + (pt[1] - a[1]) * (b[0] - a[0]) / (b[1] - a[1]):
+            inside = not inside
+    return inside
+
+def polygons_overlap(a, b):
+    """
+    True if two polygons share interior area: an edge of one properly crosses an
+    edge of the other, or a vertex, edge midpoint or the centroid of one lies
+    strictly inside the other (the last two catch identical and nested shapes).
+    """
+    for p1, p2 in edges(a):
+        for q1, q2 in edges(b):
+            if segments_cross(p1, p2, q1, q2): return True
+    for poly, other in ((a, b), (b, a)):
+        probes = list(poly) + [((p[0] + q[0]) / 2, (p[1] + q[1]) / 2) for p, q in edges(poly)]
+        probes.append((sum(p[0] for p in poly) / len(poly), sum(p[1] for p in poly) / len(poly)))
+        if any(point_strictly_inside(pt, other) for pt in probes): return True
+    return False
+
+def self_intersects(poly):
+    """True if two non-adjacent edges of the polygon share a point."""
+    n = len(poly)
+    edge_list = list(edges(poly))
+    for i in range(n):
+        for j in range(i + 2, n):
+            if i == 0 and j == n - 1: continue # Adjacent through the closing edge
+            if segments_touch(*edge_list[i], *edge_list[j]): return True
+    return False
+
+def zone_outline(z):
+    """Normalized outline of a zone as a list of (x, y), or None if the shape is malformed."""
+    try:
+        if "rect" in z:
+            x, y, w, h = (float(v) for v in z["rect"][:4])
+            return [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        pts = [(float(p[0]), float(p[1])) for p in z["polygon"]]
+        if len(pts) > 1 and pts[0] == pts[-1]: pts.pop() # Explicitly closed polygon
+        return pts
+    except (KeyError, TypeError, ValueError, IndexError):
+        return None
+
+class _YIndex:
+    """
+    The live boxes of the find_overlaps() sweep, indexed on their y extent. All
+    boxes are known up front, so both indexes are segment trees over fixed slots:
+    one over the boxes' bottom edges (which live box starts in a y range) and one
+    over the elementary intervals between all y edges (which live boxes contain
+    a given y). Insert and remove are O(log n); nothing shifts, unlike a sorted list.
+    """
+    def __init__(self, boxes):
+        order = sorted(range(len(boxes)), key=lambda i: boxes[i][1])
+        self.start_ys = [boxes[i][1] for i in order]
+        self.n_start = 1 << max(len(boxes) - 1, 0).bit_length()
+        self.start_box = order # Leaf slot -> box
+        self.start_leaf = [0] * len(boxes) # Box -> leaf node of the bottom-edge tree
+        for s, i in enumerate(order): self.start_leaf[i] = s + self.n_start
+        self.live = [0] * (2 * self.n_start) # Live boxes below each node of the bottom-edge tree
+        self.ys = sorted({b[1] for b in boxes} | {b[3] for b in boxes})
+        self.n_span = 1 << max(len(self.ys) - 1, 0).bit_length()
+        rank = {y: r for r, y in enumerate(self.ys)}
+        self.spans = [(rank[b[1]] + self.n_span, rank[b[3]] + self.n_span) for b in boxes]
+        self.cover = [None] * (2 * self.n_span) # Node of the span tree -> set of live boxes covering it
+
+    def _update(self, i, add):
+        node, live, step = self.start_leaf[i], self.live, 1 if add else -1
+        while node:
+            live[node] += step; node >>= 1
+        lo, hi = self.spans[i]
+        cover = self.cover
+        while lo < hi: # Canonical cover of the box's elementary intervals [lo, hi)
+            if lo & 1:
+                if cover[lo] is None: cover[lo] = set()
+                (cover[lo].add if add else cover[lo].discard)(i); lo += 1
+            if hi & 1:
+                hi -= 1
+                if cover[hi] is None: cover[hi] = set()
+                (cover[hi].add if add else cover[hi].discard)(i)
+            lo >>= 1; hi >>= 1
+
+    def add(self, i): self._update(i, True)
+    def remove(self, i): self._update(i, False)
+
+    def containing(self, y):
+        """Live boxes with bottom <= y < top."""
+        leaf = bisect_right(self.ys, y) - 1
+        found = []
+        if 0 <= leaf < len(self.ys) - 1:
+            node, cover = leaf + self.n_span, self.cover
+            while node:
+                if cover[node]: found.extend(cover[node])
+                node >>= 1
+        return found
+
+    def starting_in(self, y_lo, y_hi):
+        """Live boxes with y_lo < bottom < y_hi."""
+        lo, hi = bisect_right(self.start_ys, y_lo) + self.n_start, bisect_left(self.start_ys, y_hi) + self.n_start
+        live, stack, found = self.live, [], []
+        while lo < hi:
+            if lo & 1:
+                if live[lo]: stack.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                if live[hi]: stack.append(hi)
+            lo >>= 1; hi >>= 1
+        while stack:
+            node = stack.pop()
+            if node >= self.n_start:
+                found.append(self.start_box[node - self.n_start])
+                continue
+            if live[2 * node]: stack.append(2 * node)
+            if live[2 * node + 1]: stack.append(2 * node + 1)
+        return found
+
+def find_overlaps(items):
+    """
+    Sweep line over bounding boxes: items [(id, outline)] -> [(id_a, id_b)] of
+    outlines that overlap. Boxes are visited by left edge and a heap retires boxes
+    whose right edge has been passed. A live box's y extent meets the new box's
+    [y0, y1] iff it contains y0 or starts inside (y0, y1); _YIndex answers both
+    directly, so only boxes that really overlap in y are compared, however tall
+    the other zones (or the house) are. O(n log n + k log n) for k overlapping boxes.
+    """
+    boxes = [(min(x for x, _ in o), min(y for _, y in o), max(x for x, _ in o), max(y for _, y in o)) for _, o in items]
+    live, retire, pairs = _YIndex(boxes), [], [] # retire: heap of (x1, i)
+    for i in sorted(range(len(items)), key=lambda i: boxes[i][0]):
+        x0, y0, x1, y1 = boxes[i]
+        while retire and retire[0][0] <= x0 + GEOM_EPS:
+            _, j = heapq.heappop(retire)
+            live.remove(j)
+        for j in live.containing(y0 + GEOM_EPS) + live.starting_in(y0 + GEOM_EPS, y1 - GEOM_EPS):
+            if polygons_overlap(items[j][1], items[i][1]):
+                pairs.append((items[j][0], items[i][0]) if j < i else (items[i][0], items[j][0]))
+        live.add(i)
+        heapq.heappush(retire, (x1, i))
+    return pairs
+
+def validate_geometry(cfg: dict):
+    """
+    Geometry checks on a validated config. Returns a list of issues
+    {"type", "ids", "message"}, where type is one of out_of_bounds,
+    self_intersection, overlap or house_collision, and ids names the zones
+    (or paths / features) involved. The house takes part as id 'house'.
+    """
+    issues = []
+    def issue(kind, ids, message): issues.append({"type": kind, "ids": ids, "message": message})
+    def out_of_bounds(pts): return [p for p in pts if not (-GEOM_EPS <= p[0] <= 1 + GEOM_EPS and -GEOM_EPS <= p[1] <= 1 + GEOM_EPS)]
+
+    items = []
+    house = zone_outline(cfg.get("house", {})) if "rect" in cfg.get("house", {}) else None
+    if house: items.append(("house", house))
+    for i, z in enumerate(cfg.get("zones", [])):
+        zid = str(z.get("id", i + 1))
+        outline = zone_outline(z)
+        if outline is None: continue
+        if len(outline) < 3:
+            issue("self_intersection", [zid], f"Zone '{zid}' polygon has fewer than 3 points.")
+            continue
+        outside = out_of_bounds(outline)
+        if outside:
+            issue("out_of_bounds", [zid], f"Zone '{zid}' has {len(outside)} point(s) outside the 0-1 frame, e.g. {outside[0]}.")
+        if "polygon" in z and self_intersects(outline):
+            issue("self_intersection", [zid], f"Zone '{zid}' polygon intersects itself.")
+        items.append((zid, outline))
+
+    for a, b in find_overlaps(items):
+        if "house" in (a, b):
+            zid = b if a == "house" else a
+            issue("overlap", ["house", zid], f"Zone '{zid}' overlaps the house.")
+        else:
+            issue("overlap", [a, b], f"Zones '{a}' and '{b}' overlap.")
+
+    for i, p in enumerate(cfg.get("paths", [])):
+        try:
+            outside = out_of_bounds([(float(x), float(y)) for x, y in p.get("points", [])])
+        except (TypeError, ValueError):
+            continue
+        if outside:
+            pid = str(p.get("name", i + 1))
+            issue("out_of_bounds", [pid], f"Path '{pid}' has {len(outside)} point(s) outside the 0-1 frame, e.g. {outside[0]}.")
+
+    # Features are checked in canvas pixels: their size is a fraction of the frame width in both directions
+    frame_w, frame_h = size_px(cfg, 1, 1)
+    hx0 = hy0 = hx1 = hy1 = None
+    if house:
+        (hx0, hy0), (hx1, hy1) = to_px(cfg, *house[0]), to_px(cfg, *house[2])
+    for i, f in enumerate(cfg.get("features", [])):
+        fid = str(f.get("name_en") or f.get("id") or i + 1)
+        try:
+            fx, fy = float(f["position"][0]), float(f["position"][1])
+            half = float(f.get("size", 0)) * frame_w / 2
+        except (KeyError, TypeError, ValueError, IndexError):
+            continue
+        if out_of_bounds([(fx, fy)]):
+            issue("out_of_bounds", [fid], f"Feature '{fid}' is positioned outside the 0-1 frame at {(fx, fy)}.")
+        if hx0 is None: continue
+        cx, cy = to_px(cfg, fx, fy)
+        if f.get("type") == "tree":
+            # Circle vs rectangle: distance from the centre to the nearest point of the house
+            dx, dy = max(hx0 - cx, 0, cx - hx1), max(hy0 - cy, 0, cy - hy1)
+            hit = dx * dx + dy * dy < half * half - GEOM_EPS
+        else:
+            hit = cx - half < hx1 and cx + half > hx0 and cy - half < hy1 and cy + half > hy0
+        if hit and half > 0:
+            issue("house_collision", ["house", fid], f"Feature '{fid}' collides with the house.")
+    return issues
+
 # ==============================================================================
 # 坐标换算 (Coordinate Conversion)
 # ==============================================================================
@@ -162,27 +545,12 @@ def size_px(cfg, nw, nh):
 # 核心绘图函数 (Core Drawing Function)
 # ==============================================================================
 def draw(cfg, out_path: str, dpi: int, label_mode: str):
+    matplotlib, plt, patches = load_matplotlib()
     label_mode, font_msg = setup_fonts(label_mode)
     print(font_msg)
 
-    W, H = cfg["canvas"]["width"], cfg["canvas"]["height"]
-    fig, ax = plt.subplots(figsize=(W / 100, H / 100), dpi=100)
-    fig.patch.set_facecolor(cfg["canvas"].get("bg_color", "#FDFBF8"))
-    ax.set_xlim(0, W); ax.set_ylim(0, H)
-    ax.set_aspect('equal', adjustable='box')
-    ax.invert_yaxis()
-
-    m = cfg["canvas"].get("margin", 40)
-    ax.add_patch(patches.Rectangle((m, m), W - 2*m, H - 2*m, fill=False, edgecolor="#8D8D8D", linewidth=1.5))
-    ax.text(W / 2, m / 2, cfg.get("title", ""), ha="center", va="center", fontsize=20, color="#2E2E2E", weight="bold")
-
-    house_cfg = cfg.get("house", {})
-    if "rect" in house_cfg:
-        styles = STYLE_PRESETS["house"]
-        hx, hy = to_px(cfg, *house_cfg["rect"][:2])
-        hw, hh = size_px(cfg, *house_cfg["rect"][2:])
-        ax.add_patch(patches.Rectangle((hx, hy), hw, hh, facecolor=styles["facecolor"], edgecolor=styles["edgecolor"], linewidth=styles["linewidth"]))
-        ax.text(hx + hw / 2, hy + hh / 2, styles["label"], ha="center", va="center", color="#FFFFFF", fontsize=12, weight="bold")
+    fig, ax = new_figure(cfg, plt)
+    draw_frame(ax, cfg, patches)
 
     for z in cfg.get("zones", []):
         preset_name = z.get("style_preset", "default")
@@ -248,27 +616,540 @@ def draw(cfg, out_path: str, dpi: int, label_mode: str):
             ax.add_patch(feature_patch)
             ax.text(fx, fy + fw, f.get("name_en", ""), ha="center", va="center", fontsize=8, color="#555")
 
+    save_figure(ax, plt, out_path, dpi)
+
+def new_figure(cfg, plt):
+    W, H = cfg["canvas"]["width"], cfg["canvas"]["height"]
+    fig, ax = plt.subplots(figsize=(W / 100, H / 100), dpi=100)
+    fig.patch.set_facecolor(cfg["canvas"].get("bg_color", "#FDFBF8"))
+    ax.set_xlim(0, W); ax.set_ylim(0, H)
+    ax.set_aspect('equal', adjustable='box')
+    ax.invert_yaxis()
+    return fig, ax
+
+def draw_frame(ax, cfg, patches):
+    """Plan frame, title and house, shared by draw() and draw_large()."""
+    W, H = cfg["canvas"]["width"], cfg["canvas"]["height"]
+    m = cfg["canvas"].get("margin", 40)
+    ax.add_patch(patches.Rectangle((m, m), W - 2*m, H - 2*m, fill=False, edgecolor="#8D8D8D", linewidth=1.5))
+    ax.text(W / 2, m / 2, cfg.get("title", ""), ha="center", va="center", fontsize=20, color="#2E2E2E", weight="bold")
+
+    house_cfg = cfg.get("house", {})
+    if "rect" in house_cfg:
+        styles = STYLE_PRESETS["house"]
+        hx, hy = to_px(cfg, *house_cfg["rect"][:2])
+        hw, hh = size_px(cfg, *house_cfg["rect"][2:])
+        ax.add_patch(patches.Rectangle((hx, hy), hw, hh, facecolor=styles["facecolor"], edgecolor=styles["edgecolor"], linewidth=styles["linewidth"]))
+        ax.text(hx + hw / 2, hy + hh / 2, styles["label"], ha="center", va="center", color="#FFFFFF", fontsize=12, weight="bold")
+
+def save_figure(ax, plt, out_path, dpi):
     ax.set_xticks([]); ax.set_yticks([])
     for spine in ax.spines.values(): spine.set_visible(False)
     
-    plt.tight_layout(pad=0)
-    plt.savefig(out_path, dpi=dpi, bbox_inches='tight')
-    plt.close()
+    with phase("layout + savefig"):
+        plt.tight_layout(pad=0)
+        plt.savefig(out_path, dpi=dpi, bbox_inches='tight')
+        plt.close()
+    print(f"\n[SUCCESS] Garden plan saved to: {out_path}")
+
+# ==============================================================================
+# 大型平面图绘图 (Large-Plan Drawing)
+# ==============================================================================
+LARGE_PLAN_ELEMENTS = 1000 # Zones + paths + features from which --large-plan auto switches to draw_large() (and off suggests it)
+MIN_LABEL_PX = 6 # Text smaller than this at the output dpi is not drawn
+ROUND_CORNER_STEPS = 8 # Vertices per rounded corner
+
+def count_elements(cfg):
+    return len(cfg.get("zones", [])) + len(cfg.get("paths", [])) + len(cfg.get("features", []))
+
+def use_large_plan(cfg, large_plan="off"):
+    """Resolves --large-plan {auto,on,off} for a config. Opt-in: draw_large() changes paint order and drops small labels."""
+    if large_plan == "auto": return count_elements(cfg) >= LARGE_PLAN_ELEMENTS
+    return large_plan == "on"
+
+def plan_to_px(cfg, xy):
+    """Vectorized to_px(): an (..., 2) array of normalized coordinates -> canvas pixels."""
+    import numpy as np
+    W, H = cfg["canvas"]["width"], cfg["canvas"]["height"]
+    m = cfg["canvas"].get("margin", 40)
+    return m + xy * np.array([W - 2 * m, H - 2 * m])
+
+def rect_vertices(xywh, radius):
+    """(n, 4) canvas-pixel rects -> (n, k, 2) outlines; corners are rounded when radius > 0."""
+    import numpy as np
+    x, y, w, h = xywh.T
+    if radius <= 0:
+        return np.stack([np.stack(c, axis=-1) for c in ((x, y), (x + w, y), (x + w, y + h), (x, y + h))], axis=1)
+    r = np.minimum(radius, np.minimum(w, h) / 2)
+    centers = np.stack([np.stack(c, axis=-1) for c in ((x + w - r, y + r), (x + w - r, y + h - r), (x + r, y + h - r), (x + r, y + r))], axis=1)
+    angles = np.radians(np.array([-90, 0, 90, 180])[:, None] + 90 * np.arange(ROUND_CORNER_STEPS + 1) / ROUND_CORNER_STEPS)
+    arc = np.stack([np.cos(angles), np.sin(angles)], axis=-1) # (4 corners, steps + 1, 2)
+    verts = centers[:, :, None, :] + r[:, None, None, None] * arc[None]
+    return verts.reshape(len(xywh), -1, 2)
+
+def compound_path(polys):
+    """One matplotlib Path with a closed subpath per polygon."""
+    import numpy as np
+    from matplotlib.path import Path
+    vertices, codes = [], []
+    for poly in polys:
+        vertices.append(poly); vertices.append(poly[:1])
+        c = np.full(len(poly) + 1, Path.LINETO, dtype=Path.code_type)
+        c[0], c[-1] = Path.MOVETO, Path.CLOSEPOLY
+        codes.append(c)
+    return Path(np.concatenate(vertices), np.concatenate(codes))
+
+def label_fits(text, font_size, box_w, box_h, dpi, pad=0.0):
+    """
+    A label is legible if its glyphs are at least MIN_LABEL_PX tall at the output dpi and
+    its estimated box (in canvas pixels, 100 per inch) fits inside the element it names.
+    """
+    from native_render import text_lines, text_width_em
+    if font_size * dpi / 72 < MIN_LABEL_PX: return False
+    size = font_size * 100 / 72
+    lines = text_lines(text)
+    width = max(text_width_em(l) for l in lines) * size + 2 * pad * size
+    height = (1.4 * (len(lines) - 1) + 1) * size + 2 * pad * size
+    return width <= box_w and height <= box_h
+
+def draw_large(cfg, out_path: str, dpi: int, label_mode: str):
+    """
+    draw() for plans with thousands of elements. Coordinates are converted with
+    one NumPy transform per element kind, elements that share a style become one
+    PolyCollection / LineCollection (so the renderer walks a few artists instead
+    of one per element), and labels that would not fit their element are skipped.
+    Within one kind, elements are painted style by style, not in config order.
+    """
+    import numpy as np
+    matplotlib, plt, patches = load_matplotlib()
+    from matplotlib.collections import LineCollection, PolyCollection
+    label_mode, font_msg = setup_fonts(label_mode)
+    print(font_msg)
+
+    fig, ax = new_figure(cfg, plt)
+    draw_frame(ax, cfg, patches)
+    frame_w, frame_h = size_px(cfg, 1, 1)
+    label_style = STYLE_PRESETS["label_style"]
+    labels, skipped = [], 0
+
+    def style_key(styles):
+        return json.dumps(styles, sort_keys=True, default=str)
+
+    # Zones: group by resolved style; rects and polygons of one style share a collection
+    groups = {} # style key -> {"styles", "rects", "rect_zones", "polys", "poly_zones"}
+    for z in cfg.get("zones", []):
+        styles = STYLE_PRESETS.get(z.get("style_preset", "default"), STYLE_PRESETS["default"])
+        if z.get("style_override"):
+            styles = {**styles, **z["style_override"]}
+        group = groups.setdefault(style_key(styles), {"styles": styles, "rects": [], "rect_zones": [], "polys": [], "poly_zones": []})
+        if "rect" in z:
+            group["rects"].append(z["rect"][:4]); group["rect_zones"].append(z)
+        elif "polygon" in z:
+            group["polys"].append(z["polygon"]); group["poly_zones"].append(z)
+
+    def zone_label(z):
+        if label_mode == "bilingual": return f"{z.get('name_cn', '')}\n{z.get('name_en', '')}"
+        elif label_mode == "cn": return f"{z.get('name_cn', '')}"
+        return f"{z.get('name_en', '')}"
+
+    def add_label(z, cx, cy, box_w, box_h):
+        nonlocal skipped
+        text = zone_label(z)
+        if not text.strip(): return
+        if label_fits(text, label_style["font_size"], box_w, box_h, dpi, pad=0.4): labels.append((cx, cy, text))
+        else: skipped += 1
+
+    with phase("large plan: build collections"):
+        for group in groups.values():
+            styles, verts = group["styles"], []
+            if group["rects"]:
+                xywh = np.asarray(group["rects"], dtype=float)
+                xywh[:, :2] = plan_to_px(cfg, xywh[:, :2])
+                xywh[:, 2:] *= (frame_w, frame_h)
+                verts.extend(rect_vertices(xywh, styles.get("border_radius", 0) * frame_w))
+                for z, (x, y, w, h) in zip(group["rect_zones"], xywh):
+                    add_label(z, x + w / 2, y + h / 2, w, h)
+            if group["polys"]:
+                # One transform for every vertex of every polygon, then split back per polygon
+                lengths = [len(p) for p in group["polys"]]
+                pts = plan_to_px(cfg, np.asarray([pt for poly in group["polys"] for pt in poly], dtype=float))
+                polys = np.split(pts, np.cumsum(lengths)[:-1])
+                verts.extend(polys)
+                for z, poly in zip(group["poly_zones"], polys):
+                    (x0, y0), (x1, y1) = poly.min(axis=0), poly.max(axis=0)
+                    cx, cy = poly.mean(axis=0)
+                    add_label(z, cx, cy, x1 - x0, y1 - y0)
+            edge = styles.get("hatch_color", styles.get("edgecolor")) if styles.get("hatch") else styles.get("edgecolor")
+            collection = PolyCollection(verts, closed=True, facecolors=styles.get("facecolor"), edgecolors=edge,
+                                        linewidths=styles.get("linewidth"), linestyles=styles.get("linestyle", "-"),
+                                        alpha=styles.get("alpha", 1.0))
+            ax.add_collection(collection, autolim=False)
+            if styles.get("hatch"):
+                # Agg hatches a collection path by path; one compound path is hatched in a single pass.
+                # add_artist, not add_patch: the limits are fixed and add_patch walks every curve for them
+                ax.add_artist(patches.PathPatch(compound_path(verts), fill=False, edgecolor=edge, linewidth=0,
+                                                hatch=styles["hatch"], alpha=styles.get("alpha", 1.0)))
+
+        # Paths: one LineCollection per preset
+        path_groups = {}
+        for p in cfg.get("paths", []):
+            if "points" not in p: continue
+            path_groups.setdefault(p.get("style_preset", "path_stone"), []).append(p["points"])
+        for preset, paths in path_groups.items():
+            styles = STYLE_PRESETS.get(preset)
+            lengths = [len(pts) for pts in paths]
+            pts = plan_to_px(cfg, np.asarray([pt for path in paths for pt in path], dtype=float))
+            ax.add_collection(LineCollection(np.split(pts, np.cumsum(lengths)[:-1]), colors=styles["color"],
+                                             linestyles=styles["linestyle"], linewidths=styles["linewidth"], zorder=2),
+                              autolim=False)
+
+        # Features: trees as 32-gon circles, lanterns as squares, one collection per (type, preset)
+        feature_groups = {}
+        for f in cfg.get("features", []):
+            if "position" not in f or "size" not in f or f.get("type") not in ("tree", "lantern"): continue
+            feature_groups.setdefault((f["type"], f.get("style_preset", "default")), []).append(f)
+        circle = np.stack([np.cos(np.linspace(0, 2 * np.pi, 32, endpoint=False)),
+                           np.sin(np.linspace(0, 2 * np.pi, 32, endpoint=False))], axis=-1)
+        square = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=float)
+        for (kind, preset), features in feature_groups.items():
+            styles = STYLE_PRESETS.get(preset)
+            centers = plan_to_px(cfg, np.asarray([f["position"] for f in features], dtype=float))
+            half = np.asarray([f["size"] for f in features], dtype=float) * frame_w / 2
+            verts = centers[:, None, :] + half[:, None, None] * (circle if kind == "tree" else square)[None]
+            ax.add_collection(PolyCollection(verts, closed=True, facecolors=styles["facecolor"], edgecolors=styles["edgecolor"],
+                                             linewidths=1.0, alpha=styles.get("alpha", 1.0)), autolim=False)
+            for f, (fx, fy), hw in zip(features, centers, half):
+                text = f.get("name_en", "")
+                if not text: continue
+                # Feature captions sit below the feature; they must not be wider than it
+                if label_fits(text, 8, 2 * hw, float("inf"), dpi): ax.text(fx, fy + 2 * hw, text, ha="center", va="center", fontsize=8, color="#555")
+                else: skipped += 1
+
+    for cx, cy, text in labels:
+        ax.text(cx, cy, text, ha="center", va="center", fontsize=label_style["font_size"], color=label_style["font_color"], linespacing=1.4, bbox=dict(boxstyle="round,pad=0.4", fc=label_style["box_bg_color"], ec=label_style["box_edge_color"]))
+
+    print(f"[OK] Large-plan mode: {count_elements(cfg)} elements in {len(groups) + len(path_groups) + len(feature_groups)} collections, "
+          f"{len(labels)} zone labels drawn, {skipped} illegible labels skipped.")
+    save_figure(ax, plt, out_path, dpi)
+
+def render(cfg, out_path: str, dpi: int, label_mode: str, backend: str = "matplotlib", large_plan: str = "off"):
+    """
+    Draws with the chosen backend: matplotlib (draw(), or draw_large() for large
+    plans, see use_large_plan()), or the native SVG / Pillow renderers. Large-plan
+    mode also applies to pillow: it draws every label one by one, which
+    draw_large() outruns on plans of thousands of elements.
+    """
+    check_output_path(out_path, backend)
+    n = count_elements(cfg)
+    if backend == "pillow" and use_large_plan(cfg, large_plan):
+        print(f"[INFO] Large-plan mode: {n} elements are drawn with matplotlib (draw_large) instead of pillow.")
+        backend = "matplotlib"
+    if backend == "pillow" and large_plan == "off" and n >= LARGE_PLAN_ELEMENTS:
+        print(f"[WARN] {n} elements: the pillow backend draws every label one by one and is slower than "
+              f"--large-plan on for plans this size.")
+    if backend == "matplotlib":
+        if use_large_plan(cfg, large_plan):
+            return draw_large(cfg, out_path, dpi, label_mode)
+        if large_plan == "off" and n >= LARGE_PLAN_ELEMENTS:
+            print(f"[INFO] {n} elements: --large-plan on renders this much faster "
+                  f"(draws style by style and skips labels smaller than {MIN_LABEL_PX}px).")
+        return draw(cfg, out_path, dpi, label_mode)
+    import native_render
+    label_mode, cjk_font, cjk_path, font_msg = resolve_label_font(label_mode)
+    print(font_msg)
+    with phase(f"render ({backend})"):
+        scene = native_render.build_scene(cfg, label_mode, STYLE_PRESETS)
+        if backend == "svg":
+            native_render.render_svg(scene, out_path, dpi, cjk_font)
+        else:
+            native_render.render_pillow(scene, out_path, dpi, cjk_path)
     print(f"\n[SUCCESS] Garden plan saved to: {out_path}")
 
+def check_output_path(out_path: str, backend: str):
+    """Fails before any rendering if the backend cannot write the output's file type."""
+    if backend != "pillow": return
+    import native_render
+    if native_render.pillow_format(out_path) is None:
+        ext = os.path.splitext(out_path)[1] or "(no extension)"
+        raise SystemExit(f"[ERROR] The pillow backend cannot write {ext} files: {out_path}. Use .png, .jpg or .webp, or --backend svg for SVG.")
+
+def output_path_for(out_path: str, backend: str):
+    """The SVG backend writes SVG text, so a .png output name becomes .svg."""
+    if backend == "svg" and not out_path.lower().endswith(".svg"):
+        return os.path.splitext(out_path)[0] + ".svg"
+    return out_path
+
+# ==============================================================================
+# 渲染缓存 (Render Cache)
+# ==============================================================================
+RENDER_CACHE_MB = 500 # Default size cap of the render cache
+
+class RenderCache:
+    """
+    Content-addressed store of finished renders, next to the CJK font cache.
+    Files are named by the hash of everything that affects the output; their
+    mtime is the last use, and the least recently used are evicted above the cap.
+    """
+    def __init__(self, max_bytes=RENDER_CACHE_MB * 1024 * 1024, cache_dir=None):
+        self.dir = cache_dir or os.path.join(os.path.dirname(font_cache_path()), "renders")
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+
+    def key(self, cfg, dpi, label_mode, backend, ext, large_plan=False, cjk_font=None):
+        """
+        Hash of the validated config plus every render setting, the style presets and the renderer version.
+        cjk_font is the resolved CJK font (None if none is installed or used): the label language drawn depends on it.
+        """
+        from native_render import RENDERER_VERSION
+        blob = json.dumps({"cfg": cfg, "dpi": dpi, "label_mode": label_mode, "cjk_font": cjk_font,
+                           "backend": backend, "large_plan": large_plan, "ext": ext, "presets": STYLE_PRESETS, "renderer": RENDERER_VERSION},
+                          sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def path(self, key, ext):
+        return os.path.join(self.dir, key + ext)
+
+    def fetch(self, key, ext, out_path):
+        """Copies a cached render to out_path; returns False on a miss."""
+        cached = self.path(key, ext)
+        try:
+            shutil.copyfile(cached, out_path)
+            os.utime(cached) # Mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key, ext, out_path):
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            temp_path = f"{self.path(key, ext)}.{os.getpid()}.tmp" # Batch workers may store the same key at once
+            shutil.copyfile(out_path, temp_path)
+            os.replace(temp_path, self.path(key, ext))
+            self.evict()
+        except OSError as e:
+            print(f"[WARN] Could not store render in cache: {e}")
+
+    def entries(self):
+        """(mtime, size, path) of every cached render, oldest first."""
+        found = []
+        try:
+            with os.scandir(self.dir) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        st = entry.stat()
+                        found.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return sorted(found)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes: break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass # Another worker evicted it first
+            total -= size
+
+    def clear(self):
+        """Deletes every cached render; returns (files, bytes) removed."""
+        entries = self.entries()
+        for _, _, path in entries:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(entries), sum(size for _, size, _ in entries)
+
+def render_cached(cfg, out_path: str, dpi: int, label_mode: str, backend: str, cache=None, large_plan: str = "off"):
+    """render() through the render cache; returns 'hit', 'miss' or 'off' (no cache)."""
+    if cache is None:
+        render(cfg, out_path, dpi, label_mode, backend, large_plan)
+        return "off"
+    ext = os.path.splitext(out_path)[1].lower()
+    cjk_font = None
+    if label_mode in ("cn", "bilingual"):
+        with phase("resolve CJK font"):
+            cjk_font = resolve_cjk_font()[0]
+    with phase("render cache lookup"):
+        key = cache.key(cfg, dpi, label_mode, backend, ext, backend in ("matplotlib", "pillow") and use_large_plan(cfg, large_plan), cjk_font)
+        hit = cache.fetch(key, ext, out_path)
+    if hit:
+        print(f"\n[SUCCESS] Garden plan saved to: {out_path} (from render cache)")
+        return "hit"
+    render(cfg, out_path, dpi, label_mode, backend, large_plan)
+    cache.store(key, ext, out_path)
+    return "miss"
+
+# ==============================================================================
+# 批量渲染 (Batch Rendering)
+# ==============================================================================
+CONFIG_EXTENSIONS = ('.json', '.yml', '.yaml')
+
+def iter_batch_sources(spec: str):
+    """
+    Yields (name, source) for a batch: a directory (all JSON/YAML files in it),
+    a glob pattern, or a .jsonl file with one config per line. source is a file
+    path, or the already-parsed config dict for JSONL lines (or the parse error).
+    """
+    if spec.lower().endswith('.jsonl') and os.path.isfile(spec):
+        with open(spec, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip(): continue
+                try:
+                    cfg = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield f"line{line_no:05d}", SystemExit(f"[ERROR] Error parsing line {line_no} of '{spec}': {e}")
+                    continue
+                name = cfg.get("id") or cfg.get("name") if isinstance(cfg, dict) else None
+                yield f"line{line_no:05d}" + (f"_{name}" if name else ""), cfg
+        return
+    if os.path.isdir(spec):
+        paths = [os.path.join(spec, n) for n in os.listdir(spec) if n.lower().endswith(CONFIG_EXTENSIONS)]
+    else:
+        paths = [p for p in glob.glob(spec) if p.lower().endswith(CONFIG_EXTENSIONS)]
+    for path in sorted(paths):
+        yield os.path.splitext(os.path.basename(path))[0], path
+
+def safe_file_name(name: str):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name) or "config"
+
+def _init_batch_worker(label_mode, backend="matplotlib"):
+    # Runs once per worker process: pay for the imports and font lookup before the first config arrives
+    with contextlib.redirect_stdout(io.StringIO()):
+        if backend == "matplotlib": setup_fonts(label_mode)
+        else: resolve_label_font(label_mode)
+
+def render_one(name, source, out_path, dpi, label_mode, backend="matplotlib", cache_bytes=None, large_plan="off"):
+    """
+    Loads, validates and renders one config in a batch worker. Everything draw()
+    prints is captured instead of interleaving with other workers.
+    Returns a result dict for the batch summary. cache_bytes=None disables the render cache.
+    """
+    started = time.perf_counter()
+    result = {"name": name, "output": None, "cache": "off", "fixes": [], "warnings": [], "errors": [], "log": ""}
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            if isinstance(source, BaseException):
+                raise source
+            raw_cfg = load_cfg(source) if isinstance(source, str) else source
+            cfg, result["fixes"], result["warnings"], result["errors"] = validate_and_fix_cfg(raw_cfg)
+            if not result["errors"]:
+                cache = RenderCache(cache_bytes) if cache_bytes is not None else None
+                result["cache"] = render_cached(cfg, out_path, dpi, label_mode, backend, cache, large_plan)
+                result["output"] = out_path
+    except SystemExit as e:
+        result["errors"].append(str(e.code).replace("[ERROR] ", ""))
+    except Exception as e:
+        result["errors"].append(f"Renderer failed: {type(e).__name__}: {e}")
+    result["log"] = log.getvalue()
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+def run_batch(spec, out_dir, dpi, label_mode, workers=None, backend="matplotlib", cache_bytes=None, large_plan="off"):
+    """Renders every config of a batch in a pool of warm worker processes and writes summary.json."""
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    results, pending, used_names = [], set(), set()
+    started = time.perf_counter()
+
+    def collect(done):
+        for future in done:
+            r = future.result()
+            status = "ERROR" if r["errors"] else ("WARN" if r["warnings"] else "OK")
+            cached = ", cached" if r["cache"] == "hit" else ""
+            print(f"[{status}] {r['name']} ({r['seconds']:.2f}s{cached}, {len(r['fixes'])} fixes, "
+                  f"{len(r['warnings'])} warnings, {len(r['errors'])} errors)")
+            for e in r["errors"]: print(f"    [ERROR] {e}")
+            results.append(r)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(label_mode, backend)) as pool:
+        for name, source in iter_batch_sources(spec):
+            file_name = safe_file_name(name)
+            while file_name in used_names: file_name += "_"
+            used_names.add(file_name)
+            out_path = output_path_for(os.path.join(out_dir, file_name + ".png"), backend)
+            pending.add(pool.submit(render_one, name, source, out_path, dpi, label_mode, backend, cache_bytes, large_plan))
+            if len(pending) >= workers * 4:
+                # Bounded queue: a long JSONL stream is not read into memory all at once
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(pending)[0])
+
+    results.sort(key=lambda r: r["name"])
+    totals = {
+        "configs": len(results),
+        "rendered": sum(1 for r in results if r["output"]),
+        "failed": sum(1 for r in results if r["errors"]),
+        "fixes": sum(len(r["fixes"]) for r in results),
+        "warnings": sum(len(r["warnings"]) for r in results),
+        "cache_hits": sum(1 for r in results if r["cache"] == "hit"),
+        "cache_misses": sum(1 for r in results if r["cache"] == "miss"),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    summary_path = os.path.join(out_dir, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"totals": totals, "results": [{k: v for k, v in r.items() if k != "log"} for r in results]},
+                  f, ensure_ascii=False, indent=2)
+
+    print("\n--- Batch Summary ---")
+    print(f"Configs: {totals['configs']}  Rendered: {totals['rendered']}  Failed: {totals['failed']}  "
+          f"Fixes: {totals['fixes']}  Warnings: {totals['warnings']}  Time: {totals['seconds']}s  Workers: {workers}")
+    if cache_bytes is not None:
+        print(f"Render cache: {totals['cache_hits']} hits, {totals['cache_misses']} misses")
+    print(f"[OK] Summary written to: {summary_path}")
+    return totals
+
 # ==============================================================================
 # 主函数 (Main Function & CLI)
 # ==============================================================================
 def main():
     parser = argparse.ArgumentParser(description="Generate a garden plan from a JSON or YAML config.")
-    parser.add_argument("--config", required=True, help="Path to the JSON or YAML configuration file.")
-    parser.add_argument("--output", required=True, help="Path to save the output PNG image.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--config", help="Path to the JSON or YAML configuration file.")
+    source.add_argument("--batch", help="Batch mode: a directory or glob of JSON/YAML configs, or a .jsonl file with one config per line.")
+    parser.add_argument("--output", help="Path to save the output PNG image (batch mode: output directory).")
     parser.add_argument("--dpi", type=int, default=250, help="Resolution of the output image in DPI.")
     parser.add_argument("--label-mode", choices=["bilingual", "en", "cn"], default="bilingual", help="Language for labels.")
+    parser.add_argument("--workers", type=int, default=None, help="Batch mode: number of worker processes (default: CPU cores).")
+    parser.add_argument("--backend", choices=["matplotlib", "svg", "pillow"], default="matplotlib",
+                        help="Renderer: matplotlib (default), svg (writes .svg text) or pillow (draws without matplotlib, "
+                             "about 4x faster on typical plans; with --large-plan on, large plans use matplotlib).")
+    parser.add_argument("--large-plan", choices=["auto", "on", "off"], default="off",
+                        help=f"matplotlib and pillow backends: draw styles as collections and skip illegible labels; changes paint order and "
+                             f"drops small labels, so it is opt-in (default: off; auto: from {LARGE_PLAN_ELEMENTS} elements).")
+    parser.add_argument("--no-cache", action="store_true", help="Always render; don't read or write the render cache.")
+    parser.add_argument("--clear-cache", action="store_true", help="Delete all cached renders (then render, if --config/--batch is given).")
+    parser.add_argument("--cache-size-mb", type=float, default=RENDER_CACHE_MB, help=f"Size cap of the render cache in MB (default: {RENDER_CACHE_MB}).")
+    parser.add_argument("--profile-startup", action="store_true", help="Print how long imports, font setup and rendering took, by phase.")
     args = parser.parse_args()
+    PHASES.append(("imports + argparse", time.perf_counter() - _T_START))
+
+    if args.clear_cache:
+        files, size = RenderCache().clear()
+        print(f"[OK] Cleared render cache: {files} file(s), {size / 1024 / 1024:.1f} MB")
+        if not (args.config or args.batch): return
+    if not (args.config or args.batch):
+        parser.error("one of the arguments --config --batch is required")
+    if not args.output:
+        parser.error("the following arguments are required: --output")
+    cache_bytes = None if args.no_cache else int(args.cache_size_mb * 1024 * 1024)
+
+    if args.batch:
+        totals = run_batch(args.batch, args.output, args.dpi, args.label_mode, args.workers, args.backend, cache_bytes, args.large_plan)
+        sys.exit(1 if totals["failed"] else 0)
 
-    raw_cfg = load_cfg(args.config)
-    cfg, fixes, warnings, errors = validate_and_fix_cfg(raw_cfg)
+    out_path = output_path_for(args.output, args.backend)
+    check_output_path(out_path, args.backend)
+    with phase("load config"):
+        raw_cfg = load_cfg(args.config)
+    with phase("validate"):
+        cfg, fixes, warnings, errors = validate_and_fix_cfg(raw_cfg)
 
     if fixes:
         print("\n--- Auto-Fixes Applied ---")
@@ -285,7 +1166,15 @@ def main():
     
     print("\n[OK] Configuration loaded and processed. Starting renderer...")
     
-    draw(cfg, args.output, args.dpi, args.label_mode)
+    if out_path != args.output:
+        print(f"[WARN] The svg backend writes SVG; saving to {out_path}")
+    cache = RenderCache(cache_bytes) if cache_bytes is not None else None
+    with phase("render total"):
+        render_cached(cfg, out_path, args.dpi, args.label_mode, args.backend, cache, args.large_plan)
+    if cache:
+        print(f"[OK] Render cache: {cache.hits} hit, {cache.misses} miss")
+    if args.profile_startup:
+        print_startup_profile()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backend Benchmark for app.py (bench_backends.py)
+
+Description:
+  - Renders the same config(s) with every --backend and reports the time per
+    render and the speed-up over matplotlib.
+  - Each backend renders once untimed first (imports, font lookup), so the
+    numbers are warm per-render costs, as in batch mode.
+
+Usage:
+  python bench_backends.py --config garden.json --repeat 5
+  python bench_backends.py --config garden_large.json --backend matplotlib --large-plan on --repeat 1
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import app
+from native_render import BACKENDS
+
+def bench(cfg, backend, out_dir, dpi, label_mode, repeat, large_plan="off"):
+    """Returns (median seconds per render, output size in bytes)."""
+    out_path = app.output_path_for(os.path.join(out_dir, f"bench_{backend}.png"), backend)
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.render(cfg, out_path, dpi, label_mode, backend, large_plan) # warm-up
+        for _ in range(repeat):
+            started = time.perf_counter()
+            app.render(cfg, out_path, dpi, label_mode, backend, large_plan)
+            times.append(time.perf_counter() - started)
+    return statistics.median(times), os.path.getsize(out_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the matplotlib, SVG and Pillow backends of app.py.")
+    parser.add_argument("--config", nargs="+", default=["garden.json"], help="Config file(s) to render (default: garden.json).")
+    parser.add_argument("--dpi", type=int, default=250, help="Output resolution in DPI (default: 250).")
+    parser.add_argument("--label-mode", choices=["bilingual", "en", "cn"], default="bilingual", help="Language for labels.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed renders per backend and config (default: 5).")
+    parser.add_argument("--backend", nargs="+", choices=BACKENDS, default=list(BACKENDS), help="Backends to compare (default: all).")
+    parser.add_argument("--large-plan", choices=["auto", "on", "off"], default="off", help="Large-plan mode of the matplotlib backend (default: off).")
+    parser.add_argument("--keep", action="store_true", help="Keep the rendered files for a visual comparison.")
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp(prefix="garden_bench_")
+    try:
+        for config_path in args.config:
+            with contextlib.redirect_stdout(io.StringIO()):
+                cfg, _, _, errors = app.validate_and_fix_cfg(app.load_cfg(config_path))
+            if errors:
+                print(f"[ERROR] {config_path}: {'; '.join(errors)}")
+                continue
+            mode = "large-plan" if app.use_large_plan(cfg, args.large_plan) else "standard"
+            print(f"\n--- {config_path} (dpi {args.dpi}, {args.label_mode}, matplotlib {mode}, median of {args.repeat}) ---")
+            results = {}
+            for backend in args.backend:
+                results[backend] = bench(cfg, backend, out_dir, args.dpi, args.label_mode, args.repeat, args.large_plan)
+                seconds, size = results[backend]
+                line = f"{backend:<12} {seconds * 1000:9.1f} ms  {size / 1024:8.1f} KiB"
+                if "matplotlib" in results and backend != "matplotlib":
+                    line += f"  {results['matplotlib'][0] / seconds:7.1f}x faster"
+                print(line)
+    finally:
+        if args.keep:
+            print(f"\n[OK] Kept outputs in {out_dir}")
+        else:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic Large-Plan Generator (make_large_plan.py)
+
+Description:
+  - Writes a master-plan config with tens of thousands of elements, for
+    benchmarking app.py's large-plan mode (garden_large.json by default).
+  - Zones are laid out as a jittered grid of plots (rects, rounded rects and
+    polygons across all zone presets), with trees and lanterns scattered over
+    them and stone paths running along the plot rows.
+  - Output is deterministic for a given --seed; one element per line.
+
+Usage:
+  python make_large_plan.py --zones 20000 --features 25000 --paths 5000
+  python app.py --config garden_large.json --output large.png --large-plan on --profile-startup
+"""
+
+import argparse
+import json
+import math
+import random
+
+ZONE_PRESETS = ["zen_garden", "lawn", "deck", "water_feature", "default"]
+
+def make_plan(zones, features, paths, seed=7):
+    rng = random.Random(seed)
+    r4 = lambda v: round(v, 4)
+    cfg = {
+        "title": f"Synthetic Master Plan ({zones + features + paths} elements)",
+        "canvas": {"width": 3200, "height": 2000, "margin": 60, "bg_color": "#FDFBF8"},
+        "house": {"rect": [0.45, 0.0, 0.1, 0.04]},
+        "zones": [], "paths": [], "features": [],
+    }
+
+    # Zones: a grid below the house, each plot shrunk and jittered a little
+    cols = max(1, round(math.sqrt(zones * 1.6)))
+    rows = math.ceil(zones / cols)
+    cell_w, cell_h = 1.0 / cols, 0.95 / rows
+    for i in range(zones):
+        r, c = divmod(i, cols)
+        x, y = c * cell_w, 0.05 + r * cell_h
+        w, h = cell_w * rng.uniform(0.6, 0.9), cell_h * rng.uniform(0.6, 0.9)
+        zone = {"id": f"Z{i:05d}", "name_cn": f"地块{i}", "name_en": f"Plot {i}",
+                "style_preset": ZONE_PRESETS[i % len(ZONE_PRESETS)]}
+        if i % 3 == 2:
+            # Irregular quadrilateral inside the cell
+            zone["polygon"] = [[r4(x + rng.uniform(0, 0.2) * w), r4(y + rng.uniform(0, 0.2) * h)],
+                               [r4(x + w - rng.uniform(0, 0.2) * w), r4(y + rng.uniform(0, 0.2) * h)],
+                               [r4(x + w - rng.uniform(0, 0.2) * w), r4(y + h - rng.uniform(0, 0.2) * h)],
+                               [r4(x + rng.uniform(0, 0.2) * w), r4(y + h - rng.uniform(0, 0.2) * h)]]
+        else:
+            zone["rect"] = [r4(x), r4(y), r4(w), r4(h)]
+        cfg["zones"].append(zone)
+
+    for i in range(features):
+        tree = i % 4 != 0
+        cfg["features"].append({
+            "type": "tree" if tree else "lantern",
+            "name_en": f"Tree {i}" if tree else f"Lantern {i}",
+            "position": [r4(rng.uniform(0.01, 0.99)), r4(rng.uniform(0.06, 0.99))],
+            "size": r4(rng.uniform(0.2, 0.6) * cell_w),
+            "style_preset": "feature_tree" if tree else "feature_lantern",
+        })
+
+    # Paths: short meandering runs along the gaps between plot rows
+    for i in range(paths):
+        y = 0.05 + (i % rows + 0.95) * cell_h
+        x = rng.uniform(0, 0.95)
+        points = [[r4(x), r4(y)]]
+        for _ in range(rng.randint(2, 5)):
+            x = min(1.0, x + rng.uniform(0.005, 0.02))
+            points.append([r4(x), r4(min(1.0, y + rng.uniform(-0.1, 0.1) * cell_h))])
+        cfg["paths"].append({"name": f"Path {i}", "points": points, "style_preset": "path_stone"})
+    return cfg
+
+def write_plan(cfg, path):
+    """JSON with one zone / path / feature per line, so the file stays diffable."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        head = [k for k in cfg if k not in ("zones", "paths", "features")]
+        for k in head:
+            f.write(f"  {json.dumps(k)}: {json.dumps(cfg[k], ensure_ascii=False)},\n")
+        for n, k in enumerate(("zones", "paths", "features")):
+            items = ",\n".join("    " + json.dumps(item, ensure_ascii=False, separators=(",", ":")) for item in cfg[k])
+            f.write(f"  {json.dumps(k)}: [\n{items}\n  ]" + (",\n" if n < 2 else "\n"))
+        f.write("}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic large garden plan config.")
+    parser.add_argument("--zones", type=int, default=20000, help="Number of zones (default: 20000).")
+    parser.add_argument("--features", type=int, default=25000, help="Number of trees and lanterns (default: 25000).")
+    parser.add_argument("--paths", type=int, default=5000, help="Number of paths (default: 5000).")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed (default: 7).")
+    parser.add_argument("--output", default="garden_large.json", help="Output config path (default: garden_large.json).")
+    args = parser.parse_args()
+
+    cfg = make_plan(args.zones, args.features, args.paths, args.seed)
+    write_plan(cfg, args.output)
+    print(f"[OK] Wrote {args.zones + args.features + args.paths} elements to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Native renderers for app.py (--backend svg / pillow)
+
+Description:
+  - Turns a validated config into a flat scene (shapes, lines, texts) using the
+    same STYLE_PRESETS as the matplotlib renderer.
+  - Writes that scene either as SVG text or straight onto a Pillow canvas,
+    without pyplot, tight_layout or the second bbox_inches='tight' pass.
+  - Hatching, dashed outlines, rounded corners and label boxes approximate the
+    matplotlib look; output size matches savefig(bbox_inches='tight').
+"""
+
+import importlib.util
+import math
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageChops, ImageColor, ImageDraw, ImageFont
+
+RENDERER_VERSION = 2 # Bump when the output of any renderer changes
+BACKENDS = ("matplotlib", "svg", "pillow")
+
+PAD_INCHES = 0.1 # savefig(bbox_inches='tight') default padding
+HATCH_DENSITY = 6 # matplotlib draws (count of hatch chars) * 6 hatch lines per inch; diagonals are spaced twice as wide
+DASHES = {"--": (3.7, 1.6), ":": (1.0, 1.65), "-.": (6.4, 1.6, 1.0, 1.6)} # matplotlib dash patterns, in linewidths
+
+# ==============================================================================
+# 场景构建 (Scene Building)
+# ==============================================================================
+def build_scene(cfg, label_mode, presets):
+    """
+    Flattens a validated config into canvas-pixel primitives, in matplotlib's
+    paint order: patches, then lines, then texts (zorder 1, 2, 3).
+    """
+    W, H = cfg["canvas"]["width"], cfg["canvas"]["height"]
+    m = cfg["canvas"].get("margin", 40)
+    fw_px, fh_px = W - 2 * m, H - 2 * m
+
+    def to_px(nx, ny): return (m + nx * fw_px, m + ny * fh_px)
+
+    shapes, lines, texts = [], [], []
+    shapes.append({"kind": "rect", "xywh": (m, m, fw_px, fh_px), "face": None, "edge": "#8D8D8D", "lw": 1.5})
+    texts.append({"x": W / 2, "y": m / 2, "text": cfg.get("title", ""), "size": 20, "color": "#2E2E2E", "bold": True})
+
+    house_cfg = cfg.get("house", {})
+    if "rect" in house_cfg:
+        styles = presets["house"]
+        hx, hy = to_px(*house_cfg["rect"][:2])
+        hw, hh = house_cfg["rect"][2] * fw_px, house_cfg["rect"][3] * fh_px
+        shapes.append({"kind": "rect", "xywh": (hx, hy, hw, hh), "face": styles["facecolor"],
+                       "edge": styles["edgecolor"], "lw": styles["linewidth"]})
+        texts.append({"x": hx + hw / 2, "y": hy + hh / 2, "text": styles["label"], "size": 12, "color": "#FFFFFF", "bold": True})
+
+    label_style = presets["label_style"]
+    for z in cfg.get("zones", []):
+        styles = dict(presets.get(z.get("style_preset", "default"), presets["default"]))
+        styles.update(z.get("style_override", {}))
+        shape = None
+        if "rect" in z:
+            zx, zy = to_px(*z["rect"][:2])
+            zw, zh = z["rect"][2] * fw_px, z["rect"][3] * fh_px
+            shape = {"kind": "rect", "xywh": (zx, zy, zw, zh), "radius": styles.get("border_radius", 0) * fw_px}
+            label_pos = (zx + zw / 2, zy + zh / 2)
+        elif "polygon" in z:
+            pts = [to_px(*p) for p in z["polygon"]]
+            shape = {"kind": "polygon", "points": pts}
+            label_pos = (sum(p[0] for p in pts) / len(pts), sum(p[1] for p in pts) / len(pts))
+        if not shape: continue
+        hatch = styles.get("hatch")
+        shape.update({
+            "face": styles.get("facecolor"),
+            # matplotlib strokes hatched patches (edge and hatch) in the hatch colour
+            "edge": styles.get("hatch_color", styles.get("edgecolor")) if hatch else styles.get("edgecolor"),
+            "lw": styles.get("linewidth") or 1.0, "ls": styles.get("linestyle", "-"),
+            "alpha": styles.get("alpha", 1.0), "hatch": hatch,
+        })
+        shapes.append(shape)
+        if label_mode == "bilingual": label = f"{z.get('name_cn', '')}\n{z.get('name_en', '')}"
+        elif label_mode == "cn": label = f"{z.get('name_cn', '')}"
+        else: label = f"{z.get('name_en', '')}"
+        texts.append({"x": label_pos[0], "y": label_pos[1], "text": label, "size": label_style["font_size"],
+                      "color": label_style["font_color"], "linespacing": 1.4,
+                      "box": (label_style["box_bg_color"], label_style["box_edge_color"])})
+
+    for p in cfg.get("paths", []):
+        if "points" not in p: continue
+        styles = presets.get(p.get("style_preset", "path_stone"))
+        lines.append({"points": [to_px(*pt) for pt in p["points"]], "color": styles["color"],
+                      "lw": styles["linewidth"], "ls": styles["linestyle"]})
+
+    for f in cfg.get("features", []):
+        if "position" not in f or "size" not in f or "type" not in f: continue
+        styles = presets.get(f.get("style_preset", "default"))
+        fx, fy = to_px(*f["position"])
+        size = f["size"] * fw_px
+        if f["type"] == "tree": shape = {"kind": "circle", "center": (fx, fy), "r": size / 2}
+        elif f["type"] == "lantern": shape = {"kind": "rect", "xywh": (fx - size / 2, fy - size / 2, size, size)}
+        else: continue
+        shape.update({"face": styles["facecolor"], "edge": styles["edgecolor"], "lw": 1.0, "alpha": styles.get("alpha", 1.0)})
+        shapes.append(shape)
+        texts.append({"x": fx, "y": fy + size, "text": f.get("name_en", ""), "size": 8, "color": "#555"})
+
+    return {"width": W, "height": H, "bg": cfg["canvas"].get("bg_color", "#FDFBF8"),
+            "shapes": shapes, "lines": lines, "texts": texts}
+
+def rgba(color, alpha=1.0):
+    """'#RGB' / '#RRGGBB' / colour names / 0-1 float tuples -> 0-255 RGBA tuple."""
+    return _rgba(tuple(color) if isinstance(color, list) else color, alpha)
+
+@lru_cache(maxsize=None)
+def _rgba(color, alpha):
+    if isinstance(color, tuple):
+        vals = [round(c * 255) for c in color]
+        r, g, b, a = (vals + [255])[:4]
+    else:
+        r, g, b, *rest = ImageColor.getrgb(color)
+        a = rest[0] if rest else 255
+    return (r, g, b, round(a * alpha))
+
+def outline_points(shape, segments=64):
+    """Closed outline of a shape as a point list (rounded corners and circles are sampled)."""
+    if shape["kind"] == "polygon":
+        return list(shape["points"])
+    if shape["kind"] == "circle":
+        (cx, cy), r = shape["center"], shape["r"]
+        return [(cx + r * math.cos(2 * math.pi * i / segments), cy + r * math.sin(2 * math.pi * i / segments))
+                for i in range(segments)]
+    x, y, w, h = shape["xywh"]
+    r = min(shape.get("radius", 0), w / 2, h / 2)
+    if r <= 0:
+        return [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+    pts, steps = [], max(2, segments // 4)
+    for cx, cy, start in ((x + w - r, y + r, -90), (x + w - r, y + h - r, 0), (x + r, y + h - r, 90), (x + r, y + r, 180)):
+        for i in range(steps + 1):
+            a = math.radians(start + 90 * i / steps)
+            pts.append((cx + r * math.cos(a), cy + r * math.sin(a)))
+    return pts
+
+def dash_segments(points, pattern):
+    """Splits a polyline into the 'on' pieces of a dash pattern (lengths in the same units)."""
+    segments, current = [], [points[0]]
+    idx, left, on = 0, pattern[0], True
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        length = math.hypot(x1 - x0, y1 - y0)
+        pos = 0.0
+        while length - pos > left:
+            pos += left
+            pt = (x0 + (x1 - x0) * pos / length, y0 + (y1 - y0) * pos / length)
+            if on:
+                current.append(pt)
+                segments.append(current)
+            current = [pt]
+            idx = (idx + 1) % len(pattern)
+            left, on = pattern[idx], not on
+        left -= length - pos
+        if on: current.append((x1, y1))
+    if on and len(current) > 1: segments.append(current)
+    return segments
+
+def text_lines(text):
+    return text.split("\n")
+
+def text_width_em(line):
+    # Estimate for when text can't be measured: CJK glyphs are about 1 em wide, Latin about 0.6 em
+    return sum(1.0 if ord(c) >= 0x2E80 else 0.6 for c in line)
+
+# ==============================================================================
+# Pillow 渲染器 (Pillow Renderer)
+# ==============================================================================
+def _mpl_font_dir():
+    # DejaVu ships with matplotlib; locating it does not import matplotlib
+    spec = importlib.util.find_spec("matplotlib")
+    return os.path.join(os.path.dirname(spec.origin), "mpl-data", "fonts", "ttf") if spec else None
+
+class _Fonts:
+    def __init__(self, cjk_path):
+        self.cjk_path = cjk_path
+        mpl_dir = _mpl_font_dir()
+        self.regular = os.path.join(mpl_dir, "DejaVuSans.ttf") if mpl_dir else None
+        self.bold = os.path.join(mpl_dir, "DejaVuSans-Bold.ttf") if mpl_dir else None
+        self._cache = {}
+
+    def get(self, size_px, bold=False):
+        path = self.cjk_path or (self.bold if bold else self.regular)
+        key = (path, round(size_px))
+        if key not in self._cache:
+            try:
+                self._cache[key] = ImageFont.truetype(path, key[1])
+            except (OSError, TypeError):
+                self._cache[key] = ImageFont.load_default(key[1])
+        return self._cache[key]
+
+def _hatch_tile(kind, period, lw, dot_r):
+    """
+    One seamless 'L' tile of a hatch component: kind is one of / \\ | - . and
+    period the spacing in output pixels. The tile holds whole periods and is at
+    least 64 px, so the rounding to whole pixels shifts the spacing by well under 1%.
+    """
+    reps = max(1, math.ceil(64 / period))
+    size = max(1, round(period * reps))
+    step = size / reps
+    tile = Image.new("L", (size, size), 0)
+    d = ImageDraw.Draw(tile)
+    # Lines and dots just outside the tile are drawn too, so the copies join without seams
+    if kind in "/\\":
+        for i in range(-reps, 2 * reps + 1):
+            t = i * step
+            d.line([(t, size), (t + size, 0)] if kind == "/" else [(t, 0), (t + size, size)], fill=255, width=lw)
+    elif kind in "|-":
+        for i in range(-1, reps + 1):
+            t = (i + 0.5) * step
+            d.line([(t, -lw), (t, size + lw)] if kind == "|" else [(-lw, t), (size + lw, t)], fill=255, width=lw)
+    else:
+        # Every other row of dots is shifted by half a step, like matplotlib's circle hatches; rows are
+        # half a period apart, so the tile holds an even number of them
+        for j in range(-1, 2 * reps + 1):
+            y = (j + 0.5) * step / 2
+            for i in range(-1, reps + 1):
+                x = (i + (0.5 if j % 2 == 0 else 0)) * step
+                d.ellipse([x - dot_r, y - dot_r, x + dot_r, y + dot_r], fill=255)
+    return tile
+
+class _HatchPatterns:
+    """
+    Hatch masks cut from seamless tiles, built once per hatch string. Tiles are
+    anchored to the canvas, so neighbouring zones' hatches line up.
+    """
+    def __init__(self, dpi, k):
+        self.dpi, self.lw = dpi, max(1, round(k)) # hatch.linewidth = 1 pt
+        self._tiles = {}
+
+    def _tiles_of(self, hatch):
+        if hatch not in self._tiles:
+            n = sum(hatch.count(c) for c in "/\\|-+xX")
+            dots = hatch.count(".") + hatch.count("o") + hatch.count("O")
+            kinds = []
+            if n:
+                step = self.dpi / (n * HATCH_DENSITY)
+                if any(c in hatch for c in "/xX"): kinds.append(("/", 2 * step)) # Diagonals are spaced twice as wide
+                if any(c in hatch for c in "\\xX"): kinds.append(("\\", 2 * step))
+                if any(c in hatch for c in "|+"): kinds.append(("|", step))
+                if any(c in hatch for c in "-+"): kinds.append(("-", step))
+            if dots:
+                step = self.dpi / (dots * HATCH_DENSITY)
+                kinds.append((".", 2 * step))
+            self._tiles[hatch] = [_hatch_tile(kind, period, self.lw, max(1.0, period / 2 * 0.1)) for kind, period in kinds]
+        return self._tiles[hatch]
+
+    def crop(self, hatch, box):
+        """'L' hatch mask covering the canvas box (x0, y0, x1, y1)."""
+        x0, y0, x1, y1 = box
+        mask = None
+        for tile in self._tiles_of(hatch):
+            t = tile.width
+            ox, oy = x0 // t * t - x0, y0 // t * t - y0 # Offsets of the tile grid inside the box
+            strip = Image.new("L", (x1 - x0, t))
+            for x in range(ox, x1 - x0, t): strip.paste(tile, (x, 0))
+            part = Image.new("L", (x1 - x0, y1 - y0))
+            for y in range(oy, y1 - y0, t): part.paste(strip, (0, y))
+            mask = part if mask is None else ImageChops.lighter(mask, part)
+        return mask
+
+def write_png(img, out_path, level=1, workers=None):
+    """
+    Writes an RGB image as PNG with no row filters and fast deflate. Plans are
+    large flat colour areas, which compress well without filtering; Pillow's
+    adaptive filtering alone costs more than the whole drawing at 250 dpi.
+    With several CPUs, horizontal bands are deflated in parallel threads (zlib
+    releases the GIL) and joined into one stream, as pigz does.
+    """
+    width, height = img.size
+    stride = width * 3
+    raw = memoryview(img.tobytes())
+    workers = max(1, min(workers or os.cpu_count() or 1, height // 64 or 1))
+    bounds = [height * i // workers for i in range(workers + 1)]
+
+    def rows(y0, y1):
+        # Filter type 0 (none) in front of every row, fed to zlib slice by slice without joining the rows
+        for y in range(y0, y1):
+            yield b"\x00"
+            yield raw[y * stride:(y + 1) * stride]
+
+    def deflate(band):
+        last = band == workers - 1
+        # A single band is a complete zlib stream; parallel bands are raw deflate, ended with a sync flush
+        c = zlib.compressobj(level) if workers == 1 else zlib.compressobj(level, zlib.DEFLATED, -15)
+        out = [c.compress(part) for part in rows(bounds[band], bounds[band + 1])]
+        out.append(c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH))
+        return b"".join(out)
+
+    if workers == 1:
+        idat = deflate(0)
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            bands = pool.map(deflate, range(workers))
+            adler = 1
+            for part in rows(0, height): adler = zlib.adler32(part, adler)
+            idat = b"\x78\x01" + b"".join(bands) + struct.pack(">I", adler)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    with open(out_path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", idat))
+        f.write(chunk(b"IEND", b""))
+
+def pillow_format(out_path):
+    """The Pillow format an output file name is written in, or None if Pillow cannot write it."""
+    fmt = Image.registered_extensions().get(os.path.splitext(out_path)[1].lower())
+    return fmt if fmt in Image.SAVE else None
+
+def render_pillow(scene, out_path, dpi, cjk_path=None):
+    s, k = dpi / 100, dpi / 72 # canvas px -> output px, points -> output px
+    pad = PAD_INCHES * dpi
+    W, H = scene["width"], scene["height"]
+    img = Image.new("RGB", (round(W * s + 2 * pad), round(H * s + 2 * pad)), rgba(scene["bg"])[:3])
+    # Drawing with RGBA ink on the RGB canvas blends translucent colours straight in ('over' on an
+    # opaque background), so no shape or label box needs a layer of its own; opaque ink skips the blend
+    solid, blend = ImageDraw.Draw(img), ImageDraw.Draw(img, "RGBA")
+    def pen(color): return solid if color[3] == 255 else blend
+    solid.rectangle([pad, pad, pad + W * s, pad + H * s], fill=(255, 255, 255)) # axes background
+    hatches = _HatchPatterns(dpi, k)
+
+    def px(pt): return (pad + pt[0] * s, pad + pt[1] * s)
+
+    def masked(pts, margin, paint):
+        """Canvas box around pts and an 'L' mask of that box drawn by paint(ImageDraw, local points)."""
+        x0, y0 = max(0, math.floor(min(p[0] for p in pts) - margin)), max(0, math.floor(min(p[1] for p in pts) - margin))
+        x1, y1 = min(img.width, math.ceil(max(p[0] for p in pts) + margin)), min(img.height, math.ceil(max(p[1] for p in pts) + margin))
+        if x1 <= x0 or y1 <= y0: return None, None
+        mask = Image.new("L", (x1 - x0, y1 - y0), 0)
+        paint(ImageDraw.Draw(mask), [(x - x0, y - y0) for x, y in pts])
+        return (x0, y0, x1, y1), mask
+
+    for shape in scene["shapes"]:
+        alpha = shape.get("alpha", 1.0)
+        face = rgba(shape["face"], alpha) if shape.get("face") else None
+        edge = rgba(shape["edge"], alpha) if shape.get("edge") else None
+        lw = (shape.get("lw") or 1.0) * k
+        width = max(1, round(lw))
+        pattern = DASHES.get(shape.get("ls", "-"))
+        ring = edge and lw > 0 and not pattern # Solid outline: one primitive, centred on the boundary like matplotlib's
+        kind, radius = shape["kind"], shape.get("radius", 0) * s
+
+        if kind == "circle":
+            (cx, cy), r = px(shape["center"]), shape["r"] * s
+            if face: pen(face).ellipse([cx - r, cy - r, cx + r, cy + r], fill=face)
+        elif kind == "rect" and radius <= 0:
+            (x0, y0), (x1, y1) = px(shape["xywh"][:2]), px((shape["xywh"][0] + shape["xywh"][2], shape["xywh"][1] + shape["xywh"][3]))
+            if face: pen(face).rectangle([x0, y0, x1, y1], fill=face)
+        pts = [px(p) for p in outline_points(shape)]
+        if face and not (kind == "circle" or (kind == "rect" and radius <= 0)):
+            pen(face).polygon(pts, fill=face)
+
+        if shape.get("hatch") and edge:
+            box, mask = masked(pts, 0, lambda d, local: d.polygon(local, fill=edge[3]))
+            if box:
+                img.paste(edge[:3], box, ImageChops.multiply(mask, hatches.crop(shape["hatch"], box)))
+
+        if not edge or lw <= 0: continue
+        if ring and kind == "circle":
+            h = lw / 2
+            pen(edge).ellipse([cx - r - h, cy - r - h, cx + r + h, cy + r + h], outline=edge, width=width)
+        elif ring and kind == "rect" and radius <= 0:
+            h = lw / 2
+            pen(edge).rectangle([x0 - h, y0 - h, x1 + h, y1 + h], outline=edge, width=width)
+        else:
+            closed = pts + [pts[0]]
+            pieces = dash_segments(closed, [v * lw for v in pattern]) if pattern else [closed]
+            if edge[3] == 255:
+                for piece in pieces:
+                    solid.line(piece, fill=edge, width=width, joint="curve")
+            else:
+                # Translucent outline through a mask, so overlapping joints are not blended twice
+                box, mask = masked(pts, lw + 2, lambda d, local: [
+                    d.line([(x - pts[0][0] + local[0][0], y - pts[0][1] + local[0][1]) for x, y in piece],
+                           fill=edge[3], width=width, joint="curve") for piece in pieces])
+                if box: img.paste(edge[:3], box, mask)
+
+    for line in scene["lines"]:
+        pts = [px(p) for p in line["points"]]
+        lw = line["lw"] * k
+        pattern = DASHES.get(line.get("ls", "-"))
+        color = rgba(line["color"])
+        draw = pen(color)
+        if line.get("ls") == ":":
+            # matplotlib dots are round-capped: draw each dot as a disc
+            for piece in dash_segments(pts, [v * lw for v in pattern]):
+                cx, cy = piece[len(piece) // 2]
+                draw.ellipse([cx - lw / 2, cy - lw / 2, cx + lw / 2, cy + lw / 2], fill=color)
+            continue
+        for piece in (dash_segments(pts, [v * lw for v in pattern]) if pattern else [pts]):
+            draw.line(piece, fill=color, width=max(1, round(lw)), joint="curve")
+
+    fonts = _Fonts(cjk_path)
+    for t in scene["texts"]:
+        if not t["text"]: continue
+        size = t["size"] * k
+        font = fonts.get(size, t.get("bold", False))
+        spacing = (t.get("linespacing", 1.2) - 1) * size
+        l, top, r, b = solid.multiline_textbbox((0, 0), t["text"], font=font, spacing=spacing, align="center")
+        cx, cy = px((t["x"], t["y"]))
+        ox, oy = cx - (l + r) / 2, cy - (top + b) / 2
+        if t.get("box"):
+            bg, edge = t["box"]
+            p = 0.4 * size # boxstyle round,pad=0.4 (in font sizes)
+            blend.rounded_rectangle([ox + l - p, oy + top - p, ox + r + p, oy + b + p], radius=p,
+                                   fill=rgba(bg), outline=rgba(edge), width=max(1, round(k)))
+        pen(rgba(t["color"])).multiline_text((ox, oy), t["text"], font=font, fill=rgba(t["color"]), spacing=spacing, align="center")
+
+    if out_path.lower().endswith(".png"):
+        write_png(img, out_path)
+    else:
+        img.save(out_path) # Any other format Pillow knows (.jpg, .webp, ...)
+
+# ==============================================================================
+# SVG 渲染器 (SVG Renderer)
+# ==============================================================================
+def _svg_color(color):
+    r, g, b, a = rgba(color)
+    return f"rgb({r},{g},{b})", round(a / 255, 3)
+
+def render_svg(scene, out_path, dpi, cjk_font=None):
+    """Writes the scene as SVG. User units are canvas pixels; width/height give the size at `dpi`."""
+    u = 100 / 72 # points -> canvas units (the canvas is laid out at 100 px per inch)
+    pad = PAD_INCHES * 100
+    W, H = scene["width"], scene["height"]
+    family = f"'{cjk_font}', 'DejaVu Sans', sans-serif" if cjk_font else "'DejaVu Sans', sans-serif"
+    out, defs, patterns = [], [], {}
+
+    def hatch_fill(hatch, color):
+        key = (hatch, color)
+        if key not in patterns:
+            pid = f"hatch{len(patterns)}"
+            c, a = _svg_color(color)
+            n = sum(hatch.count(ch) for ch in "/\\|-+xX")
+            dots = hatch.count(".") + hatch.count("o") + hatch.count("O")
+            step = 100 / (n * HATCH_DENSITY) if n else 0
+            dot_step = 100 / (dots * HATCH_DENSITY) if dots else 0
+            diagonal = any(ch in hatch for ch in "/\\xX")
+            # One tile must repeat every part: diagonals every 2 steps, the rest every step
+            tile = max(2 * step if diagonal else step, 2 * dot_step)
+            body = []
+            if any(ch in hatch for ch in "/xX"): body.append(f'<line x1="-{tile}" y1="{tile}" x2="{tile}" y2="-{tile}"/><line x1="0" y1="{tile}" x2="{tile}" y2="0"/><line x1="{tile}" y1="{tile}" x2="{2 * tile}" y2="0"/>')
+            if any(ch in hatch for ch in "\\xX"): body.append(f'<line x1="-{tile}" y1="0" x2="{tile}" y2="{2 * tile}"/><line x1="0" y1="0" x2="{tile}" y2="{tile}"/><line x1="0" y1="-{tile}" x2="{2 * tile}" y2="{tile}"/>')
+            for i in range(round(tile / step) if step else 0):
+                if any(ch in hatch for ch in "|+"): body.append(f'<line x1="{(i + 0.5) * step:.3f}" y1="0" x2="{(i + 0.5) * step:.3f}" y2="{tile:.3f}"/>')
+                if any(ch in hatch for ch in "-+"): body.append(f'<line x1="0" y1="{(i + 0.5) * step:.3f}" x2="{tile:.3f}" y2="{(i + 0.5) * step:.3f}"/>')
+            for j in range(round(tile / dot_step) if dots else 0):
+                # Every other row of dots is shifted by half a step, like matplotlib's circle hatches
+                for i in range(round(tile / dot_step) + 1):
+                    cx, cy = (i + (0.5 if j % 2 == 0 else 0)) * dot_step, (j + 0.5) * dot_step
+                    body.append(f'<circle cx="{cx:.3f}" cy="{cy:.3f}" r="{max(0.4, dot_step * 0.1):.2f}" fill="{c}" fill-opacity="{a}"/>')
+            defs.append(f'<pattern id="{pid}" patternUnits="userSpaceOnUse" width="{tile:.3f}" height="{tile:.3f}">'
+                        f'<g stroke="{c}" stroke-opacity="{a}" stroke-width="{u:.3f}">{"".join(body)}</g></pattern>')
+            patterns[key] = pid
+        return f"url(#{patterns[key]})"
+
+    for shape in scene["shapes"]:
+        if shape["kind"] == "rect":
+            x, y, w, h = shape["xywh"]
+            r = min(shape.get("radius", 0), w / 2, h / 2)
+            geom = f'<rect x="{x:.2f}" y="{y:.2f}" width="{w:.2f}" height="{h:.2f}"' + (f' rx="{r:.2f}"' if r > 0 else "")
+        elif shape["kind"] == "circle":
+            (cx, cy), r = shape["center"], shape["r"]
+            geom = f'<circle cx="{cx:.2f}" cy="{cy:.2f}" r="{r:.2f}"'
+        else:
+            geom = '<polygon points="' + " ".join(f"{x:.2f},{y:.2f}" for x, y in shape["points"]) + '"'
+        alpha = shape.get("alpha", 1.0)
+        out.append(f'<g opacity="{alpha}">' if alpha < 1 else "<g>")
+        if shape.get("face"):
+            c, a = _svg_color(shape["face"])
+            out.append(f'{geom} fill="{c}" fill-opacity="{a}"/>')
+        if shape.get("hatch") and shape.get("edge"):
+            out.append(f'{geom} fill="{hatch_fill(shape["hatch"], shape["edge"])}"/>')
+        if shape.get("edge"):
+            c, a = _svg_color(shape["edge"])
+            lw = (shape.get("lw") or 1.0) * u
+            dash = DASHES.get(shape.get("ls", "-"))
+            dash_attr = f' stroke-dasharray="{",".join(f"{v * lw:.2f}" for v in dash)}"' if dash else ""
+            out.append(f'{geom} fill="none" stroke="{c}" stroke-opacity="{a}" stroke-width="{lw:.2f}"{dash_attr}/>')
+        out.append("</g>")
+
+    for line in scene["lines"]:
+        c, a = _svg_color(line["color"])
+        lw = line["lw"] * u
+        dash = DASHES.get(line.get("ls", "-"))
+        dash_attr = f' stroke-dasharray="{",".join(f"{v * lw:.2f}" for v in dash)}"' if dash else ""
+        cap = ' stroke-linecap="round"' if line.get("ls") == ":" else ""
+        pts = " ".join(f"{x:.2f},{y:.2f}" for x, y in line["points"])
+        out.append(f'<polyline points="{pts}" fill="none" stroke="{c}" stroke-opacity="{a}" stroke-width="{lw:.2f}"{dash_attr}{cap}/>')
+
+    for t in scene["texts"]:
+        if not t["text"]: continue
+        size = t["size"] * u
+        lines = text_lines(t["text"])
+        step = size * t.get("linespacing", 1.2)
+        top = t["y"] - step * (len(lines) - 1) / 2
+        if t.get("box"):
+            bg, edge = t["box"]
+            p = 0.4 * size
+            w = max(text_width_em(l) for l in lines) * size + 2 * p
+            h = step * (len(lines) - 1) + size + 2 * p
+            (bc, ba), (ec, ea) = _svg_color(bg), _svg_color(edge)
+            out.append(f'<rect x="{t["x"] - w / 2:.2f}" y="{t["y"] - h / 2:.2f}" width="{w:.2f}" height="{h:.2f}" rx="{p:.2f}" '
+                       f'fill="{bc}" fill-opacity="{ba}" stroke="{ec}" stroke-opacity="{ea}" stroke-width="{u:.2f}"/>')
+        c, a = _svg_color(t["color"])
+        weight = ' font-weight="bold"' if t.get("bold") else ""
+        spans = "".join(f'<tspan x="{t["x"]:.2f}" y="{top + i * step:.2f}">{escape(l)}</tspan>' for i, l in enumerate(lines))
+        out.append(f'<text font-size="{size:.2f}" fill="{c}" fill-opacity="{a}"{weight} text-anchor="middle" '
+                   f'dominant-baseline="central">{spans}</text>')
+
+    width_px, height_px = (W + 2 * pad) * dpi / 100, (H + 2 * pad) * dpi / 100
+    bg, _ = _svg_color(scene["bg"])
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width_px:.0f}" height="{height_px:.0f}" '
+                f'viewBox="{-pad} {-pad} {W + 2 * pad} {H + 2 * pad}" font-family="{escape(family, {chr(34): "&quot;"})}">\n')
+        if defs: f.write("<defs>" + "".join(defs) + "</defs>\n")
+        f.write(f'<rect x="{-pad}" y="{-pad}" width="{W + 2 * pad}" height="{H + 2 * pad}" fill="{bg}"/>\n')
+        f.write(f'<rect x="0" y="0" width="{W}" height="{H}" fill="#FFFFFF"/>\n')
+        f.write("\n".join(out))
+        f.write("\n</svg>\n")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geometry checks of app.py (test_geometry.py)
+
+Usage:
+  python -m unittest test_geometry
+"""
+
+import random
+import time
+import unittest
+
+import app
+
+HOUSE = ("house", [(0, 0), (1, 0), (1, 0.15), (0, 0.15)]) # DEFAULTS house: full width, 0.15 tall
+
+def rect(zid, x, y, w, h):
+    return (zid, [(x, y), (x + w, y), (x + w, y + h), (x, y + h)])
+
+def stacked_zones(n, tall=False):
+    """n thin zones stacked below the house, all live at once in the sweep; optionally one tall narrow zone."""
+    h = 0.85 / n
+    items = [HOUSE] + [rect(f"Z{i}", 0.1, 0.15 + i * h, 0.8, h * 0.9) for i in range(n)]
+    if tall: items.append(rect("tall", 0.95, 0.16, 0.01, 0.83))
+    return items
+
+def brute_force(items):
+    return sorted((items[a][0], items[b][0]) for a in range(len(items)) for b in range(a + 1, len(items))
+                  if app.polygons_overlap(items[a][1], items[b][1]))
+
+class FindOverlapsTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            items = []
+            for i in range(rng.randint(1, 30)):
+                if rng.random() < 0.3: # Grid-aligned rects: touching edges and identical zones
+                    items.append(rect(f"z{i}", rng.choice([0, .25, .5]), rng.choice([0, .25, .5]),
+                                      rng.choice([.25, .5]), rng.choice([.25, .5])))
+                else:
+                    cx, cy = rng.random(), rng.random()
+                    items.append((f"z{i}", [(cx + rng.uniform(-.2, .2), cy + rng.uniform(-.2, .2)) for _ in range(rng.randint(3, 6))]))
+            self.assertEqual(sorted(app.find_overlaps(items)), brute_force(items))
+
+    def test_tall_zones_and_house(self):
+        items = stacked_zones(50, tall=True) + [rect("wide", 0.05, 0.5, 0.9, 0.01)]
+        self.assertEqual(sorted(app.find_overlaps(items)), brute_force(items))
+
+    def test_scales_n_log_n(self):
+        # Every zone is live for the whole sweep and the house and the tall zone span many of them:
+        # a window widened by the tallest box made this quadratic (16x the time for 4x the zones)
+        def seconds(n):
+            items = stacked_zones(n, tall=True)
+            best = float("inf")
+            for _ in range(3):
+                started = time.perf_counter()
+                self.assertEqual(app.find_overlaps(items), [])
+                best = min(best, time.perf_counter() - started)
+            return best
+        small, large = seconds(2000), seconds(8000)
+        self.assertLess(large / small, 8, f"2000 zones: {small:.3f}s, 8000 zones: {large:.3f}s")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,312 @@
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 默认参数：全局并发数、单个域名并发数、超时（连接超时, 读取超时）
+默认并发数 = 32
+默认单域名并发数 = 8
+默认超时 = (10, 60)
+默认扩展名 = '.webp'
+分块大小 = 64 * 1024  # 流式写入的块大小，峰值内存与文件大小无关
+
+
+def build_session(pool_size=默认并发数):
+    """创建共享的 Session，连接池大小与并发数一致以复用 keep-alive 连接"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class HostLimiter:
+    """按域名限制并发，避免同一台服务器被打满"""
+
+    def __init__(self, per_host=默认单域名并发数):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def get(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+def file_extension_for(url):
+    # 解析URL，获取文件扩展名
+    file_extension = os.path.splitext(urlparse(url).path)[1]
+    if not file_extension:
+        file_extension = 默认扩展名  # 如果无法获取扩展名，默认使用.webp
+    return file_extension
+
+
+def save_path_for(save_dir, index, url):
+    # 保存路径：Excel行号 + 扩展名
+    return save_dir / f"{index}{file_extension_for(url)}"
+
+
+def part_path_for(save_path):
+    # 下载中的临时文件，完成后原子重命名为正式文件
+    return save_path.with_name(save_path.name + '.part')
+
+
+def _expected_total(response, offset):
+    """根据 Content-Range / Content-Length 推算完整文件大小，未知时返回 None"""
+    content_range = response.headers.get('Content-Range', '')
+    if response.status_code == 206 and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        if total.isdigit():
+            return int(total)
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit():
+        return offset + int(content_length)
+    return None
+
+
+def _hash_existing(part_path, offset):
+    # 续传时先把已下载部分计入哈希
+    digest = hashlib.sha256()
+    if offset:
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(分块大小), b''):
+                digest.update(chunk)
+    return digest
+
+
+def _stream_to_part(session, url, part_path, timeout, validators=None, allow_resume=True):
+    """
+    把响应分块写入 .part 文件，已有的部分通过 Range 请求续传。
+    返回文件信息 dict；条件请求命中（304）时返回 None。
+    """
+    offset = part_path.stat().st_size if allow_resume and part_path.exists() else 0
+    # 禁用压缩传输，保证 Content-Length 与写入的字节数一致
+    headers = {'Accept-Encoding': 'identity'}
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+    elif validators:
+        headers.update(validators)
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            return None
+        if response.status_code == 416 and offset:
+            total = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+            if total != str(offset):
+                # 已有部分与服务器文件不一致（例如文件已更新），丢弃后完整重下
+                response.close()
+                part_path.unlink()
+                return _stream_to_part(session, url, part_path, timeout, validators, allow_resume=False)
+            # 上次已完整接收，只是没来得及重命名
+            expected = written = offset
+            digest = _hash_existing(part_path, offset)
+        else:
+            response.raise_for_status()  # 如果请求失败，抛出异常
+
+            if response.status_code == 206:
+                start = response.headers.get('Content-Range', '').split(' ')[-1].split('-')[0]
+                if start != str(offset):
+                    raise IOError(f"服务器返回的续传位置 {start} 与本地已下载的 {offset} 字节不一致")
+                mode = 'ab'
+            else:
+                # 服务器不支持Range，从头下载
+                offset = 0
+                mode = 'wb'
+
+            expected = _expected_total(response, offset)
+            digest = _hash_existing(part_path, offset)
+            written = offset
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=分块大小):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    written += len(chunk)
+
+        info = {
+            'size': written,
+            'sha256': digest.hexdigest(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+
+    if expected is not None and written != expected:
+        raise IOError(f"文件不完整：已接收 {written} 字节，应为 {expected} 字节（重新运行将续传）")
+    return info
+
+
+def download_one(session, url, save_path, timeout=默认超时, host_limiter=None, validators=None):
+    """
+    流式下载单个URL：先写入 .part，校验长度后原子重命名，失败时抛出异常。
+    返回文件信息 dict（size/sha256/etag/last_modified）；validators 条件请求未变化时返回 None。
+    """
+    part_path = part_path_for(save_path)
+    semaphore = host_limiter.get(url) if host_limiter else None
+    if semaphore:
+        semaphore.acquire()
+    try:
+        info = _stream_to_part(session, url, part_path, timeout, validators)
+    finally:
+        if semaphore:
+            semaphore.release()
+    if info is not None:
+        os.replace(part_path, save_path)
+    return info
+
+
+def fetch_bytes(session, url, timeout=默认超时, host_limiter=None):
+    """下载单个URL到内存（流水线模式使用，不落盘），同样校验 Content-Length"""
+    semaphore = host_limiter.get(url) if host_limiter else None
+    if semaphore:
+        semaphore.acquire()
+    try:
+        with session.get(url, headers={'Accept-Encoding': 'identity'}, stream=True,
+                         timeout=timeout) as response:
+            response.raise_for_status()  # 如果请求失败，抛出异常
+            expected = _expected_total(response, 0)
+            buffer = bytearray()
+            for chunk in response.iter_content(chunk_size=分块大小):
+                buffer += chunk
+    finally:
+        if semaphore:
+            semaphore.release()
+    if expected is not None and len(buffer) != expected:
+        raise IOError(f"文件不完整：已接收 {len(buffer)} 字节，应为 {expected} 字节")
+    return bytes(buffer)
+
+
+def link_or_copy(source, target):
+    """把已下载的文件硬链接（不支持时复制）到另一行的保存路径"""
+    if target.exists() and os.path.samefile(source, target):
+        return target
+    temp_path = part_path_for(target)
+    if temp_path.exists():
+        temp_path.unlink()
+    try:
+        os.link(source, temp_path)
+    except OSError:
+        shutil.copyfile(source, temp_path)
+    os.replace(temp_path, target)
+    return target
+
+
+def _fetch(session, url, save_path, timeout, host_limiter, manifest, source):
+    """线程池任务：下载或重新验证一个URL，返回 '下载' 或 '未变化'"""
+    validators = manifest.validators(url) if manifest and source else None
+    info = download_one(session, url, save_path, timeout, host_limiter, validators)
+    if info is None:
+        # 服务器确认文件未变化，直接复用本地文件
+        link_or_copy(source, save_path)
+        return '未变化'
+    if manifest:
+        manifest.record(url, save_path, info)
+    return '下载'
+
+
+def download_all(jobs, save_dir, max_workers=默认并发数, per_host=默认单域名并发数,
+                 timeout=默认超时, session=None, manifest=None, revalidate=False,
+                 max_pending=None):
+    """
+    并发下载 jobs 中的 (行号, url)，按完成顺序逐行输出结果。
+    - jobs 可以是惰性的迭代器：同时在途的任务不超过 max_pending（默认并发数的4倍），
+      读表与下载重叠进行，内存占用与表格行数无关；
+    - 同一URL只下载一次，其余行通过硬链接/复制得到文件；
+    - 传入 manifest 时，清单中已完整的文件直接跳过，revalidate=True 时改为条件请求重新验证。
+    返回 (成功数, 失败数)。
+    """
+    session = session or build_session(max_workers)
+    host_limiter = HostLimiter(per_host)
+    max_pending = max_pending or max_workers * 4
+    统计 = {'成功': 0, '失败': 0, '跳过': 0, '重复': 0}
+    已完成 = {}    # url -> 本次运行中已就绪的文件
+    进行中 = {}    # url -> [(行号, 保存路径), ...] 等待该URL下载完成的重复行
+    futures = {}
+
+    def 链接重复行(index, source, save_path):
+        try:
+            link_or_copy(source, save_path)
+            print(f"重复URL，已链接图片: {save_path}")
+            统计['成功'] += 1
+            统计['重复'] += 1
+        except Exception as e:
+            print(f"下载第{index}张图片时出错: {str(e)}")
+            统计['失败'] += 1
+
+    def 处理完成(future):
+        index, url, save_path = futures.pop(future)
+        等待行 = 进行中.pop(url)
+        try:
+            状态 = future.result()
+        except Exception as e:
+            print(f"下载第{index}张图片时出错: {str(e)}")
+            统计['失败'] += 1 + len(等待行)
+            for dup_index, _ in 等待行:
+                print(f"下载第{dup_index}张图片时出错: 同一URL在第{index}行下载失败")
+            return
+
+        if 状态 == '未变化':
+            print(f"服务器确认未变化，跳过: {save_path}")
+            统计['跳过'] += 1
+        else:
+            print(f"成功下载并保存图片: {save_path}")
+        统计['成功'] += 1
+        已完成[url] = save_path
+        for dup_index, dup_path in 等待行:
+            链接重复行(dup_index, save_path, dup_path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, url in jobs:
+            if not isinstance(url, str) or not url.strip():
+                print(f"第{index}行没有有效的URL，已跳过")
+                统计['失败'] += 1
+                continue
+            url = url.strip()
+            save_path = save_path_for(save_dir, index, url)
+
+            # 重复URL：已就绪的直接链接，仍在下载的等首次出现的行完成后再链接
+            if url in 已完成:
+                链接重复行(index, 已完成[url], save_path)
+                continue
+            if url in 进行中:
+                进行中[url].append((index, save_path))
+                continue
+
+            source = manifest.complete_file(url) if manifest else None
+            if source and not revalidate:
+                try:
+                    link_or_copy(source, save_path)
+                    print(f"已下载过，跳过: {save_path}")
+                    统计['成功'] += 1
+                    统计['跳过'] += 1
+                    已完成[url] = save_path
+                except Exception as e:
+                    print(f"下载第{index}张图片时出错: {str(e)}")
+                    统计['失败'] += 1
+                continue
+
+            # 在途任务已满时先处理完成的任务，形成背压
+            while len(futures) >= max_pending:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    处理完成(future)
+
+            进行中[url] = []
+            future = executor.submit(_fetch, session, url, save_path, timeout,
+                                     host_limiter, manifest, source)
+            futures[future] = (index, url, save_path)
+
+        for future in as_completed(list(futures)):
+            处理完成(future)
+
+    if manifest:
+        manifest.save()
+    if 统计['跳过'] or 统计['重复']:
+        print(f"其中跳过已下载 {统计['跳过']} 张，重复URL链接 {统计['重复']} 张")
+    return 统计['成功'], 统计['失败']
@@ -1,38 +1,63 @@
-import pandas as pd
-import requests
-import os
-from urllib.parse import urlparse
+import argparse
 from pathlib import Path
 
-# 读取Excel文件
-df = pd.read_excel(r'C:\Users\H\Desktop\imgurl.xlsx')
-
-# 创建保存图片的目录
-save_dir = Path(r'C:\Users\H\Desktop\img\download_from_url\download_img')
-save_dir.mkdir(parents=True, exist_ok=True)
-
-# 遍历select_pic列的每一行
-for index, url in enumerate(df['generated_url'], start=2):
-    try:
-        # 发送GET请求获取图片内容
-        response = requests.get(url)
-        response.raise_for_status()  # 如果请求失败，抛出异常
-        
-        # 解析URL，获取文件扩展名
-        parsed_url = urlparse(url)
-        file_extension = os.path.splitext(parsed_url.path)[1]
-        if not file_extension:
-            file_extension = '.webp'  # 如果无法获取扩展名，默认使用.webp
-        
-        # 构建保存路径
-        save_path = save_dir / f"{index}{file_extension}"
-        
-        # 保存图片
-        with open(save_path, 'wb') as f:
-            f.write(response.content)
-        
-        print(f"成功下载并保存图片: {save_path}")
-    except Exception as e:
-        print(f"下载第{index}张图片时出错: {str(e)}")
-
-print("所有图片下载完成")
+from downloader import download_all, 默认并发数, 默认单域名并发数
+from manifest import DownloadManifest, 默认清单文件名
+from url_reader import iter_urls, prefetch, 默认列名, 默认队列长度
+
+# 默认的Excel文件和保存目录
+默认Excel路径 = r'C:\Users\H\Desktop\imgurl.xlsx'
+默认保存目录 = r'C:\Users\H\Desktop\img\download_from_url\download_img'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量下载Excel中URL对应的图片")
+    parser.add_argument("--input", "--excel", dest="input", default=默认Excel路径,
+                        help="URL列表文件（.xlsx/.xls/.csv/.parquet）")
+    parser.add_argument("--column", default=默认列名, help="URL所在的列名")
+    parser.add_argument("--sheet", help="工作表名称，默认使用活动工作表")
+    parser.add_argument("--queue-size", type=int, default=默认队列长度, help="读表与下载之间的缓冲队列长度")
+    parser.add_argument("--save-dir", default=默认保存目录, help="保存图片的目录")
+    parser.add_argument("--workers", type=int, default=默认并发数, help="全局并发下载数")
+    parser.add_argument("--per-host", type=int, default=默认单域名并发数, help="单个域名的并发下载数")
+    parser.add_argument("--timeout", type=float, default=60, help="单个请求的读取超时（秒）")
+    parser.add_argument("--manifest", help=f"下载清单路径，默认保存在保存目录下的 {默认清单文件名}")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="已下载的文件用 If-None-Match/If-Modified-Since 向服务器确认是否有更新")
+    parser.add_argument("--convert", metavar="FORMAT",
+                        help="流水线模式：下载后在内存中解码并直接保存为指定格式（如 PNG），不保存原始文件")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="流水线模式下同时输出的缩放尺寸（长边像素），保存到 保存目录/尺寸/ 下")
+    parser.add_argument("--encode-workers", type=int, help="流水线模式的编码进程数，默认CPU核数")
+    args = parser.parse_args()
+    if args.convert:
+        from pipeline import pillow_format
+
+        if pillow_format(args.convert) is None:
+            parser.error(f"--convert 不支持的格式：{args.convert}（需为 Pillow 能写出的格式，如 PNG、JPG、WEBP）")
+
+    # 创建保存图片的目录
+    save_dir = Path(args.save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+
+    # 边读表边下载：逐行读取URL列，行号从2开始（第1行为表头）
+    jobs = prefetch(iter_urls(args.input, args.column, args.sheet), args.queue_size)
+
+    if args.convert or args.sizes:
+        from pipeline import run_pipeline, 默认编码进程数
+
+        成功数, 失败数 = run_pipeline(jobs, save_dir, fmt=(args.convert or 'PNG').upper(),
+                                  sizes=args.sizes, max_workers=args.workers,
+                                  per_host=args.per_host, timeout=(10, args.timeout),
+                                  encode_workers=args.encode_workers or 默认编码进程数)
+    else:
+        manifest = DownloadManifest(args.manifest or save_dir / 默认清单文件名)
+        成功数, 失败数 = download_all(jobs, save_dir, max_workers=args.workers,
+                                  per_host=args.per_host, timeout=(10, args.timeout),
+                                  manifest=manifest, revalidate=args.revalidate)
+
+    print(f"所有图片下载完成：成功 {成功数} 张，失败 {失败数} 张")
+
+
+if __name__ == "__main__":
+    main()
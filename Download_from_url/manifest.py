@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+默认清单文件名 = 'manifest.json'
+保存间隔 = 200  # 每记录多少条就落盘一次，中途崩溃最多丢失这么多条记录
+
+
+class DownloadManifest:
+    """
+    持久化的下载清单：url -> {path, size, sha256, etag, last_modified}。
+    文件路径相对清单所在目录保存，整个下载目录移动后依然有效。
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"下载清单 {self.path} 无法读取，将重新建立: {e}")
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def complete_file(self, url):
+        """清单中记录的文件仍存在且大小一致时返回其路径，否则返回 None"""
+        entry = self.get(url)
+        if not entry:
+            return None
+        file_path = self.root / entry['path']
+        try:
+            if file_path.stat().st_size == entry['size']:
+                return file_path
+        except OSError:
+            pass
+        return None
+
+    def validators(self, url):
+        """重新验证用的条件请求头"""
+        entry = self.get(url) or {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, url, file_path, info):
+        entry = dict(info)
+        entry['path'] = os.path.relpath(file_path, self.root).replace(os.sep, '/')
+        with self._lock:
+            self.entries[url] = entry
+            self._unsaved += 1
+            need_save = self._unsaved >= 保存间隔
+        if need_save:
+            self.save()
+
+    def save(self):
+        # 先写临时文件再替换，避免中断时留下损坏的清单
+        with self._lock:
+            data = json.dumps(self.entries, ensure_ascii=False, indent=1)
+            self._unsaved = 0
+            temp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
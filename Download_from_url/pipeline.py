@@ -0,0 +1,133 @@
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from PIL import Image
+
+from downloader import HostLimiter, build_session, fetch_bytes, 默认并发数, 默认单域名并发数, 默认超时
+
+默认编码进程数 = os.cpu_count() or 1
+
+
+def _target_dimensions(width, height, target_size):
+    # 与 Format_conversion/open_dir.py 的缩放规则一致：长边缩放到 target_size，保持宽高比
+    aspect_ratio = width / height
+    if width > height:
+        return target_size, int(target_size / aspect_ratio)
+    return int(target_size * aspect_ratio), target_size
+
+
+def pillow_format(fmt):
+    """--convert 的格式名（按扩展名理解，如 jpg/tif）对应的 Pillow 保存格式；Pillow 无法写出时返回 None"""
+    name = Image.registered_extensions().get('.' + fmt.lower())
+    if name is None and fmt.upper() in Image.SAVE:
+        name = fmt.upper()  # 没有同名扩展名的格式名，如 JPEG2000
+    return name if name in Image.SAVE else None
+
+
+def output_paths_for(out_dir, stem, fmt, sizes):
+    """某一行的全部输出路径：无尺寸时为 out_dir/行号.ext，有尺寸时为 out_dir/尺寸/行号.ext"""
+    ext = '.' + fmt.lower()
+    if not sizes:
+        return [out_dir / f"{stem}{ext}"]
+    return [out_dir / str(size) / f"{stem}{ext}" for size in sizes]
+
+
+def encode_image(data, stem, out_dir, fmt='PNG', sizes=None):
+    """
+    进程池任务：在内存中解码下载到的字节，直接写出规范化后的图片。
+    每个输出只写一次磁盘；先写临时文件再重命名，中断时不会留下半截文件。
+    """
+    save_format = pillow_format(fmt)  # 扩展名沿用 fmt（.jpg），保存格式用 Pillow 的名字（JPEG）
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        if img.mode == 'CMYK' or (save_format == 'JPEG' and img.mode not in ('RGB', 'L')):
+            img = img.convert('RGB')
+        written = []
+        targets = output_paths_for(out_dir, stem, fmt, sizes)
+        for target_size, output_path in zip(sizes or [None], targets):
+            output = img
+            if target_size:
+                output = img.resize(_target_dimensions(*img.size, target_size), Image.LANCZOS)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = output_path.with_name(output_path.name + '.part')
+            output.save(temp_path, save_format)
+            os.replace(temp_path, output_path)
+            written.append(output_path)
+    return written
+
+
+def run_pipeline(jobs, out_dir, fmt='PNG', sizes=None, max_workers=默认并发数,
+                 per_host=默认单域名并发数, timeout=默认超时, encode_workers=默认编码进程数,
+                 max_pending=None):
+    """
+    下载→解码→转换流水线：下载线程池与编码进程池通过有界的在途任务数相连。
+    网络I/O与CPU编码同时进行；任一阶段积压时上游暂停提交，内存中最多同时存放
+    约 max_pending（默认并发数的2倍）张原图。输出已全部存在的行直接跳过。
+    返回 (成功数, 失败数)。
+    """
+    out_dir = Path(out_dir)
+    session = build_session(max_workers)
+    host_limiter = HostLimiter(per_host)
+    max_pending = max_pending or max_workers * 2
+    max_encoding = encode_workers * 2
+    统计 = {'成功': 0, '失败': 0, '跳过': 0}
+    downloads = {}   # future -> 行号
+    encodes = {}     # future -> 行号
+
+    def 处理编码完成(done):
+        for future in done:
+            index = encodes.pop(future)
+            try:
+                paths = future.result()
+                print(f"成功下载并转换图片: {', '.join(str(p) for p in paths)}")
+                统计['成功'] += 1
+            except Exception as e:
+                print(f"转换第{index}张图片时出错: {str(e)}")
+                统计['失败'] += 1
+
+    def 处理下载完成(done):
+        for future in done:
+            index = downloads.pop(future)
+            try:
+                data = future.result()
+            except Exception as e:
+                print(f"下载第{index}张图片时出错: {str(e)}")
+                统计['失败'] += 1
+                continue
+            # 编码阶段已满时等待，下载阶段随之停止提交，形成背压
+            while len(encodes) >= max_encoding:
+                done_encodes, _ = wait(encodes, return_when=FIRST_COMPLETED)
+                处理编码完成(done_encodes)
+            encodes[encoder.submit(encode_image, data, index, out_dir, fmt, sizes)] = index
+        处理编码完成([future for future in encodes if future.done()])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as downloader, \
+            ProcessPoolExecutor(max_workers=encode_workers) as encoder:
+        for index, url in jobs:
+            if not isinstance(url, str) or not url.strip():
+                print(f"第{index}行没有有效的URL，已跳过")
+                统计['失败'] += 1
+                continue
+            if all(p.exists() for p in output_paths_for(out_dir, index, fmt, sizes)):
+                统计['成功'] += 1
+                统计['跳过'] += 1
+                continue
+
+            while len(downloads) >= max_pending:
+                done, _ = wait(downloads, return_when=FIRST_COMPLETED)
+                处理下载完成(done)
+            future = downloader.submit(fetch_bytes, session, url.strip(), timeout, host_limiter)
+            downloads[future] = index
+
+        while downloads:
+            done, _ = wait(downloads, return_when=FIRST_COMPLETED)
+            处理下载完成(done)
+        while encodes:
+            done, _ = wait(encodes, return_when=FIRST_COMPLETED)
+            处理编码完成(done)
+
+    if 统计['跳过']:
+        print(f"其中输出已存在、跳过 {统计['跳过']} 张")
+    return 统计['成功'], 统计['失败']
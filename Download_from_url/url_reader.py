@@ -0,0 +1,101 @@
+import csv
+import os
+import queue
+import threading
+
+默认列名 = 'generated_url'
+默认队列长度 = 1024
+_结束 = object()
+
+
+def _iter_xlsx(path, column, sheet):
+    """openpyxl 只读模式逐行读取，只取 URL 所在的一列"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        header = next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        if column not in header:
+            raise KeyError(f"工作表 '{worksheet.title}' 中没有名为 '{column}' 的列")
+        col = header.index(column) + 1
+        # 行号从2开始（第1行为表头），与Excel中看到的行号一致
+        for index, (value,) in enumerate(
+                worksheet.iter_rows(min_row=2, min_col=col, max_col=col, values_only=True), start=2):
+            yield index, value
+    finally:
+        workbook.close()
+
+
+def _iter_xls(path, column, sheet):
+    # 旧版 .xls openpyxl 无法读取，退回 pandas，但只解析需要的一列
+    import pandas as pd
+
+    df = pd.read_excel(path, sheet_name=sheet or 0, usecols=[column])
+    yield from enumerate(df[column], start=2)
+
+
+def _iter_csv(path, column):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if column not in header:
+            raise KeyError(f"CSV文件中没有名为 '{column}' 的列")
+        col = header.index(column)
+        for index, row in enumerate(reader, start=2):
+            yield index, row[col] if col < len(row) else None
+
+
+def _iter_parquet(path, column):
+    import pyarrow.parquet as pq
+
+    # 按 row group 分批读取，行号沿用表格的编号方式（第一条数据为第2行）
+    index = 2
+    for batch in pq.ParquetFile(path).iter_batches(columns=[column]):
+        for value in batch.column(0).to_pylist():
+            yield index, value
+            index += 1
+
+
+def iter_urls(path, column=默认列名, sheet=None):
+    """
+    逐行读取 URL 列表，生成 (行号, url)。
+    支持 .xlsx/.xlsm（openpyxl 只读模式）、.xls、.csv 和 .parquet。
+    """
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        return _iter_xlsx(path, column, sheet)
+    if ext == '.xls':
+        return _iter_xls(path, column, sheet)
+    if ext == '.csv':
+        return _iter_csv(path, column)
+    if ext == '.parquet':
+        return _iter_parquet(path, column)
+    raise ValueError(f"不支持的URL列表格式: {path}（支持 .xlsx/.xls/.csv/.parquet）")
+
+
+def prefetch(iterable, maxsize=默认队列长度):
+    """
+    在后台线程中读取 iterable，通过有界队列交给调用方。
+    队列满时读取线程阻塞，解析与下载重叠进行而内存保持有界；读取出错时在调用方重新抛出。
+    """
+    buffer = queue.Queue(maxsize=maxsize)
+    errors = []
+
+    def producer():
+        try:
+            for item in iterable:
+                buffer.put(item)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            buffer.put(_结束)
+
+    threading.Thread(target=producer, daemon=True).start()
+    while True:
+        item = buffer.get()
+        if item is _结束:
+            break
+        yield item
+    if errors:
+        raise errors[0]
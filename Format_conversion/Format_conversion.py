@@ -1,7 +1,17 @@
+import argparse
 import os
+import random
+from functools import partial
+from multiprocessing import Pool
+
 from PIL import Image
 from tqdm import tqdm  # 进度条库
 
+from conversion_manifest import 转换清单
+from dir_scan import LAYOUTS, bounded, default_layout, output_key, output_relpath, scan_files, skip_collisions
+from encoder_profiles import 保存图片, 基准测试, 编码配置, 配置设置, 默认编码配置
+from shard_pack import Tar分片写入器, 内存映射写入器, 打包格式, 适配方式, 编码为字节, 缩放为数组
+
 # 获取当前脚本的目录
 当前目录 = os.path.dirname(os.path.abspath(__file__))
 
@@ -9,43 +19,282 @@ from tqdm import tqdm  # 进度条库
 源文件夹 = os.path.join(当前目录, 'input')
 目标文件夹 = os.path.join(当前目录, 'output')
 
-# 打印绝对路径，调试用
-# print("源文件夹绝对路径:", 源文件夹)
-# print("目标文件夹绝对路径:", 目标文件夹)
-
-# 确保源文件夹存在（如果不存在则创建）
-if not os.path.exists(源文件夹):
-    os.makedirs(源文件夹)
-    print(f"源文件夹 {源文件夹} 已创建，请将需要处理的文件放入该文件夹后重新运行脚本。")
-    exit()  # 退出脚本，等待用户将文件放入
-
-# 确保目标文件夹存在
-if not os.path.exists(目标文件夹):
-    os.makedirs(目标文件夹)
-
 # 支持的图像格式
 支持的格式 = ['.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp']
 
-# 获取所有符合条件的文件
-文件列表 = [文件名 for 文件名 in os.listdir(源文件夹) if os.path.splitext(文件名)[1].lower() in 支持的格式]
-
-# 初始化计数器
-计数器 = 0
-
-# 遍历源文件夹中的所有文件并显示进度条
-for 文件名 in tqdm(文件列表, desc="处理进度"):
-    文件扩展名 = os.path.splitext(文件名)[1].lower()
-    
-    # 构建完整的文件路径
-    源文件路径 = os.path.join(源文件夹, 文件名)
-    目标文件路径 = os.path.join(目标文件夹, os.path.splitext(文件名)[0] + '.png')  # 使用原文件名，改为PNG扩展名
 
+def 转换单个文件(任务, 配置名=默认编码配置, 哈希函数=None):
+    """
+    转换一个文件，返回 (任务, 错误信息, None, 感知哈希)，成功时错误信息为 None；
+    多进程模式下在子进程中执行。传入 哈希函数 时顺便对已解码的图片计算感知哈希。
+    """
+    文件名, 源文件路径, 目标文件路径 = 任务
+    哈希 = None
     try:
         # 打开图片
         with Image.open(源文件路径) as 图片:
-            # 转换并保存为PNG格式
-            图片.save(目标文件路径, 'PNG')
+            # 分片/镜像布局下输出子目录可能还不存在
+            os.makedirs(os.path.dirname(目标文件路径), exist_ok=True)
+            # 按编码配置转换并保存（默认为PNG格式）
+            保存图片(图片, 目标文件路径, 配置名)
+            if 哈希函数:
+                哈希 = 哈希函数(图片)
     except Exception as e:
-        print(f'处理 {文件名} 时出错: {str(e)}')
+        return 任务, str(e), None, None
+    return 任务, None, None, 哈希
+
+
+def 生成任务(源文件夹, 目标文件夹, 扩展名='.png', 布局='flat', 递归=True):
+    """边遍历边生成 (相对路径, 源文件路径, 目标文件路径)，不会预先列出全部文件"""
+    # 获取所有符合条件的文件
+    for 相对路径 in scan_files(源文件夹, set(支持的格式), recursive=递归):
+        # 使用原文件名，改为输出格式的扩展名；目录结构由布局决定
+        yield (相对路径, os.path.join(源文件夹, 相对路径),
+               os.path.join(目标文件夹, output_relpath(相对路径, 扩展名, 布局)))
+
+
+def 过滤重名(任务流, 已占用输出):
+    """
+    多个源文件映射到同一个输出时只处理先遍历到的一个，其余报告为冲突并跳过（见 dir_scan.skip_collisions）。
+    已占用输出 会记录所有被处理的输出路径。
+    """
+    # 用 tqdm.write 输出，避免打乱进度条
+    return skip_collisions(任务流, lambda 任务: 任务[2], 已占用输出, source_of=lambda 任务: 任务[0], report=tqdm.write)
+
+
+def 批量转换(任务流, 进程数=1, 分块大小=None, 配置名=默认编码配置, 完成回调=None, 转换=None,
+         去重索引=None, 跳过重复=False, 重复回调=None):
+    """
+    转换全部任务并显示进度条，返回出错的 [(文件名, 错误信息), ...]。
+    任务流可以是边遍历边生成的迭代器，目录还没遍历完就开始转换。
+    进程数大于1时使用进程池，任务按块分发以降低进程间通信开销，完成顺序不固定；
+    在途任务数有上限，内存占用不随文件总数增长。
+    转换 默认为按编码配置写出文件，也可以换成返回数据的函数（打包模式）；
+    成功的 (任务, 结果) 会在主进程中传给 完成回调。
+    传入 去重索引 时，子进程顺便计算感知哈希，主进程按完成顺序检索近似重复；
+    跳过重复 时重复图片不会交给 完成回调，已写出的输出文件会被删除，改为调用 重复回调(任务, 重复于)。
+    """
+    出错列表 = []
+    转换 = 转换 or partial(转换单个文件, 配置名=配置名, 哈希函数=去重索引 and 感知哈希函数())
+    with tqdm(desc="处理进度", unit="张") as 进度条:
+        if 进程数 <= 1:
+            结果迭代 = map(转换, 任务流)
+            进程池 = None
+            释放 = None
+        else:
+            分块大小 = 分块大小 or 16
+            任务流, 释放 = bounded(任务流, 进程数 * 分块大小 * 4)
+            进程池 = Pool(进程数)
+            结果迭代 = 进程池.imap_unordered(转换, 任务流, chunksize=分块大小)
+        try:
+            for 任务, 错误, 结果, 哈希 in 结果迭代:
+                if 释放:
+                    释放()
+                if 错误:
+                    出错列表.append((任务[0], 错误))
+                    进度条.update(1)
+                    continue
+                重复 = 哈希 and 去重索引.查找并添加(任务[0], 哈希)
+                if 重复 and 跳过重复:
+                    if 结果 is None and os.path.exists(任务[2]):
+                        os.remove(任务[2])
+                    if 重复回调:
+                        重复回调(任务, 重复[0])
+                    进度条.update(1)
+                    continue
+                if 完成回调:
+                    完成回调(任务, 结果)
+                进度条.update(1)
+        finally:
+            if 进程池:
+                进程池.terminate()
+                进程池.join()
+    return 出错列表
+
+
+def 感知哈希函数():
+    # 只有开启去重时才需要 numpy
+    from perceptual_dedupe import 感知哈希
+    return 感知哈希
+
+
+def 随机抽样(迭代器, 数量):
+    """蓄水池抽样，不需要先把全部文件放进列表"""
+    样本 = []
+    for 序号, 元素 in enumerate(迭代器):
+        if 序号 < 数量:
+            样本.append(元素)
+        else:
+            位置 = random.randint(0, 序号)
+            if 位置 < 数量:
+                样本[位置] = 元素
+    return 样本
+
+
+def 打印出错汇总(出错列表):
+    if not 出错列表:
+        return
+    print(f'\n共有 {len(出错列表)} 个文件处理出错：')
+    for 文件名, 错误 in 出错列表:
+        print(f'处理 {文件名} 时出错: {错误}')
+
+
+def 保存去重报告(去重索引, args):
+    if not 去重索引:
+        return
+    去重索引.保存(args.output)
+    动作 = '已跳过' if args.skip_duplicates else '已记录'
+    print(f'感知哈希去重：{len(去重索引.来源)} 张图片中有 {len(去重索引.重复)} 张近似重复，{动作}，'
+          f'详见 {os.path.join(args.output, "duplicates.tsv")}')
+
+
+def 打包(args, 进程数, 递归, 去重索引=None):
+    """打包模式：子进程负责解码和编码，主进程按完成顺序流式写入分片，全部数据不需要同时放进内存"""
+    任务流 = 生成任务(args.input, args.output, 递归=递归)
+    哈希函数 = 去重索引 and 感知哈希函数()
+    if args.pack == 'tar':
+        写入器 = Tar分片写入器(args.output, 编码配置[args.profile]['扩展名'], args.shard_size)
+        转换 = partial(编码为字节, 配置名=args.profile, 哈希函数=哈希函数)
+    else:
+        写入器 = 内存映射写入器(args.output, args.size)
+        转换 = partial(缩放为数组, 边长=args.size, 适配=args.fit, 哈希函数=哈希函数)
+    try:
+        出错列表 = 批量转换(任务流, 进程数, args.chunksize, 转换=转换,
+                         完成回调=lambda 任务, 数据: 写入器.写入(任务[0], 数据),
+                         去重索引=去重索引, 跳过重复=args.skip_duplicates)
+    finally:
+        写入器.关闭()
+    打印出错汇总(出错列表)
+    print(f'已打包 {写入器.数量} 张图片到 {args.output}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量将 input 文件夹中的图片统一格式（默认PNG）并保存到 output 文件夹")
+    parser.add_argument("--input", default=源文件夹, help="源文件夹")
+    parser.add_argument("--output", default=目标文件夹, help="目标文件夹")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="并行转换的进程数，默认1（单进程），0 表示使用全部CPU核")
+    parser.add_argument("--chunksize", type=int, help="多进程模式下每次分发给子进程的文件数")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量模式：只处理新增或变化的文件，并删除源文件已不存在的输出")
+    parser.add_argument("--hash", action="store_true",
+                        help="增量模式下额外记录内容哈希，修改时间变化但内容相同的文件也会跳过")
+    parser.add_argument("--profile", choices=list(编码配置), default=默认编码配置,
+                        help="编码配置，例如 png-fast（压缩级别1）、webp-lossless、jpeg-q95")
+    parser.add_argument("--benchmark", type=int, nargs="?", const=100, metavar="N",
+                        help="不转换文件，抽取 input 中 N 个文件（默认100）对比所有编码配置的速度、体积和峰值内存")
+    parser.add_argument("--layout", choices=LAYOUTS,
+                        help="输出布局：flat 全部放在一个目录；mirror 保持输入的目录结构（递归时的默认值）；"
+                             "hash 按哈希分到 ab/cd/ 子目录，适合百万级文件。--no-recursive 时默认 flat")
+    parser.add_argument("--no-recursive", action="store_true", help="只处理源文件夹第一层，不进入子目录")
+    parser.add_argument("--pack", choices=打包格式,
+                        help="打包模式：tar 写成 WebDataset 风格的 tar 分片；memmap 写成固定尺寸的 uint8 数组 images.npy")
+    parser.add_argument("--shard-size", type=int, default=10000, help="tar 打包时每个分片的样本数")
+    parser.add_argument("--size", type=int, default=256, help="memmap 打包时图片的边长（像素）")
+    parser.add_argument("--fit", choices=适配方式, default="crop",
+                        help="memmap 打包时的缩放方式：crop 居中裁剪（默认），pad 保持完整画面并补边")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="转换时计算感知哈希（dHash），在输出目录写出 duplicates.tsv 近似重复报告")
+    parser.add_argument("--dedupe-threshold", type=int, default=5,
+                        help="近似重复的汉明距离阈值（0~16，默认5）")
+    parser.add_argument("--skip-duplicates", action="store_true",
+                        help="跳过近似重复的图片（保留先处理到的一张），隐含 --dedupe")
+    args = parser.parse_args()
+    if args.pack and args.incremental:
+        parser.error("--pack 每次都会重新写出完整的分片，不能与 --incremental 同时使用")
+    if not 0 <= args.dedupe_threshold <= 16:
+        # 更大的阈值下 64 位 dHash 几乎任意两张图都会判为重复，索引查询也会退化成全量比较
+        parser.error("--dedupe-threshold 必须在 0~16 之间")
+
+    # 打印绝对路径，调试用
+    # print("源文件夹绝对路径:", args.input)
+    # print("目标文件夹绝对路径:", args.output)
+
+    # 确保源文件夹存在（如果不存在则创建）
+    if not os.path.exists(args.input):
+        os.makedirs(args.input)
+        print(f"源文件夹 {args.input} 已创建，请将需要处理的文件放入该文件夹后重新运行脚本。")
+        return  # 退出脚本，等待用户将文件放入
+
+    递归 = not args.no_recursive
+    args.layout = args.layout or default_layout(递归)
+    if args.benchmark:
+        源文件 = 随机抽样((任务[1] for 任务 in 生成任务(args.input, args.output, 递归=递归)), args.benchmark)
+        基准测试(源文件)
+        return
+
+    # 确保目标文件夹存在
+    os.makedirs(args.output, exist_ok=True)
+    进程数 = args.workers or os.cpu_count() or 1
+    去重索引 = None
+    if args.dedupe or args.skip_duplicates:
+        from perceptual_dedupe import 感知哈希索引
+        去重索引 = 感知哈希索引(args.dedupe_threshold)
+
+    if args.pack:
+        打包(args, 进程数, 递归, 去重索引)
+        保存去重报告(去重索引, args)
+        print('WELL DONE!!❤')
+        return
+
+    扩展名 = 编码配置[args.profile]['扩展名']
+    已占用输出 = set()
+    任务流 = 过滤重名(生成任务(args.input, args.output, 扩展名, args.layout, 递归), 已占用输出)
+
+    清单 = None
+    完成回调 = None
+    重复回调 = None
+    if args.incremental:
+        # 布局决定输出路径，换布局后旧记录指向的输出已不对应
+        转换设置 = {**配置设置(args.profile), '布局': args.layout}
+        if 去重索引:
+            # 阈值或是否跳过变化时，上次的重复判断不再有效
+            转换设置['去重'] = {'阈值': args.dedupe_threshold, '跳过重复': args.skip_duplicates}
+        清单 = 转换清单(args.output, 转换设置, 使用哈希=args.hash)
+        当前源文件 = set()
+        统计 = {'全部': 0, '跳过': 0}
+
+        已载入哈希 = None
+        if 去重索引:
+            # 未变化的文件不会重新计算哈希：先按上次的顺序放回索引，新文件才能和它们比较，报告也保持完整
+            已载入哈希 = set()
+            for 来源, 哈希 in 去重索引.载入(args.output):
+                if 清单.未变化(来源, os.path.join(args.input, 来源)):
+                    去重索引.查找并添加(来源, 哈希)
+                    已载入哈希.add(来源)
+
+        def 需要处理(任务):
+            当前源文件.add(任务[0])
+            统计['全部'] += 1
+            # 去重时只跳过哈希已放回索引的文件，否则它既不参与比较也不会出现在报告里
+            if 清单.需要处理(*任务) or (已载入哈希 is not None and 任务[0] not in 已载入哈希):
+                return True
+            统计['跳过'] += 1
+            return False
+
+        任务流 = filter(需要处理, 任务流)
+        完成回调 = lambda 任务, _: 清单.记录(*任务)
+        重复回调 = lambda 任务, 重复于: 清单.记录(*任务, 重复于=重复于)
+
+    try:
+        出错列表 = 批量转换(任务流, 进程数, args.chunksize, args.profile, 完成回调,
+                         去重索引=去重索引, 跳过重复=args.skip_duplicates, 重复回调=重复回调)
+    finally:
+        if 清单:
+            # 出错或按 Ctrl+C 中断时也保存已完成的部分；删除输出要等遍历完整结束后才做
+            清单.保存()
+    打印出错汇总(出错列表)
+    保存去重报告(去重索引, args)
+
+    if 清单:
+        # 遍历结束后才知道哪些源文件已被删除；仍被其他源文件占用的输出不会删除
+        for 输出 in 清单.清理已删除(当前源文件, lambda 路径: output_key(路径) in 已占用输出):
+            print(f'源文件已删除，移除输出: {输出}')
+        清单.保存()
+        print(f'增量模式：共 {统计["全部"]} 个文件，跳过未变化的 {统计["跳过"]} 个')
+
+    print('WELL DONE!!❤')
+
 
-print('WELL DONE!!❤')
+if __name__ == "__main__":
+    main()
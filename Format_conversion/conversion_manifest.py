@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import time
+
+清单文件名 = '.conversion_manifest.json'
+# 转换过程中每隔多少秒把清单写回磁盘；按时间而不是文件数，几十万条记录时写清单的开销也有上限
+默认保存间隔 = 30
+
+
+def 文件哈希(路径, 块大小=1024 * 1024):
+    摘要 = hashlib.blake2b(digest_size=16)
+    with open(路径, 'rb') as f:
+        for 块 in iter(lambda: f.read(块大小), b''):
+            摘要.update(块)
+    return 摘要.hexdigest()
+
+
+class 转换清单:
+    """
+    增量转换清单，保存在目标文件夹中：
+    源文件相对路径 -> {大小, 修改时间, 哈希(可选), 输出}，以及生成这些输出时使用的转换设置。
+    作为近似重复被跳过的源文件没有输出，记录的是 重复于（保留的那个源文件）。
+    转换设置变化时清单整体作废，所有文件重新处理。
+    记录() 每隔 保存间隔 秒自动保存一次，运行中途被终止时已完成的文件下次不会重做。
+    """
+
+    def __init__(self, 目标文件夹, 转换设置, 使用哈希=False, 保存间隔=默认保存间隔):
+        self.目标文件夹 = 目标文件夹
+        self.路径 = os.path.join(目标文件夹, 清单文件名)
+        self.转换设置 = 转换设置
+        self.使用哈希 = 使用哈希
+        self.保存间隔 = 保存间隔
+        self._上次保存 = time.monotonic()
+        self.文件 = {}
+        if os.path.exists(self.路径):
+            try:
+                with open(self.路径, 'r', encoding='utf-8') as f:
+                    数据 = json.load(f)
+                if 数据.get('设置') == 转换设置:
+                    self.文件 = 数据.get('文件', {})
+                else:
+                    print('转换设置已变化，将重新处理全部文件。')
+            except (OSError, json.JSONDecodeError) as e:
+                print(f'转换清单 {self.路径} 无法读取，将重新处理全部文件: {e}')
+
+    def 需要处理(self, 相对路径, 源文件路径, 目标文件路径):
+        """源文件未变化且输出仍存在（或仍是一个保留图片的重复）时返回 False"""
+        记录 = self.文件.get(相对路径)
+        if not 记录:
+            return True
+        if 记录.get('重复于'):
+            if not self._保留的输出存在(记录['重复于']):
+                return True
+        elif not os.path.exists(目标文件路径) or 记录.get('输出') != os.path.relpath(目标文件路径, self.目标文件夹):
+            return True
+        return self._源文件已变化(记录, 源文件路径)
+
+    def 未变化(self, 相对路径, 源文件路径):
+        """不知道目标路径时的检查（例如载入上次的感知哈希）：有记录、结果仍在且源文件未变化"""
+        记录 = self.文件.get(相对路径)
+        if not 记录:
+            return False
+        if 记录.get('重复于'):
+            结果仍在 = self._保留的输出存在(记录['重复于'])
+        else:
+            结果仍在 = os.path.exists(os.path.join(self.目标文件夹, 记录['输出']))
+        try:
+            return 结果仍在 and not self._源文件已变化(记录, 源文件路径)
+        except OSError:
+            return False  # 源文件已删除
+
+    def _保留的输出存在(self, 保留的源文件):
+        # 保留的那张图片被删除或重新处理后，重复图片也需要重新判断
+        保留 = self.文件.get(保留的源文件)
+        return bool(保留 and 保留.get('输出') and os.path.exists(os.path.join(self.目标文件夹, 保留['输出'])))
+
+    def _源文件已变化(self, 记录, 源文件路径):
+        状态 = os.stat(源文件路径)
+        if 状态.st_size != 记录['大小']:
+            return True
+        if 状态.st_mtime_ns == 记录['修改时间']:
+            return False
+        # 修改时间变了但大小相同：开启哈希时用内容判断（例如文件只是被重新复制过）
+        if self.使用哈希 and 记录.get('哈希') and 文件哈希(源文件路径) == 记录['哈希']:
+            记录['修改时间'] = 状态.st_mtime_ns
+            return False
+        return True
+
+    def 记录(self, 相对路径, 源文件路径, 目标文件路径, 重复于=None):
+        """重复于 不为空时表示该文件作为近似重复被跳过，没有输出"""
+        状态 = os.stat(源文件路径)
+        self.文件[相对路径] = {
+            '大小': 状态.st_size,
+            '修改时间': 状态.st_mtime_ns,
+            '哈希': 文件哈希(源文件路径) if self.使用哈希 else None,
+            '输出': None if 重复于 else os.path.relpath(目标文件路径, self.目标文件夹),
+        }
+        if 重复于:
+            self.文件[相对路径]['重复于'] = 重复于
+        if time.monotonic() - self._上次保存 >= self.保存间隔:
+            self.保存()
+
+    def 清理已删除(self, 当前源文件, 输出仍被使用=None):
+        """
+        删除源文件已不存在的输出，返回被删除的输出列表。
+        输出仍被使用(路径) 为真时（例如已被另一个同名源文件重新生成）只移除记录，保留文件。
+        """
+        已删除 = []
+        for 相对路径 in [路径 for 路径 in self.文件 if 路径 not in 当前源文件]:
+            记录 = self.文件.pop(相对路径)
+            if not 记录.get('输出'):
+                continue  # 被跳过的重复图片没有输出
+            输出 = os.path.join(self.目标文件夹, 记录['输出'])
+            if 输出仍被使用 and 输出仍被使用(输出):
+                continue
+            if os.path.exists(输出):
+                os.remove(输出)
+                已删除.append(输出)
+        return 已删除
+
+    def 保存(self):
+        # 先写临时文件再原子替换，保存时被中断也不会留下半截清单
+        临时路径 = self.路径 + '.tmp'
+        with open(临时路径, 'w', encoding='utf-8') as f:
+            json.dump({'设置': self.转换设置, '文件': self.文件}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(临时路径, self.路径)
+        self._上次保存 = time.monotonic()
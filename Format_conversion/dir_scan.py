@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+
+# 输出目录布局：
+#   flat   - 全部输出放在同一个目录（原来的行为）
+#   mirror - 按输入目录的层级结构输出
+#   hash   - 按文件路径的哈希分到 ab/cd/ 两级子目录，单个目录的文件数保持在几千以内
+LAYOUTS = ('flat', 'mirror', 'hash')
+
+
+def default_layout(recursive):
+    """未指定布局时：递归处理子目录就保持目录结构，class_x/0001.jpg 这类数据集不会因重名被跳过"""
+    return 'mirror' if recursive else 'flat'
+
+
+def scan_files(root, extensions=None, recursive=True, follow_symlinks=False):
+    """
+    基于 os.scandir 的流式目录遍历，逐个生成相对 root 的文件路径。
+    extensions 为小写扩展名集合（如 {'.jpg', '.png'}），None 表示不过滤。
+    只保存待访问的目录栈，内存占用与文件总数无关；调用方可以边遍历边处理。
+    同一目录内按文件名排序，保证每次运行的顺序一致。
+    """
+    pending_dirs = ['']
+    while pending_dirs:
+        rel_dir = pending_dirs.pop()
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as entries:
+                files, subdirs = [], []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            subdirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=follow_symlinks):
+                            if extensions is None or os.path.splitext(entry.name)[1].lower() in extensions:
+                                files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"无法读取目录 {os.path.join(root, rel_dir)}: {e}")
+            continue
+
+        for name in sorted(files):
+            yield os.path.join(rel_dir, name) if rel_dir else name
+        if recursive:
+            # 倒序入栈，使子目录按名称顺序被访问
+            pending_dirs.extend(os.path.join(rel_dir, name) if rel_dir else name
+                                for name in sorted(subdirs, reverse=True))
+
+
+def output_relpath(rel_path, new_ext, layout='flat'):
+    """根据布局计算输出文件相对输出目录的路径，文件名为原文件名加新的扩展名"""
+    stem = os.path.splitext(rel_path)[0]
+    name = os.path.basename(stem) + new_ext
+    if layout == 'flat':
+        return name
+    if layout == 'mirror':
+        return stem + new_ext
+    if layout == 'hash':
+        # 按不含扩展名的路径计算哈希，同名不同格式的源文件仍落到同一位置，重名检测依然有效
+        digest = hashlib.md5(stem.replace(os.sep, '/').encode('utf-8')).hexdigest()
+        return os.path.join(digest[:2], digest[2:4], name)
+    raise ValueError(f"未知的输出布局: {layout}（可选 {', '.join(LAYOUTS)}）")
+
+
+def output_key(path):
+    # 按小写比较，兼容 Windows/macOS 不区分大小写的文件系统
+    return os.path.normcase(path).lower()
+
+
+def skip_collisions(items, output_of, taken, source_of=None, report=print):
+    """
+    多个源文件映射到同一个输出（如 a.jpg 与 a.png 都会生成 a.png，或 flat 布局下不同子目录的同名文件）时，
+    只保留先遍历到的一个（同一目录内按文件名排序），其余通过 report 报告冲突并跳过，避免互相覆盖。
+    output_of(item) 返回输出路径，source_of(item) 返回用于提示的源文件名（默认为 item 本身）；
+    taken 会记录所有被保留的输出键。
+    """
+    first_source = {}
+    for item in items:
+        source = source_of(item) if source_of else item
+        output = output_of(item)
+        key = output_key(output)
+        if key in taken:
+            first = first_source.get(key, '先前的文件')
+            report(f'输出冲突：{first} 与 {source} 都会生成 {os.path.basename(output)}，只处理 {first}')
+            continue
+        taken.add(key)
+        first_source[key] = source
+        yield item
+
+
+def bounded(iterable, limit):
+    """
+    限制 iterable 被提前读取的数量，返回 (迭代器, release)。
+    进程池会在后台线程中尽快读完输入，用它包装后，每处理完一个结果调用一次 release，
+    在途任务数始终不超过 limit。
+    """
+    slots = threading.BoundedSemaphore(limit)
+
+    def generate():
+        for item in iterable:
+            slots.acquire()
+            yield item
+
+    return generate(), slots.release
@@ -0,0 +1,82 @@
+import io
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+# 编码配置：名称 -> 输出格式、扩展名和 Pillow 保存参数
+# 默认的 'png' 与原来的 图片.save(路径, 'PNG') 完全一致
+编码配置 = {
+    'png':           {'格式': 'PNG',  '扩展名': '.png',  '参数': {}},
+    'png-fast':      {'格式': 'PNG',  '扩展名': '.png',  '参数': {'compress_level': 1}},
+    'png-small':     {'格式': 'PNG',  '扩展名': '.png',  '参数': {'compress_level': 9, 'optimize': True}},
+    'webp-lossless': {'格式': 'WEBP', '扩展名': '.webp', '参数': {'lossless': True, 'quality': 80, 'method': 4}},
+    'webp-q90':      {'格式': 'WEBP', '扩展名': '.webp', '参数': {'quality': 90, 'method': 4}},
+    'jpeg-q95':      {'格式': 'JPEG', '扩展名': '.jpg',  '参数': {'quality': 95, 'subsampling': 0}},
+    'jpeg-q85':      {'格式': 'JPEG', '扩展名': '.jpg',  '参数': {'quality': 85, 'optimize': True}},
+}
+默认编码配置 = 'png'
+
+
+def 配置设置(配置名):
+    """写入增量清单的转换设置，配置或参数变化时会触发全部重新处理"""
+    配置 = 编码配置[配置名]
+    return {'编码配置': 配置名, '格式': 配置['格式'], '参数': 配置['参数']}
+
+
+def 保存图片(图片, 目标, 配置名=默认编码配置):
+    """按编码配置保存，目标可以是路径或文件对象；必要时先转换色彩模式"""
+    配置 = 编码配置[配置名]
+    if 配置['格式'] == 'JPEG' and 图片.mode not in ('RGB', 'L'):
+        图片 = 图片.convert('RGB')
+    elif 配置['格式'] == 'WEBP' and 图片.mode not in ('RGB', 'RGBA'):
+        图片 = 图片.convert('RGBA' if 'A' in 图片.mode or 'transparency' in 图片.info else 'RGB')
+    图片.save(目标, 配置['格式'], **配置['参数'])
+
+
+def _峰值内存MB():
+    try:
+        import resource
+    except ImportError:  # Windows 没有 resource 模块
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024 / 1024
+        except (ImportError, AttributeError):
+            return None
+    峰值 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return 峰值 / 1024 / 1024 if sys.platform == 'darwin' else 峰值 / 1024
+
+
+def _测试单个配置(配置名, 文件列表):
+    """在独立子进程中运行，保证峰值内存只反映这一个配置"""
+    总字节数 = 0
+    成功数 = 0
+    开始 = time.perf_counter()
+    for 文件路径 in 文件列表:
+        try:
+            with Image.open(文件路径) as 图片:
+                缓冲 = io.BytesIO()
+                保存图片(图片, 缓冲, 配置名)
+        except Exception:
+            continue
+        总字节数 += 缓冲.tell()
+        成功数 += 1
+    耗时 = time.perf_counter() - 开始
+    return 成功数, 耗时, 总字节数, _峰值内存MB()
+
+
+def 基准测试(文件列表, 配置名列表=None):
+    """对样本文件逐个运行各编码配置（只解码和编码，不写磁盘），打印 图片/秒、字节/图片 和 峰值内存"""
+    配置名列表 = 配置名列表 or list(编码配置)
+    print(f'基准测试：{len(文件列表)} 个样本文件，{len(配置名列表)} 个编码配置\n')
+    print(f'{"配置":<15}{"图片/秒":>10}{"KB/图片":>12}{"峰值内存MB":>12}')
+    for 配置名 in 配置名列表:
+        with ProcessPoolExecutor(max_workers=1) as 子进程:
+            成功数, 耗时, 总字节数, 峰值 = 子进程.submit(_测试单个配置, 配置名, 文件列表).result()
+        if not 成功数:
+            print(f'{配置名:<15}{"全部失败":>10}')
+            continue
+        峰值文本 = f'{峰值:.1f}' if 峰值 is not None else 'N/A'
+        print(f'{配置名:<15}{成功数 / 耗时:>10.1f}{总字节数 / 成功数 / 1024:>12.1f}{峰值文本:>12}')
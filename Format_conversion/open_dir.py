@@ -1,64 +1,177 @@
+import argparse
 import os
+from functools import partial
+from multiprocessing import Pool
+
 from PIL import Image
 from tqdm import tqdm
 
-def resize_image(image_path, output_path, target_size):
+from dir_scan import LAYOUTS, bounded, default_layout, output_relpath, scan_files, skip_collisions
+from encoder_profiles import 保存图片, 编码配置
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp'}
+# Image.reduce 不支持 1、P 和 I;16 系列模式，这些图片跳过整数倍缩小，直接按原图缩放
+REDUCE_MODES = {'L', 'LA', 'La', 'PA', 'RGB', 'RGBA', 'RGBa', 'RGBX', 'CMYK', 'YCbCr', 'LAB', 'HSV', 'I', 'F'}
+
+
+def target_dimensions(width, height, target_size):
+    # 计算缩放比例：长边缩放到 target_size，保持宽高比
+    aspect_ratio = width / height
+    if width > height:
+        new_width = target_size
+        new_height = int(target_size / aspect_ratio)
+    else:
+        new_height = target_size
+        new_width = int(target_size * aspect_ratio)
+    return new_width, new_height
+
+
+def save_image(img, output_path, profile=None):
+    # 未指定编码配置时按扩展名推断格式，与原来的行为一致
+    if profile:
+        保存图片(img, output_path, profile)
+    else:
+        img.save(output_path)
+
+
+def resize_image(image_path, output_path, target_size, profile=None):
     with Image.open(image_path) as img:
         # 获取原始图像的宽度和高度
         width, height = img.size
-        
-        # 计算缩放比例
-        aspect_ratio = width / height
-        if width > height:
-            new_width = target_size
-            new_height = int(target_size / aspect_ratio)
-        else:
-            new_height = target_size
-            new_width = int(target_size * aspect_ratio)
-        
+
         # 调整图像大小
-        resized_img = img.resize((new_width, new_height), Image.LANCZOS)
-        
+        resized_img = img.resize(target_dimensions(width, height, target_size), Image.LANCZOS)
+
         # 保存调整后的图像
-        resized_img.save(output_path)
+        save_image(resized_img, output_path, profile)
+
+
+def resize_pyramid(image_path, output_paths, profile=None):
+    """
+    金字塔模式：每张图只解码一次，一次写出所有尺寸。
+    output_paths 为 {目标尺寸: 输出路径}。最大尺寸远小于原图时，JPEG 用 draft 直接按 1/2~1/8 解码，
+    其他格式用 reduce 先做整数倍缩小（保留至少2倍余量，LANCZOS 质量不受影响，reduce 不支持的模式除外）；
+    之后从大到小依次缩放，每个尺寸都由上一级结果生成。
+    """
+    with Image.open(image_path) as img:
+        # 输出尺寸始终按原图尺寸计算，与逐尺寸缩放的结果一致
+        width, height = img.size
+        sizes = sorted(output_paths, reverse=True)
+        largest_dims = target_dimensions(width, height, sizes[0])
+
+        if img.format == 'JPEG':
+            # draft 只会选择不小于请求尺寸的缩放比例
+            img.draft(img.mode, (largest_dims[0] * 2, largest_dims[1] * 2))
+        img.load()
+        factor = min(img.size[0] // (largest_dims[0] * 2), img.size[1] // (largest_dims[1] * 2))
+        current = img.reduce(factor) if factor >= 2 and img.mode in REDUCE_MODES else img
+
+        for target_size in sizes:
+            new_dims = target_dimensions(width, height, target_size)
+            resized_img = current.resize(new_dims, Image.LANCZOS)
+            save_image(resized_img, output_paths[target_size], profile)
+            # 只有缩小后的结果才作为下一级的输入，放大的结果不参与后续缩放
+            if new_dims[0] <= current.size[0] and new_dims[1] <= current.size[1]:
+                current = resized_img
 
-def process_images(input_dir, output_dir, target_sizes):
+
+def _output_name(image_file, profile, layout):
+    # 相对每个尺寸目录的输出路径，所有尺寸相同
+    ext = 编码配置[profile]['扩展名'] if profile else os.path.splitext(image_file)[1]
+    return output_relpath(image_file, ext, layout)
+
+
+def _process_one(image_file, input_dir, output_dir, target_sizes, pyramid, profile=None, layout='mirror'):
+    """处理单张图片的所有尺寸，返回 (文件名, 错误信息)；多进程模式下在子进程中执行"""
+    input_path = os.path.join(input_dir, image_file)
+    output_name = _output_name(image_file, profile, layout)
+    output_paths = {size: os.path.join(output_dir, f"{size}", output_name) for size in target_sizes}
+    try:
+        for output_path in output_paths.values():
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if pyramid:
+            resize_pyramid(input_path, output_paths, profile)
+        else:
+            for target_size, output_path in output_paths.items():
+                resize_image(input_path, output_path, target_size, profile)
+    except Exception as e:
+        return image_file, str(e)
+    return image_file, None
+
+
+def _track(results, progress):
+    for result in results:
+        progress.update(1)
+        yield result
+
+
+def process_images(input_dir, output_dir, target_sizes, pyramid=False, workers=1, profile=None,
+                   layout=None, recursive=True):
     # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # 获取所有图像文件
-    image_files = [f for f in os.listdir(input_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))]
-    
+    for target_size in target_sizes:
+        os.makedirs(os.path.join(output_dir, f"{target_size}"), exist_ok=True)
+
+    # 边遍历边处理所有图像文件（包括子目录）；输出重名的文件只处理先遍历到的一个
+    layout = layout or default_layout(recursive)
+    image_files = skip_collisions(scan_files(input_dir, IMAGE_EXTENSIONS, recursive=recursive),
+                                  lambda image_file: _output_name(image_file, profile, layout), set(),
+                                  report=tqdm.write)
+
+    task = partial(_process_one, input_dir=input_dir, output_dir=output_dir,
+                   target_sizes=target_sizes, pyramid=pyramid, profile=profile, layout=layout)
+    errors = []
     # 使用tqdm创建进度条
-    for image_file in tqdm(image_files, desc="处理图像"):
-        input_path = os.path.join(input_dir, image_file)
-        
-        for target_size in target_sizes:
-            output_subdir = os.path.join(output_dir, f"{target_size}")
-            os.makedirs(output_subdir, exist_ok=True)
-            
-            output_path = os.path.join(output_subdir, image_file)
-            resize_image(input_path, output_path, target_size)
-
-# 使用示例
-# 获取当前脚本的目录
-当前目录 = os.path.dirname(os.path.abspath(__file__))
-
-# 设置源文件夹和目标文件夹的绝对路径
-input_directory = os.path.join(当前目录, 'input')
-output_directory = os.path.join(当前目录, 'output')
-target_sizes = []
-while True:
-    size = input("请输入目标尺寸（输入完成后按回车，输入'完成'结束）: ")
-    if size.lower() == '完成':
-        break
-    try:
-        target_sizes.append(int(size))
-    except ValueError:
-        print("请输入有效的整数尺寸。")
-if not target_sizes:
-    print("未输入任何尺寸，将使用默认尺寸：512, 768, 1024")
-    target_sizes = [512, 768, 1024]
+    with tqdm(desc="处理图像", unit="张") as progress:
+        if workers > 1:
+            image_files, release = bounded(image_files, workers * 8 * 4)
+            with Pool(workers) as pool:
+                for name, error in _track(pool.imap_unordered(task, image_files, chunksize=8), progress):
+                    release()
+                    if error:
+                        errors.append((name, error))
+        else:
+            errors = [(name, error) for name, error in _track(map(task, image_files), progress) if error]
+    for name, error in errors:
+        print(f"处理 {name} 时出错: {error}")
+
+
+def ask_target_sizes():
+    target_sizes = []
+    while True:
+        size = input("请输入目标尺寸（输入完成后按回车，输入'完成'结束）: ")
+        if size.lower() == '完成':
+            break
+        try:
+            target_sizes.append(int(size))
+        except ValueError:
+            print("请输入有效的整数尺寸。")
+    if not target_sizes:
+        print("未输入任何尺寸，将使用默认尺寸：512, 768, 1024")
+        target_sizes = [512, 768, 1024]
+    return target_sizes
+
+
+if __name__ == "__main__":
+    # 使用示例
+    # 获取当前脚本的目录
+    当前目录 = os.path.dirname(os.path.abspath(__file__))
 
+    parser = argparse.ArgumentParser(description="批量将图片缩放为多个尺寸")
+    # 设置源文件夹和目标文件夹的绝对路径
+    parser.add_argument("--input", default=os.path.join(当前目录, 'input'), help="源文件夹")
+    parser.add_argument("--output", default=os.path.join(当前目录, 'output'), help="目标文件夹")
+    parser.add_argument("--sizes", type=int, nargs="+", help="目标尺寸（长边像素），不指定时交互输入")
+    parser.add_argument("--pyramid", action="store_true", help="金字塔模式：每张图只解码一次，依次生成各尺寸")
+    parser.add_argument("--workers", type=int, default=1, help="并行处理的进程数，0 表示使用全部CPU核")
+    parser.add_argument("--profile", choices=list(编码配置),
+                        help="编码配置（见 encoder_profiles.py），默认按原文件扩展名保存")
+    parser.add_argument("--layout", choices=LAYOUTS,
+                        help="每个尺寸目录内的布局：flat、mirror 保持输入目录结构（递归时的默认值）、hash 分片到 ab/cd/ 子目录；"
+                             "--no-recursive 时默认 flat")
+    parser.add_argument("--no-recursive", action="store_true", help="只处理源文件夹第一层，不进入子目录")
+    args = parser.parse_args()
 
-process_images(input_directory, output_directory, target_sizes)
+    target_sizes = args.sizes or ask_target_sizes()
+    process_images(args.input, args.output, target_sizes, pyramid=args.pyramid,
+                   workers=args.workers or os.cpu_count() or 1, profile=args.profile,
+                   layout=args.layout, recursive=not args.no_recursive)
@@ -0,0 +1,129 @@
+import os
+from itertools import combinations
+
+import numpy as np
+from PIL import Image
+
+默认阈值 = 5  # 64 位 dHash 的汉明距离不超过该值视为近似重复
+
+
+def 感知哈希(图片):
+    """
+    64 位 dHash：缩成 9×8 灰度图，比较每行相邻像素的明暗，返回 8 字节。
+    在转换的子进程中对已经解码的图片计算，不需要再次读取文件。
+    """
+    小图 = 图片.convert('L').resize((9, 8), Image.BILINEAR, reducing_gap=2.0)
+    像素 = 小图.tobytes()
+    值 = 0
+    for 行 in range(8):
+        for 列 in range(8):
+            值 = (值 << 1) | (像素[行 * 9 + 列] < 像素[行 * 9 + 列 + 1])
+    return 值.to_bytes(8, 'big')
+
+
+if hasattr(np, 'bitwise_count'):
+    def _位计数(数组):
+        return np.bitwise_count(数组)
+else:  # numpy 2.0 之前没有 bitwise_count
+    def _位计数(数组):
+        return np.unpackbits(数组.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class 感知哈希索引:
+    """
+    近似重复检索（多索引哈希）：把 64 位哈希切成 m 段（m = min(阈值+1, 4)），按抽屉原理，
+    距离不超过阈值的两个哈希至少有一段的距离不超过 阈值//m。每段一个 段值 -> 行号 的桶，
+    查询时只枚举该半径内的段值，新图片只和这些桶里的候选比较，不做两两循环；
+    候选较多时汉明距离用 numpy 向量化计算。
+    已判定为重复的图片不加入桶，大量相同图片不会让桶无限变大。
+    全部哈希保存在按位打包的 uint64 数组中（每张图 8 字节）。
+    """
+
+    def __init__(self, 阈值=默认阈值):
+        self.阈值 = 阈值
+        # 段越长桶越稀疏；4 段各 16 位时，百万张图片每个桶平均只有十几个候选
+        段数 = min(阈值 + 1, 4)
+        半径 = 阈值 // 段数
+        边界 = [64 * 序号 // 段数 for 序号 in range(段数 + 1)]
+        self._段 = []
+        for 开始, 结束 in zip(边界, 边界[1:]):
+            宽度 = 结束 - 开始
+            # 段内距离不超过 半径 的所有翻转掩码
+            翻转 = [sum(1 << 位 for 位 in 位组)
+                  for 距离 in range(半径 + 1) for 位组 in combinations(range(宽度), 距离)]
+            self._段.append((64 - 结束, (1 << 宽度) - 1, 翻转))
+        self._桶 = [{} for _ in self._段]
+        self._完全相同 = {}
+        self._值 = []
+        self.哈希 = np.zeros(1024, dtype=np.uint64)
+        self.来源 = []
+        self.重复 = []  # (来源, 重复于, 距离)
+
+    def 查找并添加(self, 来源, 哈希字节):
+        """记录一张图片的哈希，是近似重复时返回 (重复于的来源, 距离)，否则返回 None"""
+        值 = int.from_bytes(哈希字节, 'big')
+        行号 = len(self.来源)
+        if 行号 == len(self.哈希):
+            self.哈希 = np.concatenate([self.哈希, np.zeros_like(self.哈希)])
+        self.哈希[行号] = 值
+        self.来源.append(来源)
+        self._值.append(值)
+
+        结果 = None
+        if 值 in self._完全相同:
+            结果 = (self.来源[self._完全相同[值]], 0)
+        else:
+            段值 = [(值 >> 位移) & 掩码 for 位移, 掩码, _ in self._段]
+            候选 = set()
+            for 桶, 键, (_, _, 翻转) in zip(self._桶, 段值, self._段):
+                for 掩码 in 翻转:
+                    行列表 = 桶.get(键 ^ 掩码)
+                    if 行列表:
+                        候选.update(行列表)
+            if len(候选) > 64:
+                # 候选多时用 numpy 向量化计算汉明距离
+                候选 = np.fromiter(候选, dtype=np.int64, count=len(候选))
+                距离 = _位计数(self.哈希[候选] ^ np.uint64(值))
+                最近 = int(np.argmin(距离))
+                if 距离[最近] <= self.阈值:
+                    结果 = (self.来源[候选[最近]], int(距离[最近]))
+            elif 候选:
+                # 候选很少时逐个比较比调用 numpy 更快
+                距离, 最近 = min((bin(self._值[行] ^ 值).count('1'), 行) for 行 in 候选)
+                if 距离 <= self.阈值:
+                    结果 = (self.来源[最近], 距离)
+            if 结果 is None:
+                self._完全相同[值] = 行号
+                for 桶, 键 in zip(self._桶, 段值):
+                    桶.setdefault(键, []).append(行号)
+
+        if 结果:
+            self.重复.append((来源, *结果))
+        return 结果
+
+    @staticmethod
+    def 载入(目标文件夹):
+        """读回 保存() 写出的 phash.npy 与 phash_index.tsv，返回 [(来源, 哈希字节), ...]；没有或损坏时返回空列表"""
+        try:
+            打包 = np.load(os.path.join(目标文件夹, 'phash.npy'))
+            with open(os.path.join(目标文件夹, 'phash_index.tsv'), 'r', encoding='utf-8') as f:
+                来源 = [行.rstrip('\n').split('\t', 1)[1] for 行 in f.readlines()[1:]]
+        except (OSError, ValueError, IndexError):
+            return []
+        if 打包.ndim != 2 or 打包.shape != (len(来源), 8):
+            return []
+        return [(路径, 打包[行号].tobytes()) for 行号, 路径 in enumerate(来源)]
+
+    def 保存(self, 目标文件夹):
+        """写出 phash.npy（N×8 的 uint8，按位打包）、phash_index.tsv 和 duplicates.tsv"""
+        数量 = len(self.来源)
+        打包 = self.哈希[:数量].astype('>u8').view(np.uint8).reshape(数量, 8)
+        np.save(os.path.join(目标文件夹, 'phash.npy'), 打包)
+        with open(os.path.join(目标文件夹, 'phash_index.tsv'), 'w', encoding='utf-8') as f:
+            f.write('row\tsource\n')
+            for 行号, 来源 in enumerate(self.来源):
+                f.write(f'{行号}\t{来源}\n')
+        with open(os.path.join(目标文件夹, 'duplicates.tsv'), 'w', encoding='utf-8') as f:
+            f.write('source\tduplicate_of\tdistance\n')
+            for 来源, 重复于, 距离 in self.重复:
+                f.write(f'{来源}\t{重复于}\t{距离}\n')
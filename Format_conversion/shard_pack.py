@@ -0,0 +1,131 @@
+import io
+import json
+import os
+import struct
+import tarfile
+import time
+
+from PIL import Image, ImageOps
+
+from encoder_profiles import 保存图片
+
+打包格式 = ('tar', 'memmap')
+适配方式 = ('crop', 'pad')
+_NPY头长度 = 128  # .npy 头预留的字节数（64 的倍数），关闭时按最终行数原地改写
+
+
+def 编码为字节(任务, 配置名, 哈希函数=None):
+    """进程池任务：按编码配置把图片编码为字节，返回 (任务, 错误信息, 字节, 感知哈希)"""
+    哈希 = None
+    try:
+        with Image.open(任务[1]) as 图片:
+            缓冲 = io.BytesIO()
+            保存图片(图片, 缓冲, 配置名)
+            if 哈希函数:
+                哈希 = 哈希函数(图片)
+    except Exception as e:
+        return 任务, str(e), None, None
+    return 任务, None, 缓冲.getvalue(), 哈希
+
+
+def 缩放为数组(任务, 边长, 适配='crop', 哈希函数=None):
+    """
+    进程池任务：把图片缩放为 边长×边长 的 RGB，返回 (任务, 错误信息, 原始像素字节, 感知哈希)。
+    crop 先按短边缩放再居中裁剪；pad 按长边缩放，四周用黑色补齐。
+    """
+    哈希 = None
+    try:
+        with Image.open(任务[1]) as 图片:
+            图片.draft('RGB', (边长, 边长))
+            图片 = 图片.convert('RGB')
+            if 适配 == 'pad':
+                结果 = ImageOps.pad(图片, (边长, 边长), Image.LANCZOS)
+            else:
+                结果 = ImageOps.fit(图片, (边长, 边长), Image.LANCZOS)
+            if 哈希函数:
+                哈希 = 哈希函数(图片)
+    except Exception as e:
+        return 任务, str(e), None, None
+    return 任务, None, 结果.tobytes(), 哈希
+
+
+class Tar分片写入器:
+    """
+    WebDataset 风格的 tar 分片：shard-000000.tar、shard-000001.tar ……
+    每个样本为 <序号>.<扩展名> 加一个记录原文件路径的 <序号>.json；另写 index.tsv 汇总。
+    每个分片写满后立即关闭，内存中只有当前样本。
+    """
+
+    def __init__(self, 目标文件夹, 扩展名, 每片数量=10000):
+        self.目标文件夹 = 目标文件夹
+        self.扩展名 = 扩展名.lstrip('.')
+        self.每片数量 = 每片数量
+        self.数量 = 0
+        self._分片 = None
+        self._分片名 = None
+        self._索引 = open(os.path.join(目标文件夹, 'index.tsv'), 'w', encoding='utf-8')
+        self._索引.write('key\tshard\tsource\n')
+
+    def _添加(self, 名称, 数据):
+        信息 = tarfile.TarInfo(名称)
+        信息.size = len(数据)
+        信息.mtime = int(time.time())
+        self._分片.addfile(信息, io.BytesIO(数据))
+
+    def 写入(self, 相对路径, 数据):
+        if self.数量 % self.每片数量 == 0:
+            self._关闭分片()
+            self._分片名 = f'shard-{self.数量 // self.每片数量:06d}.tar'
+            self._分片 = tarfile.open(os.path.join(self.目标文件夹, self._分片名 + '.part'), 'w')
+        键 = f'{self.数量:09d}'
+        self._添加(f'{键}.{self.扩展名}', 数据)
+        self._添加(f'{键}.json', json.dumps({'source': 相对路径}, ensure_ascii=False).encode('utf-8'))
+        self._索引.write(f'{键}\t{self._分片名}\t{相对路径}\n')
+        self.数量 += 1
+
+    def _关闭分片(self):
+        if self._分片:
+            self._分片.close()
+            路径 = os.path.join(self.目标文件夹, self._分片名)
+            os.replace(路径 + '.part', 路径)
+            self._分片 = None
+
+    def 关闭(self):
+        self._关闭分片()
+        self._索引.close()
+
+
+class 内存映射写入器:
+    """
+    固定尺寸的 uint8 数组 images.npy，形状为 (行数, 边长, 边长, 3)，逐行追加写入。
+    行数事先未知，先写入预留长度的 .npy 头，关闭时改写为最终形状；
+    训练时用 numpy.load(路径, mmap_mode='r') 打开即可零拷贝切片。index.tsv 记录 行号 -> 原文件。
+    """
+
+    def __init__(self, 目标文件夹, 边长, 名称='images'):
+        self.路径 = os.path.join(目标文件夹, f'{名称}.npy')
+        self.边长 = 边长
+        self.数量 = 0
+        self._文件 = open(self.路径 + '.part', 'wb')
+        self._文件.write(self._头(0))
+        self._索引 = open(os.path.join(目标文件夹, 'index.tsv'), 'w', encoding='utf-8')
+        self._索引.write('row\tsource\n')
+
+    def _头(self, 行数):
+        描述 = "{'descr': '|u1', 'fortran_order': False, 'shape': (%d, %d, %d, 3), }" % (
+            行数, self.边长, self.边长)
+        描述 = 描述.ljust(_NPY头长度 - 10 - 1) + '\n'
+        return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(描述)) + 描述.encode('latin1')
+
+    def 写入(self, 相对路径, 数据):
+        self._文件.write(数据)
+        self._索引.write(f'{self.数量}\t{相对路径}\n')
+        self.数量 += 1
+
+    def 关闭(self):
+        self._文件.seek(0)
+        self._文件.write(self._头(self.数量))
+        self._文件.close()
+        os.replace(self.路径 + '.part', self.路径)
+        self._索引.close()
+
@@ -1,19 +1,28 @@
+import argparse
+import io
 import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import openpyxl
 from openpyxl.drawing.image import Image
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import column_index_from_string, get_column_letter
+from PIL import Image as PILImage
+
+# 目录遍历与 Format_conversion 共用同一个模块
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Format_conversion'))
+from dir_scan import scan_files
 
-# 获取图片文件夹路径
-图片文件夹路径 = input("请输入图片文件夹路径：")
+支持的格式 = {'.png', '.jpg', '.jpeg', '.gif'}
 
-# 获取Excel文件路径
-excel文件路径 = input("请输入Excel文件路径：")
+# 图片缩放比例
+缩放比例 = 0.4  # 例如，缩放至原始大小的50%
 
-# 加载Excel工作簿
-工作簿 = openpyxl.load_workbook(excel文件路径)
+# 缩略图像素 = 显示尺寸 × 清晰度倍数；1 即按显示尺寸嵌入，高分屏可以设为 2
+清晰度倍数 = 1.0
+JPEG质量 = 85
 
-# 选择活动工作表
-工作表 = 工作簿.active
 
 # 定义每个Excel单元格的默认像素尺寸（1个单元格宽度大约为7个像素，行高度单位为像素）
 def 设置列宽(工作表, 列, 像素宽度):
@@ -23,33 +32,348 @@ def 设置列宽(工作表, 列, 像素宽度):
 def 设置行高(工作表, 行, 像素高度):
     工作表.row_dimensions[行].height = 像素高度  # 行高直接以像素为单位设置
 
-# 图片缩放比例
-缩放比例 = 0.4  # 例如，缩放至原始大小的50%
 
-# 遍历图片文件夹中的图片
-for 行号, 图片文件名 in enumerate(os.listdir(图片文件夹路径), start=1):
-    if 图片文件名.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-        图片路径 = os.path.join(图片文件夹路径, 图片文件名)
-        
-        # 创建图片对象
-        图片 = Image(图片路径)
-        
-        # 获取图片原始尺寸
-        图片宽度, 图片高度 = 图片.width, 图片.height
-        
-        # 调整图片尺寸（根据缩放比例）
-        图片.width = 图片宽度 * 缩放比例
-        图片.height = 图片高度 * 缩放比例
-        
-        # 调整列宽和行高匹配图片尺寸
-        列号 = 'G'  # 假设图片始终插入列 F
-        设置列宽(工作表, 列号, 图片.width)
-        设置行高(工作表, 行号, 图片.height)
-        
-        # 将图片插入到对应的单元格
-        工作表.add_image(图片, f'G{行号}')
-
-# 保存Excel文件
-工作簿.save(excel文件路径)
-
-print("图片已成功插入并调整单元格大小到Excel文件中。")
+def 生成缩略图(图片路径, 缩放比例=缩放比例, 倍数=清晰度倍数):
+    """
+    按显示尺寸（原图 × 缩放比例）× 倍数 生成缩略图并在内存中重新编码，
+    返回 (编码后的字节, 显示宽度, 显示高度)。有透明通道的用 PNG，其余用 JPEG。
+    在进程池中执行，嵌入 Excel 的是缩略图而不是原图。
+    """
+    with PILImage.open(图片路径) as 原图:
+        显示宽度 = 原图.width * 缩放比例
+        显示高度 = 原图.height * 缩放比例
+        目标尺寸 = (max(1, round(显示宽度 * 倍数)), max(1, round(显示高度 * 倍数)))
+        # JPEG 可以直接按缩小的比例解码
+        原图.draft('RGB', 目标尺寸)
+        透明 = 原图.mode in ('RGBA', 'LA', 'PA') or 'transparency' in 原图.info
+        缩略图 = 原图.convert('RGBA' if 透明 else 'RGB')
+        if 缩略图.width > 目标尺寸[0] or 缩略图.height > 目标尺寸[1]:
+            缩略图 = 缩略图.resize(目标尺寸, PILImage.LANCZOS)
+        缓冲 = io.BytesIO()
+        if 透明:
+            缩略图.save(缓冲, 'PNG', optimize=True)
+        else:
+            缩略图.save(缓冲, 'JPEG', quality=JPEG质量, optimize=True)
+    return 缓冲.getvalue(), 显示宽度, 显示高度
+
+
+def _生成缩略图或错误(图片路径, 缩放比例=缩放比例, 倍数=清晰度倍数):
+    # 在子进程中捕获异常，一张坏图不会中断整批，返回 (缩略图, 错误信息)
+    try:
+        return 生成缩略图(图片路径, 缩放比例, 倍数), None
+    except Exception as e:
+        return None, str(e)
+
+
+def 插入图片(工作表, 行号, 缩略图数据, 显示宽度, 显示高度, 列号='G'):
+    # 创建图片对象（openpyxl 保存时写入的就是这份缩略图数据）
+    图片 = Image(io.BytesIO(缩略图数据))
+
+    # 图片按显示尺寸展示
+    图片.width = 显示宽度
+    图片.height = 显示高度
+
+    # 调整列宽和行高匹配图片尺寸
+    设置列宽(工作表, 列号, 图片.width)
+    设置行高(工作表, 行号, 图片.height)
+
+    # 将图片插入到对应的单元格
+    工作表.add_image(图片, f'{列号}{行号}')
+
+
+def 插入文件夹图片(图片文件夹路径, excel文件路径, 进程数=None, 倍数=清晰度倍数):
+    # 加载Excel工作簿
+    工作簿 = openpyxl.load_workbook(excel文件路径)
+
+    # 选择活动工作表
+    工作表 = 工作簿.active
+
+    # 边遍历边插入图片文件夹（包括子目录）中的图片，每张图片占一行；无法读取的图片留空该行
+    for 行号, (图片路径, 缩略图, 错误) in enumerate(批量生成缩略图(图片文件夹路径, 进程数, 倍数), start=1):
+        if 错误:
+            print(f"处理 {图片路径} 时出错: {错误}")
+        else:
+            插入图片(工作表, 行号, *缩略图)
+
+    # 保存Excel文件
+    工作簿.save(excel文件路径)
+
+
+class 流式写入器:
+    """
+    用 xlsxwriter 的 constant_memory 模式逐行写出一个工作簿，单元格必须按行顺序写入。
+    缩略图写入临时文件夹，工作簿只记录文件路径，关闭时再逐个打包，
+    内存中只保留当前行，峰值内存与图片数量无关。
+    """
+
+    def __init__(self, 输出路径, 工作表名, 列号='G'):
+        import tempfile
+
+        import xlsxwriter
+
+        self.输出路径 = 输出路径
+        self._临时文件夹 = tempfile.TemporaryDirectory(prefix='图像插入excel_')
+        self._工作簿 = xlsxwriter.Workbook(输出路径, {'constant_memory': True, 'tmpdir': self._临时文件夹.name})
+        self._工作表 = self._工作簿.add_worksheet(工作表名)
+        self._列序号 = column_index_from_string(列号) - 1
+        self._最大宽度 = 0
+        self.图片数 = 0
+        self.图片字节数 = 0
+
+    def 写行(self, 行号, 值列表):
+        for 列, 值 in enumerate(值列表):
+            if 值 is not None:
+                self._工作表.write(行号 - 1, 列, 值)
+
+    def 插入图片(self, 行号, 缩略图数据, 显示宽度, 显示高度):
+        扩展名 = '.png' if 缩略图数据[:4] == b'\x89PNG' else '.jpg'
+        缩略图路径 = os.path.join(self._临时文件夹.name, f'{self.图片数}{扩展名}')
+        with open(缩略图路径, 'wb') as f:
+            f.write(缩略图数据)
+        with PILImage.open(缩略图路径) as 缩略图:
+            像素宽度, 像素高度 = 缩略图.size
+
+        # 调整行高匹配图片尺寸（xlsxwriter 行高以磅为单位，1 像素 = 0.75 磅）
+        self._工作表.set_row(行号 - 1, 显示高度 * 0.75)
+        self._最大宽度 = max(self._最大宽度, 显示宽度)
+        self._工作表.insert_image(行号 - 1, self._列序号, 缩略图路径, {
+            'x_scale': 显示宽度 / 像素宽度,
+            'y_scale': 显示高度 / 像素高度,
+        })
+        self.图片数 += 1
+        self.图片字节数 += len(缩略图数据)
+
+    def 关闭(self):
+        if self._最大宽度:
+            self._工作表.set_column_pixels(self._列序号, self._列序号, self._最大宽度)
+        self._工作簿.close()
+        self._临时文件夹.cleanup()
+
+
+def 流式插入文件夹图片(图片文件夹路径, excel文件路径, 输出路径, 进程数=None, 倍数=清晰度倍数, 列号='G'):
+    """
+    流式模式（适合几万张图片）：逐行写出新工作簿，
+    原工作表的数据用 openpyxl 只读模式逐行复制（只复制值，不复制样式）。
+    """
+    源工作簿 = openpyxl.load_workbook(excel文件路径, read_only=True)
+    源工作表 = 源工作簿.active
+    源行 = 源工作表.iter_rows(values_only=True)
+    写入器 = 流式写入器(输出路径, 源工作表.title, 列号)
+
+    行号 = 0
+    try:
+        for 行号, (图片路径, 缩略图, 错误) in enumerate(批量生成缩略图(图片文件夹路径, 进程数, 倍数), start=1):
+            写入器.写行(行号, next(源行, ()))
+            if 错误:
+                print(f"处理 {图片路径} 时出错: {错误}")
+            else:
+                写入器.插入图片(行号, *缩略图)
+
+        # 图片比原表数据少时，复制剩余的行
+        for 行号, 值列表 in enumerate(源行, start=行号 + 1):
+            写入器.写行(行号, 值列表)
+    finally:
+        源工作簿.close()
+        写入器.关闭()
+
+
+def 批量生成缩略图(图片文件夹路径, 进程数=None, 倍数=清晰度倍数):
+    """按遍历顺序逐个返回文件夹（包括子目录）中图片的 (图片路径, 缩略图, 错误信息)，见 缩略图流"""
+    图片路径流 = (os.path.join(图片文件夹路径, 文件名) for 文件名 in scan_files(图片文件夹路径, 支持的格式))
+    return 缩略图流(图片路径流, 进程数, 倍数)
+
+
+def 缩略图流(图片路径流, 进程数=None, 倍数=清晰度倍数):
+    """
+    在进程池中生成缩略图，按输入顺序逐个返回 (图片路径, 缩略图, 错误信息)：
+    成功时缩略图为 (缩略图数据, 显示宽度, 显示高度)、错误信息为 None，无法读取的图片缩略图为 None。
+    在途任务数限制为进程数的 4 倍，不会一次把全部图片提交给进程池。
+    """
+    进程数 = 进程数 or os.cpu_count() or 1
+    在途 = deque()
+    with ProcessPoolExecutor(max_workers=进程数) as 进程池:
+        for 图片路径 in 图片路径流:
+            在途.append((图片路径, 进程池.submit(_生成缩略图或错误, 图片路径, 缩放比例, 倍数)))
+            if len(在途) >= 进程数 * 4:
+                图片路径, 任务 = 在途.popleft()
+                yield (图片路径, *任务.result())
+        while 在途:
+            图片路径, 任务 = 在途.popleft()
+            yield (图片路径, *任务.result())
+
+
+class 匹配报告(list):
+    """
+    按键匹配的报告，元素为 (类型, 键, 说明)。指定路径时每条记录立即追加到 TSV 文件，
+    运行被中断也能看到已经发现的问题。
+    """
+
+    def __init__(self, 路径=None):
+        super().__init__()
+        self._文件 = open(路径, 'w', encoding='utf-8') if 路径 else None
+        self._写出('类型', '键', '说明')
+
+    def _写出(self, *字段):
+        if self._文件:
+            self._文件.write('\t'.join(map(str, 字段)) + '\n')
+            self._文件.flush()
+
+    def append(self, 条目):
+        super().append(条目)
+        self._写出(*条目)
+
+    def 关闭(self):
+        if self._文件:
+            self._文件.close()
+            self._文件 = None
+
+
+def 规范化键(值):
+    """表格中的键和图片文件名统一比较：去掉首尾空白、不区分大小写，12345.0 视为 12345"""
+    if 值 is None:
+        return ''
+    if isinstance(值, float) and 值.is_integer():
+        值 = int(值)
+    return str(值).strip().casefold()
+
+
+def 键列序号(表头, 键列):
+    """键列可以是列字母（如 A）或表头文字（如 SKU）"""
+    for 序号, 标题 in enumerate(表头):
+        if 标题 is not None and str(标题).strip() == 键列:
+            return 序号
+    if 键列.isalpha() and len(键列) <= 3:
+        return column_index_from_string(键列.upper()) - 1
+    raise ValueError(f"找不到键列 {键列}，表头为：{[标题 for 标题 in 表头 if 标题 is not None]}")
+
+
+def 按键插入图片(图片文件夹路径, excel文件路径, 输出路径, 键列, 进程数=None, 倍数=清晰度倍数,
+             列号='G', 每个文件字节上限=None, 报告路径=None):
+    """
+    按键匹配模式：用键列建立 键 -> 行 的哈希索引，图片按文件名（不含扩展名）找到所在的行，
+    与文件遍历顺序无关。第 1 行为表头，每个输出文件都会带上。
+    指定 每个文件字节上限 时，嵌入的缩略图累计超过上限就换下一个文件
+    （输出路径_001.xlsx、输出路径_002.xlsx ……），避免单个文件过大 Excel 打不开。
+    没有图片的行、找不到行的图片、无法读取的图片和重复的键写入报告，返回 (输出文件列表, 报告)。
+    报告逐条写入 报告路径；中途出错时已打开的工作簿也会关闭。
+    """
+    源工作簿 = openpyxl.load_workbook(excel文件路径, read_only=True)
+    源工作表 = 源工作簿.active
+    工作表名 = 源工作表.title
+    源行 = 源工作表.iter_rows(values_only=True)
+    表头 = next(源行, ())
+    键序号 = 键列序号(表头, 键列)
+
+    # 一次读取只保存值，几万行的内存占用很小；写出时需要按行顺序，所以先建好索引
+    行列表 = []
+    键到行 = {}
+    报告 = 匹配报告(报告路径)
+    for 行号, 值列表 in enumerate(源行, start=2):
+        行列表.append(值列表)
+        键 = 规范化键(值列表[键序号] if 键序号 < len(值列表) else None)
+        if not 键:
+            continue
+        if 键 in 键到行:
+            报告.append(('重复的键', 键, f'第 {行号} 行与第 {键到行[键]} 行重复，只使用第 {键到行[键]} 行'))
+        else:
+            键到行[键] = 行号
+    源工作簿.close()
+
+    行到图片 = {}
+    for 文件名 in scan_files(图片文件夹路径, 支持的格式):
+        键 = 规范化键(os.path.splitext(os.path.basename(文件名))[0])
+        行号 = 键到行.get(键)
+        if 行号 is None:
+            报告.append(('图片没有对应的行', 键, 文件名))
+        elif 行号 in 行到图片:
+            报告.append(('重复的图片', 键, f'{文件名} 与 {行到图片[行号]} 对应同一行，只使用后者'))
+        else:
+            行到图片[行号] = 文件名
+    for 键, 行号 in 键到行.items():
+        if 行号 not in 行到图片:
+            报告.append(('行没有图片', 键, f'第 {行号} 行'))
+
+    主名, 扩展名 = os.path.splitext(输出路径)
+    输出文件 = []
+    写入器 = None
+    输出行号 = 0
+
+    def 新文件():
+        nonlocal 写入器, 输出行号
+        if 写入器:
+            写入器.关闭()
+            写入器 = None
+        路径 = f'{主名}_{len(输出文件) + 1:03d}{扩展名}' if 每个文件字节上限 else 输出路径
+        写入器 = 流式写入器(路径, 工作表名, 列号)
+        输出文件.append(路径)
+        写入器.写行(1, 表头)
+        输出行号 = 1
+
+    缩略图 = 缩略图流((os.path.join(图片文件夹路径, 行到图片[行号])
+                      for 行号 in sorted(行到图片)), 进程数, 倍数)
+    try:
+        新文件()
+        for 行号, 值列表 in enumerate(行列表, start=2):
+            数据 = None
+            if 行号 in 行到图片:
+                _, 数据, 错误 = next(缩略图)
+                if 错误:
+                    报告.append(('图片无法读取', 规范化键(值列表[键序号]), f'{行到图片[行号]}：{错误}'))
+            if (数据 and 每个文件字节上限 and 写入器.图片数
+                    and 写入器.图片字节数 + len(数据[0]) > 每个文件字节上限):
+                新文件()
+            输出行号 += 1
+            写入器.写行(输出行号, 值列表)
+            if 数据:
+                写入器.插入图片(输出行号, *数据)
+    finally:
+        缩略图.close()
+        if 写入器:
+            写入器.关闭()
+        报告.关闭()
+    return 输出文件, 报告
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量将图片插入到Excel表格中")
+    parser.add_argument("--images", help="图片文件夹路径，不指定时交互输入")
+    parser.add_argument("--excel", help="Excel文件路径，不指定时交互输入")
+    parser.add_argument("--dpi-scale", type=float, default=清晰度倍数,
+                        help="缩略图清晰度倍数：1 按显示尺寸嵌入（默认），2 适合高分屏查看")
+    parser.add_argument("--workers", type=int, help="生成缩略图的进程数，默认CPU核数")
+    parser.add_argument("--streaming", action="store_true",
+                        help="流式写入新工作簿（需要 xlsxwriter），适合上万张图片，内存占用不随图片数量增长")
+    parser.add_argument("--output", help="流式模式和按键匹配模式的输出文件，默认在原文件名后加 _图片")
+    parser.add_argument("--key-column",
+                        help="按键匹配模式：键列的列字母或表头文字（如 SKU），图片按文件名（不含扩展名）放到对应的行")
+    parser.add_argument("--max-mb", type=float,
+                        help="按键匹配模式：每个输出文件嵌入图片的总大小上限（MB），超过后拆分为多个文件")
+    args = parser.parse_args()
+
+    # 获取图片文件夹路径
+    图片文件夹路径 = args.images or input("请输入图片文件夹路径：")
+
+    # 获取Excel文件路径
+    excel文件路径 = args.excel or input("请输入Excel文件路径：")
+
+    主名, 扩展名 = os.path.splitext(excel文件路径)
+    输出路径 = args.output or f'{主名}_图片{扩展名}'
+    if args.key_column:
+        报告路径 = os.path.splitext(输出路径)[0] + '_匹配报告.tsv'
+        输出文件, 报告 = 按键插入图片(
+            图片文件夹路径, excel文件路径, 输出路径, args.key_column, args.workers, args.dpi_scale,
+            每个文件字节上限=int(args.max_mb * 1024 * 1024) if args.max_mb else None, 报告路径=报告路径)
+        for 路径 in 输出文件:
+            print(f"已写入 {路径}")
+        if 报告:
+            统计 = {}
+            for 类型, _, _ in 报告:
+                统计[类型] = 统计.get(类型, 0) + 1
+            print('，'.join(f'{类型} {数量} 个' for 类型, 数量 in 统计.items()) + f'，详见 {报告路径}')
+    elif args.streaming:
+        流式插入文件夹图片(图片文件夹路径, excel文件路径, 输出路径, args.workers, args.dpi_scale)
+        print(f"已写入 {输出路径}")
+    else:
+        插入文件夹图片(图片文件夹路径, excel文件路径, args.workers, args.dpi_scale)
+
+    print("图片已成功插入并调整单元格大小到Excel文件中。")
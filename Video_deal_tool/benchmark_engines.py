@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compares the two first-frame engines of deal_tool.py on a generated corpus.
+
+The corpus is made with ffmpeg's lavfi test sources (testsrc2, mandelbrot,
+smptehdbars) at a few resolutions, so no sample videos are needed:
+
+    python benchmark_engines.py --count 60 --jobs 4
+
+Both engines use the same pool size; only the frame extraction step is timed
+(videos are not moved).
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from deal_tool import build_ffmpeg_command, check_ffmpeg, default_jobs, default_threads_per_job
+
+SOURCES = ('testsrc2', 'mandelbrot', 'smptehdbars')
+
+def make_corpus(corpus_dir, count, duration, sizes):
+    """Writes `count` short H.264 clips, cycling through the test sources and sizes."""
+    paths = []
+    for index in range(count):
+        source = SOURCES[index % len(SOURCES)]
+        size = sizes[index % len(sizes)]
+        path = os.path.join(corpus_dir, f"{index:04d}_{source}_{size}.mp4")
+        subprocess.run([
+            'ffmpeg', '-nostdin', '-v', 'error',
+            '-f', 'lavfi', '-i', f"{source}=size={size}:rate=25",
+            '-t', str(duration),
+            '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+            '-y', path,
+        ], check=True)
+        paths.append(path)
+    return paths
+
+def _ffmpeg_extract(video_path, webp_path, threads):
+    subprocess.run(build_ffmpeg_command(video_path, webp_path, threads), check=True, capture_output=True)
+
+def _pyav_extract(video_path, webp_path, threads):
+    from pyav_engine import extract_first_frame
+    extract_first_frame(video_path, webp_path, threads)
+
+def run_engine(engine, videos, out_dir, jobs, threads):
+    """Extracts the first frame of every video; returns (seconds, total WebP bytes)."""
+    os.makedirs(out_dir, exist_ok=True)
+    extract, executor_class = {
+        'ffmpeg': (_ffmpeg_extract, ThreadPoolExecutor),
+        'pyav': (_pyav_extract, ProcessPoolExecutor),
+    }[engine]
+    outputs = [os.path.join(out_dir, os.path.splitext(os.path.basename(v))[0] + '.webp') for v in videos]
+    start = time.perf_counter()
+    with executor_class(max_workers=jobs) as executor:
+        # list() re-raises the first failure
+        list(executor.map(extract, videos, outputs, [threads] * len(videos)))
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(os.path.getsize(path) for path in outputs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ffmpeg and PyAV first-frame engines.")
+    parser.add_argument("--count", type=int, default=60, help="Number of clips to generate (default: 60)")
+    parser.add_argument("--duration", type=float, default=2, help="Clip length in seconds (default: 2)")
+    parser.add_argument("--sizes", default="640x360,1280x720,1920x1080",
+                        help="Comma-separated clip resolutions (default: 640x360,1280x720,1920x1080)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Parallel jobs for both engines (default: CPU cores)")
+    parser.add_argument("--threads", type=int, default=None, help="Threads per job (default: CPU cores / jobs)")
+    parser.add_argument("--keep", action="store_true", help="Keep the corpus and outputs for inspection")
+    args = parser.parse_args()
+
+    if not check_ffmpeg():
+        raise SystemExit(1)
+    jobs = args.jobs or default_jobs()
+    threads = args.threads or default_threads_per_job(jobs)
+
+    work_dir = tempfile.mkdtemp(prefix="deal_tool_bench_")
+    try:
+        print(f"🎬 Generating {args.count} clip(s) in {work_dir} ...")
+        videos = make_corpus(work_dir, args.count, args.duration, args.sizes.split(','))
+        print(f"⚙️ {jobs} parallel job(s), {threads} thread(s) per job")
+
+        results = {}
+        for engine in ('ffmpeg', 'pyav'):
+            try:
+                results[engine] = run_engine(engine, videos, os.path.join(work_dir, engine), jobs, threads)
+            except ImportError as e:
+                print(f"⚠️ Skipping {engine}: {e}")
+                continue
+            elapsed, total_bytes = results[engine]
+            print(f"  {engine:>6}: {elapsed:7.2f} s  {len(videos) / elapsed:7.1f} video/s  "
+                  f"{total_bytes / len(videos) / 1024:6.1f} KiB per WebP")
+
+        if len(results) == 2:
+            print(f"🏁 PyAV speed-up: {results['ffmpeg'][0] / results['pyav'][0]:.2f}x")
+    finally:
+        if args.keep:
+            print(f"📂 Kept {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
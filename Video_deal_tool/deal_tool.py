@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import importlib.util
 import os
 import subprocess
 import sys
 import shutil # Using shutil.move is slightly more robust than os.rename across filesystems
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 def check_ffmpeg():
     """Checks if ffmpeg is installed and accessible in the system PATH."""
@@ -24,12 +27,165 @@ def check_ffmpeg():
         print("   Proceeding, but errors may occur during video processing.")
         return True # Allow proceeding, but warn the user
 
-def process_videos_in_directory(target_dir="."):
+def default_jobs():
+    """Number of ffmpeg jobs to run at once: one per CPU core."""
+    return os.cpu_count() or 1
+
+def default_threads_per_job(jobs):
+    """Split the cores between the running jobs so they don't oversubscribe the CPU."""
+    return max(1, (os.cpu_count() or 1) // max(1, jobs))
+
+ENGINES = ('auto', 'pyav', 'ffmpeg')
+
+def resolve_engine(engine):
+    """'auto' uses the in-process PyAV engine when PyAV is installed, otherwise the ffmpeg subprocess."""
+    if engine == 'auto':
+        return 'pyav' if importlib.util.find_spec('av') else 'ffmpeg'
+    return engine
+
+def build_ffmpeg_command(item_path, webp_path, threads=1):
+    """Builds the ffmpeg command that writes the first frame of item_path to webp_path."""
+    # FFmpeg command:
+    # -nostdin : never read from the console (several ffmpeg processes run at once)
+    # -threads : per-job thread cap for decoding (before -i) and encoding (after -i)
+    # -i : input file
+    # -vf "select=eq(n\,0)" : video filter to select the first frame (index 0)
+    #                      (backslash before comma might be needed depending on shell/OS)
+    # -frames:v 1 : extract only one frame
+    # -c:v libwebp : specify the WebP codec
+    # -lossless 0 : use lossy compression (0=lossy, 1=lossless) - adjust if needed
+    # -q:v 80 : quality for lossy WebP (0-100, higher is better/larger). Adjust!
+    # -an : disable audio processing/output
+    # -y : overwrite output file without asking
+    ffmpeg_command = [
+        'ffmpeg',
+        '-nostdin',
+        '-threads', str(threads),
+        '-i', item_path,
+        '-threads', str(threads),
+        '-vf', r'select=eq(n\,0)', # Raw string helps with backslash
+        '-frames:v', '1',
+        '-c:v', 'libwebp',
+        '-lossless', '0', # Set to 1 for lossless
+        '-q:v', '80',     # Quality (0-100) for lossy. Ignored if lossless=1
+        '-an',
+        '-y',
+        webp_path
+    ]
+    return ffmpeg_command
+
+def process_one_video(abs_target_dir, item_name, threads=1, engine='ffmpeg', frame_options=None):
+    """
+    Extracts the first frame of one video and moves the video and the WebP into
+    their subfolder. Runs in a worker thread (ffmpeg engine) or a reused worker
+    process (pyav engine), so output is collected in a list and printed in one
+    piece when the job finishes. If the PyAV engine fails on a file, the ffmpeg
+    subprocess is used for that file instead, except in multi-frame mode, where
+    the file is reported as failed (FFmpeg would only write the first frame).
+    frame_options (PyAV only) are passed to pyav_engine.extract_frames() to also
+    write several frames, a contact sheet and a JSON manifest into the subfolder
+    in the same decode session.
+    Returns (success, log_lines).
+    """
+    log = []
+    item_path = os.path.join(abs_target_dir, item_name)
+    base_name, _ = os.path.splitext(item_name)
+    log.append(f"\n▶️ Processing video: {item_name}")
+
+    # Define paths
+    webp_filename = f"{base_name}.webp"
+    temp_webp_path = os.path.join(abs_target_dir, webp_filename) # Create webp here first
+    subfolder_path = os.path.join(abs_target_dir, base_name)
+    final_video_path = os.path.join(subfolder_path, item_name)
+    final_webp_path = os.path.join(subfolder_path, webp_filename)
+
+    # --- Step 1: Extract First Frame as WebP ---
+    try:
+        if engine == 'pyav':
+            try:
+                if frame_options:
+                    from pyav_engine import extract_frames
+                    manifest = extract_frames(item_path, subfolder_path, base_name, first_frame_path=temp_webp_path,
+                                              threads=threads, **frame_options)
+                    log.append(f"  🎞️ Extracted {len(manifest['frames'])} frame(s), sprite and manifest to: {base_name}/")
+                else:
+                    from pyav_engine import extract_first_frame
+                    extract_first_frame(item_path, temp_webp_path, threads)
+                log.append(f"  🖼️ Successfully extracted frame (PyAV) to: {webp_filename}")
+            except Exception as e:
+                if frame_options:
+                    # FFmpeg can only write the first frame, so falling back would silently drop the
+                    # requested frames, sprite and manifest; report the video as failed instead
+                    log.append(f"  ❌ ERROR extracting frames from '{item_name}' with PyAV: {e}")
+                    if os.path.exists(temp_webp_path):
+                        os.remove(temp_webp_path)
+                    return False, log
+                log.append(f"  ⚠️ PyAV could not read '{item_name}' ({e}), falling back to FFmpeg")
+                engine = 'ffmpeg'
+        if engine == 'ffmpeg':
+            ffmpeg_command = build_ffmpeg_command(item_path, temp_webp_path, threads)
+            log.append(f"  🔧 Running FFmpeg: {' '.join(ffmpeg_command)}")
+            subprocess.run(ffmpeg_command, check=True, capture_output=True, text=True, encoding='utf-8', errors='replace')
+            log.append(f"  🖼️ Successfully extracted frame to: {webp_filename}")
+
+        # --- Step 2: Create Subfolder and Move Files ---
+        try:
+            # Create subdirectory (does nothing if it already exists)
+            os.makedirs(subfolder_path, exist_ok=True)
+            log.append(f"  📁 Ensured directory exists: {base_name}/")
+
+            # Move MP4 video file
+            log.append(f"  ➡️ Moving {item_name} to {base_name}/")
+            shutil.move(item_path, final_video_path)
+
+            # Move WebP image file
+            log.append(f"  ➡️ Moving {webp_filename} to {base_name}/")
+            shutil.move(temp_webp_path, final_webp_path)
+
+            log.append(f"  ✅ Successfully processed and moved files for: {base_name}")
+            return True, log
+
+        except OSError as e:
+            log.append(f"  ❌ ERROR creating directory or moving files for '{base_name}': {e}")
+            # Attempt cleanup: Remove the generated webp if it still exists in the parent dir
+            if os.path.exists(temp_webp_path):
+                try:
+                    os.remove(temp_webp_path)
+                    log.append(f"  🧹 Cleaned up temporary file: {webp_filename}")
+                except OSError as rm_err:
+                    log.append(f"  ⚠️ Warning: Could not remove temporary file {webp_filename}: {rm_err}")
+            return False, log
+
+    except subprocess.CalledProcessError as e:
+        log.append(f"  ❌ ERROR running FFmpeg for '{item_name}':")
+        log.append(f"     Command: {' '.join(e.cmd)}")
+        log.append(f"     Return Code: {e.returncode}")
+        # Limit potentially long stderr output
+        stderr_output = e.stderr.strip()
+        if len(stderr_output) > 500:
+             stderr_output = stderr_output[:250] + "\n...\n" + stderr_output[-250:]
+        log.append(f"     Stderr: {stderr_output}")
+        return False, log
+    except Exception as e:
+        log.append(f"  ❌ An unexpected error occurred processing '{item_name}': {e}")
+        return False, log
+
+def process_videos_in_directory(target_dir=".", jobs=None, threads=None, engine='auto', frame_options=None):
     """
     Processes MP4 files in the specified directory:
     1. Extracts the first frame as WebP (same name).
     2. Creates a subfolder named after the video (without extension).
     3. Moves the original MP4 and the generated WebP into the subfolder.
+
+    Up to `jobs` ffmpeg processes run at once (default: one per CPU core), each
+    limited to `threads` threads (default: cores / jobs). Results are reported
+    in the order the jobs finish.
+
+    engine 'pyav' decodes in-process (see pyav_engine.py) in a pool of reused
+    worker processes; 'ffmpeg' starts one ffmpeg process per video; 'auto'
+    picks PyAV when it is installed.
+
+    frame_options (see process_one_video) need the PyAV engine.
     """
     abs_target_dir = os.path.abspath(target_dir)
     print(f"📂 Starting processing in directory: {abs_target_dir}")
@@ -38,10 +194,18 @@ def process_videos_in_directory(target_dir="."):
         print(f"❌ ERROR: Directory not found: {abs_target_dir}")
         return
 
-    # Check for ffmpeg before starting the loop
-    if not check_ffmpeg():
+    engine = resolve_engine(engine)
+    print(f"🎞️ Engine: {engine}")
+    if frame_options and engine != 'pyav':
+        print("❌ ERROR: Multi-frame thumbnails need the PyAV engine (pip install av).")
         return
 
+    # Check for ffmpeg before starting the loop (with PyAV it is only the fallback)
+    if not check_ffmpeg():
+        if engine != 'pyav':
+            return
+        print("   Continuing with PyAV only; files PyAV cannot read will fail.")
+
     processed_files = 0
     error_files = 0
 
@@ -52,89 +216,26 @@ def process_videos_in_directory(target_dir="."):
         print(f"❌ ERROR: Cannot list directory contents: {e}")
         return
 
-    for item_name in items:
-        item_path = os.path.join(abs_target_dir, item_name)
-
-        # Process only files ending with .mp4 (case-insensitive)
-        if os.path.isfile(item_path) and item_name.lower().endswith(".mp4"):
-            base_name, _ = os.path.splitext(item_name)
-            print(f"\n▶️ Processing video: {item_name}")
+    # Process only files ending with .mp4 (case-insensitive)
+    videos = [item_name for item_name in items
+              if item_name.lower().endswith(".mp4") and os.path.isfile(os.path.join(abs_target_dir, item_name))]
 
-            # Define paths
-            webp_filename = f"{base_name}.webp"
-            temp_webp_path = os.path.join(abs_target_dir, webp_filename) # Create webp here first
-            subfolder_path = os.path.join(abs_target_dir, base_name)
-            final_video_path = os.path.join(subfolder_path, item_name)
-            final_webp_path = os.path.join(subfolder_path, webp_filename)
+    jobs = jobs or default_jobs()
+    threads = threads or default_threads_per_job(jobs)
+    print(f"⚙️ {len(videos)} video(s), {jobs} parallel job(s), {threads} thread(s) per job")
 
-            # --- Step 1: Extract First Frame as WebP ---
-            try:
-                # FFmpeg command:
-                # -i : input file
-                # -vf "select=eq(n\,0)" : video filter to select the first frame (index 0)
-                #                      (backslash before comma might be needed depending on shell/OS)
-                # -frames:v 1 : extract only one frame
-                # -c:v libwebp : specify the WebP codec
-                # -lossless 0 : use lossy compression (0=lossy, 1=lossless) - adjust if needed
-                # -q:v 80 : quality for lossy WebP (0-100, higher is better/larger). Adjust!
-                # -an : disable audio processing/output
-                # -y : overwrite output file without asking
-                ffmpeg_command = [
-                    'ffmpeg',
-                    '-i', item_path,
-                    '-vf', r'select=eq(n\,0)', # Raw string helps with backslash
-                    '-frames:v', '1',
-                    '-c:v', 'libwebp',
-                    '-lossless', '0', # Set to 1 for lossless
-                    '-q:v', '80',     # Quality (0-100) for lossy. Ignored if lossless=1
-                    '-an',
-                    '-y',
-                    temp_webp_path
-                ]
-                print(f"  🔧 Running FFmpeg: {' '.join(ffmpeg_command)}")
-                result = subprocess.run(ffmpeg_command, check=True, capture_output=True, text=True, encoding='utf-8')
-                print(f"  🖼️ Successfully extracted frame to: {webp_filename}")
-
-                # --- Step 2: Create Subfolder and Move Files ---
-                try:
-                    # Create subdirectory (does nothing if it already exists)
-                    os.makedirs(subfolder_path, exist_ok=True)
-                    print(f"  📁 Ensured directory exists: {base_name}/")
-
-                    # Move MP4 video file
-                    print(f"  ➡️ Moving {item_name} to {base_name}/")
-                    shutil.move(item_path, final_video_path)
-
-                    # Move WebP image file
-                    print(f"  ➡️ Moving {webp_filename} to {base_name}/")
-                    shutil.move(temp_webp_path, final_webp_path)
-
-                    print(f"  ✅ Successfully processed and moved files for: {base_name}")
-                    processed_files += 1
-
-                except OSError as e:
-                    print(f"  ❌ ERROR creating directory or moving files for '{base_name}': {e}")
-                    error_files += 1
-                    # Attempt cleanup: Remove the generated webp if it still exists in the parent dir
-                    if os.path.exists(temp_webp_path):
-                        try:
-                            os.remove(temp_webp_path)
-                            print(f"  🧹 Cleaned up temporary file: {webp_filename}")
-                        except OSError as rm_err:
-                            print(f"  ⚠️ Warning: Could not remove temporary file {webp_filename}: {rm_err}")
-
-            except subprocess.CalledProcessError as e:
-                print(f"  ❌ ERROR running FFmpeg for '{item_name}':")
-                print(f"     Command: {' '.join(e.cmd)}")
-                print(f"     Return Code: {e.returncode}")
-                # Limit potentially long stderr output
-                stderr_output = e.stderr.strip()
-                if len(stderr_output) > 500:
-                     stderr_output = stderr_output[:250] + "\n...\n" + stderr_output[-250:]
-                print(f"     Stderr: {stderr_output}")
-                error_files += 1
-            except Exception as e:
-                print(f"  ❌ An unexpected error occurred processing '{item_name}': {e}")
+    # With ffmpeg each job spends its time inside the subprocess, so plain threads are enough to drive them.
+    # PyAV decodes in Python, so it runs in worker processes that stay alive for the whole batch.
+    executor_class = ProcessPoolExecutor if engine == 'pyav' else ThreadPoolExecutor
+    with executor_class(max_workers=jobs) as executor:
+        futures = [executor.submit(process_one_video, abs_target_dir, item_name, threads, engine, frame_options) for item_name in videos]
+        for done, future in enumerate(as_completed(futures), start=1):
+            success, log = future.result()
+            print("\n".join(log))
+            print(f"  [{done}/{len(videos)}]")
+            if success:
+                processed_files += 1
+            else:
                 error_files += 1
 
     print("\n🏁 Processing Finished!")
@@ -153,7 +254,46 @@ if __name__ == "__main__":
     # if user_input_dir.strip():
     #     target_video_directory = user_input_dir.strip()
 
-    process_videos_in_directory(target_video_directory)
+    parser = argparse.ArgumentParser(description="Extract the first frame of every MP4 and sort each video into its own folder.")
+    parser.add_argument("directory", nargs="?", default=target_video_directory,
+                        help=f"Directory with the MP4 files (default: {target_video_directory})")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help=f"Number of ffmpeg jobs to run at once (default: CPU cores = {default_jobs()})")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Threads per ffmpeg job (default: CPU cores / jobs)")
+    parser.add_argument("--engine", choices=ENGINES, default='auto',
+                        help="pyav: decode in-process with PyAV; ffmpeg: one ffmpeg process per video; "
+                             "auto (default): PyAV if installed, ffmpeg otherwise")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="Also extract this many evenly spaced frames plus a contact sheet and a JSON manifest "
+                             "(PyAV engine; with --keyframes: at most this many keyframes, 0 = all)")
+    parser.add_argument("--keyframes", action="store_true",
+                        help="Multi-frame mode using keyframes only; non-keyframes are never decoded")
+    parser.add_argument("--tile-width", type=int, default=320, help="Contact sheet tile width in pixels (default: 320)")
+    parser.add_argument("--columns", type=int, default=5, help="Contact sheet tiles per row (default: 5)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and process each new MP4 as soon as it has finished being written "
+                             "(see watch_folder.py); Ctrl+C to stop")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="Watch mode: seconds a file's size must stay unchanged before processing (default: 2)")
+    args = parser.parse_args()
+
+    frame_options = None
+    if args.frames is not None or args.keyframes:
+        frame_options = {
+            'count': args.frames if args.frames is not None else (0 if args.keyframes else 10),
+            'keyframes_only': args.keyframes,
+            'tile_width': args.tile_width,
+            'columns': args.columns,
+        }
+        if frame_options['count'] <= 0 and not args.keyframes:
+            parser.error("--frames must be positive unless --keyframes is used")
+
+    if args.watch:
+        from watch_folder import watch_directory
+        watch_directory(args.directory, args.jobs, args.threads, args.engine, frame_options, args.settle)
+    else:
+        process_videos_in_directory(args.directory, args.jobs, args.threads, args.engine, frame_options)
 
     # Keep console open on Windows if run by double-clicking
     if sys.platform == "win32":
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Append-only job journal for the watch mode of deal_tool.py.
+
+Every state change is one JSON line ({"video", "state", "time", ...}) that is
+flushed and fsynced before the job moves on, so after a crash or Ctrl+C the
+journal says exactly which videos were started but not finished. A torn last
+line (power loss in the middle of a write) is ignored on load.
+"""
+
+import json
+import os
+import time
+
+JOURNAL_NAME = '.deal_tool_journal.jsonl'
+
+STARTED = 'started'
+DONE = 'done'
+FAILED = 'failed'
+
+class JobJournal:
+    def __init__(self, path):
+        self.path = path
+        self.jobs = {} # video name -> latest record
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # Torn write from a crash
+                    self.jobs[record['video']] = record
+            self._compact()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _compact(self):
+        """Rewrites the journal with only the latest record per video, so it doesn't grow forever."""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for record in self.jobs.values():
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def record(self, video, state, **extra):
+        record = {'video': video, 'state': state, 'time': round(time.time(), 3), **extra}
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.jobs[video] = record
+
+    def state(self, video):
+        record = self.jobs.get(video)
+        return record['state'] if record else None
+
+    def unfinished(self):
+        """Videos that were started but never reached done/failed (interrupted jobs)."""
+        return [video for video, record in self.jobs.items() if record['state'] == STARTED]
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In-process first-frame extraction with PyAV (pip install av).
+
+The ffmpeg engine in deal_tool.py starts a new ffmpeg process per video and
+builds a filter graph just to grab frame 0. For short clips that startup cost
+dominates. Here the container is opened inside a long-lived worker process,
+only the first video frame is decoded, and Pillow encodes the WebP with the
+same quality (80) as the ffmpeg command.
+
+extract_frames() does the same for several frames at once (evenly spaced or
+keyframes only) and also writes a contact-sheet sprite and a JSON manifest.
+"""
+
+import json
+import math
+import os
+
+import av
+from PIL import Image
+
+WEBP_QUALITY = 80 # Same as '-q:v 80' in the ffmpeg command
+SEEK_GAP = 2.0 # Seconds: closer targets are reached by decoding forward instead of seeking
+
+def frame_to_image(frame):
+    """Converts a decoded frame to an RGB Pillow image, applying the display rotation like ffmpeg's autorotate."""
+    image = frame.to_image()
+    rotation = getattr(frame, 'rotation', 0)
+    if rotation:
+        image = image.rotate(rotation, expand=True)
+    return image
+
+def extract_first_frame(video_path, webp_path, threads=1, quality=WEBP_QUALITY):
+    """Decodes the first video frame of video_path and saves it as a lossy WebP."""
+    with av.open(video_path) as container:
+        if not container.streams.video:
+            raise ValueError(f"No video stream in {video_path}")
+        stream = container.streams.video[0]
+        # One frame only: slice threads help, frame threads would just add latency
+        stream.codec_context.thread_count = threads
+        stream.thread_type = 'SLICE'
+        for frame in container.decode(stream):
+            image = frame_to_image(frame)
+            break
+        else:
+            raise ValueError(f"No decodable video frame in {video_path}")
+    image.save(webp_path, 'WEBP', quality=quality, lossless=False)
+
+def _stream_duration(container, stream):
+    """Duration of the video stream in seconds, or 0 if the container doesn't say."""
+    if stream.duration and stream.time_base:
+        return float(stream.duration * stream.time_base)
+    if container.duration:
+        return container.duration / av.time_base
+    return 0.0
+
+def extract_frames(video_path, out_dir, base_name, count=10, keyframes_only=False,
+                   first_frame_path=None, tile_width=320, columns=5, threads=1, quality=WEBP_QUALITY):
+    """
+    Extracts several frames of one video in a single open/decode session and writes,
+    into out_dir:
+      <base_name>_frame_000.webp ...  the frames at full resolution
+      <base_name>_sprite.webp         a contact sheet of all frames, `columns` tiles per row
+      <base_name>_frames.json         timestamps and sprite tile positions of every frame
+
+    Evenly spaced mode takes `count` frames at the middle of equal slices of the
+    video. Each target is reached by seeking to the keyframe before it and
+    decoding forward; targets less than SEEK_GAP seconds ahead are reached by
+    decoding forward without seeking.
+
+    Keyframes-only mode tells the decoder to skip every non-keyframe, so only
+    keyframes are decoded at all. With `count` set, at most `count` keyframes
+    are kept, spaced at least duration / count apart; count=0 keeps every keyframe.
+
+    If first_frame_path is given, the first frame is also saved there (the same
+    image deal_tool.py writes in first-frame mode). Returns the manifest dict.
+    out_dir is only created once the first frame has decoded, so a video PyAV
+    cannot read leaves nothing behind for the ffmpeg fallback.
+    """
+    frames = []
+    tiles = []
+
+    def take(frame, start_time):
+        image = frame_to_image(frame)
+        index = len(frames)
+        file_name = f"{base_name}_frame_{index:03d}.webp"
+        image.save(os.path.join(out_dir, file_name), 'WEBP', quality=quality, lossless=False)
+        tile = image.copy()
+        tile.thumbnail((tile_width, tile_width * 4))
+        tiles.append(tile)
+        frames.append({
+            'index': index,
+            'time': round(frame.time - start_time, 3),
+            'pts': frame.pts,
+            'key_frame': bool(frame.key_frame),
+            'file': file_name,
+        })
+
+    with av.open(video_path) as container:
+        if not container.streams.video:
+            raise ValueError(f"No video stream in {video_path}")
+        stream = container.streams.video[0]
+        stream.codec_context.thread_count = threads
+        stream.thread_type = 'AUTO'
+        if keyframes_only:
+            # The decoder drops non-keyframes without decoding them
+            stream.codec_context.skip_frame = 'NONKEY'
+
+        duration = _stream_duration(container, stream)
+        if not keyframes_only and not duration:
+            raise ValueError(f"Unknown duration, cannot space frames evenly in {video_path}")
+        start_pts = stream.start_time or 0
+        start_time = float(start_pts * stream.time_base)
+        decoded = container.decode(stream)
+
+        first = next(decoded, None)
+        if first is None:
+            raise ValueError(f"No decodable video frame in {video_path}")
+        os.makedirs(out_dir, exist_ok=True)
+        if first_frame_path:
+            frame_to_image(first).save(first_frame_path, 'WEBP', quality=quality, lossless=False)
+
+        if keyframes_only:
+            spacing = duration / count if count and duration else 0
+            next_time = 0.0
+            for frame in _chain(first, decoded):
+                if frame.time is None:
+                    continue
+                frame_time = frame.time - start_time
+                if frame_time + 1e-6 >= next_time:
+                    take(frame, start_time)
+                    next_time = frame_time + spacing
+                    if count and len(frames) >= count:
+                        break
+        else:
+            targets = [duration * (index + 0.5) / count for index in range(count)]
+            last_time = first.time - start_time if first.time is not None else 0.0
+            pending = first
+            for target in targets:
+                if target - last_time > SEEK_GAP:
+                    # Jump to the keyframe before the target, then decode forward to it
+                    container.seek(start_pts + int(target / stream.time_base), stream=stream, backward=True)
+                    decoded = container.decode(stream)
+                    pending = None
+                for frame in _chain(pending, decoded):
+                    pending = None
+                    if frame.time is None:
+                        continue
+                    last_time = frame.time - start_time
+                    if last_time + 1e-6 >= target:
+                        take(frame, start_time)
+                        break
+                else:
+                    break # Reached the end of the stream
+
+    if not frames:
+        raise ValueError(f"No frames extracted from {video_path}")
+
+    # Contact sheet: all tiles share the size of the first one
+    tile_w, tile_h = tiles[0].size
+    columns = max(1, min(columns, len(tiles)))
+    rows = math.ceil(len(tiles) / columns)
+    sprite = Image.new('RGB', (tile_w * columns, tile_h * rows))
+    for entry, tile in zip(frames, tiles):
+        x = (entry['index'] % columns) * tile_w
+        y = (entry['index'] // columns) * tile_h
+        sprite.paste(tile.resize((tile_w, tile_h)) if tile.size != (tile_w, tile_h) else tile, (x, y))
+        entry.update({'x': x, 'y': y})
+    sprite_name = f"{base_name}_sprite.webp"
+    sprite.save(os.path.join(out_dir, sprite_name), 'WEBP', quality=quality, lossless=False)
+
+    manifest = {
+        'video': os.path.basename(video_path),
+        'duration': round(duration, 3),
+        'mode': 'keyframes' if keyframes_only else 'even',
+        'sprite': {'file': sprite_name, 'tile_width': tile_w, 'tile_height': tile_h,
+                   'columns': columns, 'rows': rows},
+        'frames': frames,
+    }
+    manifest_path = os.path.join(out_dir, f"{base_name}_frames.json")
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+def _chain(first, rest):
+    """Yields `first` (if not None) followed by the frames of `rest`."""
+    if first is not None:
+        yield first
+    # A plain loop, not `yield from`: abandoning this generator must not close `rest`,
+    # which the next target keeps decoding from
+    for frame in rest:
+        yield frame
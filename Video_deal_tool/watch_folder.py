@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch mode for deal_tool.py: a long-running loop that processes each new MP4
+dropped into the folder a few seconds after it has finished being written.
+
+- New files are noticed through watchdog (inotify / FSEvents / ReadDirectoryChangesW)
+  when it is installed (pip install watchdog), otherwise the top level of the
+  folder is polled.
+- A file counts as finished once its size and mtime have not changed for
+  `settle` seconds.
+- Every job goes through the append-only journal (job_journal.py). On restart,
+  jobs that were started but not finished are repaired or re-queued, and stray
+  .webp files from an interrupted move are put where they belong.
+"""
+
+import os
+import shutil
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from deal_tool import (check_ffmpeg, default_jobs, default_threads_per_job, process_one_video,
+                       resolve_engine)
+from job_journal import DONE, FAILED, JOURNAL_NAME, STARTED, JobJournal
+
+DEFAULT_SETTLE = 2.0 # Seconds a file's size must stay unchanged before it is processed
+POLL_INTERVAL = 1.0
+
+def is_top_level_mp4(abs_target_dir, path):
+    return os.path.dirname(os.path.abspath(path)) == abs_target_dir and path.lower().endswith('.mp4')
+
+def recover_job(abs_target_dir, item_name):
+    """
+    Repairs a job the journal shows as started but not finished.
+    Returns 'requeue' if the video must be processed again, 'done' if only the
+    move was interrupted and has now been completed, or 'gone' if the video no
+    longer exists.
+    """
+    base_name, _ = os.path.splitext(item_name)
+    item_path = os.path.join(abs_target_dir, item_name)
+    temp_webp_path = os.path.join(abs_target_dir, f"{base_name}.webp")
+    subfolder_path = os.path.join(abs_target_dir, base_name)
+    final_video_path = os.path.join(subfolder_path, item_name)
+    final_webp_path = os.path.join(subfolder_path, f"{base_name}.webp")
+
+    if os.path.exists(item_path):
+        # Interrupted before the video was moved: start over
+        if os.path.exists(temp_webp_path):
+            os.remove(temp_webp_path)
+        return 'requeue'
+    if os.path.exists(final_video_path):
+        # Interrupted between the two moves
+        if os.path.exists(temp_webp_path):
+            shutil.move(temp_webp_path, final_webp_path)
+        if os.path.exists(final_webp_path):
+            return 'done'
+        shutil.move(final_video_path, item_path)
+        return 'requeue'
+    return 'gone'
+
+def _start_observer(abs_target_dir, on_path):
+    """Starts a non-recursive watchdog observer, or returns None if watchdog isn't installed."""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_created(self, event):
+            if not event.is_directory:
+                on_path(event.src_path)
+
+        def on_modified(self, event):
+            if not event.is_directory:
+                on_path(event.src_path)
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                on_path(event.dest_path)
+
+    observer = Observer()
+    observer.schedule(Handler(), abs_target_dir, recursive=False)
+    observer.start()
+    return observer
+
+def _ignore_sigint():
+    # Worker processes let Ctrl+C reach only the watcher, which then waits for running jobs to finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def watch_directory(target_dir=".", jobs=None, threads=None, engine='auto', frame_options=None,
+                    settle=DEFAULT_SETTLE):
+    """Runs until Ctrl+C, processing every MP4 that appears in target_dir."""
+    abs_target_dir = os.path.abspath(target_dir)
+    if not os.path.isdir(abs_target_dir):
+        print(f"❌ ERROR: Directory not found: {abs_target_dir}")
+        return
+
+    engine = resolve_engine(engine)
+    if frame_options and engine != 'pyav':
+        print("❌ ERROR: Multi-frame thumbnails need the PyAV engine (pip install av).")
+        return
+    if not check_ffmpeg() and engine != 'pyav':
+        return
+    jobs = jobs or default_jobs()
+    threads = threads or default_threads_per_job(jobs)
+
+    journal = JobJournal(os.path.join(abs_target_dir, JOURNAL_NAME))
+    candidates = {} # video name -> (size, mtime_ns, time the size was first seen), or None if not yet checked
+
+    # Resume interrupted jobs first
+    for item_name in journal.unfinished():
+        outcome = recover_job(abs_target_dir, item_name)
+        print(f"♻️ Resuming {item_name}: {outcome}")
+        if outcome == 'requeue':
+            candidates[item_name] = None
+        else:
+            journal.record(item_name, DONE if outcome == 'done' else FAILED, note=f"recovered: {outcome}")
+
+    def on_path(path):
+        if is_top_level_mp4(abs_target_dir, path):
+            # dict item assignment is atomic, safe from the observer thread
+            candidates.setdefault(os.path.basename(path), None)
+
+    # Files that arrived while the watcher wasn't running (top level only, one listing)
+    with os.scandir(abs_target_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith('.mp4'):
+                candidates.setdefault(entry.name, None)
+
+    observer = _start_observer(abs_target_dir, on_path)
+    mode = "watchdog" if observer else f"polling every {POLL_INTERVAL:g}s (pip install watchdog for instant events)"
+    print(f"👀 Watching {abs_target_dir} ({mode}); engine {engine}, {jobs} job(s), {threads} thread(s) per job. Ctrl+C to stop.")
+
+    if engine == 'pyav':
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_ignore_sigint)
+    else:
+        executor = ThreadPoolExecutor(max_workers=jobs)
+    running = {} # future -> video name
+    processed_files = 0
+    error_files = 0
+    try:
+        with executor:
+            while True:
+                time.sleep(POLL_INTERVAL)
+                now = time.monotonic()
+
+                if observer is None:
+                    with os.scandir(abs_target_dir) as entries:
+                        for entry in entries:
+                            if entry.is_file() and entry.name.lower().endswith('.mp4'):
+                                candidates.setdefault(entry.name, None)
+
+                # Submit files whose size has settled
+                busy = set(running.values())
+                for item_name, seen in list(candidates.items()):
+                    if item_name in busy:
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(abs_target_dir, item_name))
+                    except OSError:
+                        del candidates[item_name] # Deleted or moved away
+                        continue
+                    signature = (stat.st_size, stat.st_mtime_ns)
+                    record = journal.jobs.get(item_name)
+                    if record and record['state'] == FAILED and record.get('signature') == list(signature):
+                        del candidates[item_name] # Already failed on exactly this file
+                        continue
+                    if seen is None or seen[:2] != signature:
+                        candidates[item_name] = (*signature, now)
+                    elif now - seen[2] >= settle:
+                        del candidates[item_name]
+                        journal.record(item_name, STARTED, signature=list(signature))
+                        future = executor.submit(process_one_video, abs_target_dir, item_name, threads, engine,
+                                                 frame_options)
+                        running[future] = item_name
+
+                # Report finished jobs
+                for future in [future for future in running if future.done()]:
+                    item_name = running.pop(future)
+                    try:
+                        success, log = future.result()
+                    except Exception as e:
+                        success, log = False, [f"\n❌ Worker failed on '{item_name}': {e}"]
+                    print("\n".join(log))
+                    if success:
+                        processed_files += 1
+                        journal.record(item_name, DONE)
+                    else:
+                        error_files += 1
+                        journal.record(item_name, FAILED, signature=journal.jobs[item_name].get('signature'))
+    except KeyboardInterrupt:
+        # Leaving the executor block waits for running jobs; anything cut short stays 'started'
+        print("\n🛑 Stopping watcher...")
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
+        journal.close()
+        print(f"   Processed successfully: {processed_files} video(s)")
+        print(f"   Encountered errors: {error_files} video(s)")